@@ -0,0 +1,89 @@
+# chat/consumers.py
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .models import ChatRoom
+from .realtime import room_group, user_group
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """WebSocket-канал чата: новые сообщения, отметки о прочтении и набор текста.
+
+    Сервер присылает события вида {"type": "message" | "read" | "typing", ...}.
+    Клиент может отправить {"type": "typing", "is_typing": true} и {"type": "read"}.
+    """
+
+    async def connect(self):
+        self.chat_room_id = self.scope['url_route']['kwargs']['chat_room_id']
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.chat_room = await self.get_chat_room()
+        if self.chat_room is None:
+            await self.close(code=4403)
+            return
+
+        self.group_name = room_group(self.chat_room_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        event_type = content.get('type')
+        if event_type == 'typing':
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.event',
+                'payload': {
+                    'type': 'typing',
+                    'user_id': self.user.id,
+                    'is_typing': bool(content.get('is_typing', True))
+                }
+            })
+        elif event_type == 'read':
+            # Рассылка отметки о прочтении уходит из mark_read после коммита
+            await self.mark_read()
+        else:
+            await self.send_json({'type': 'error', 'error': 'Неизвестный тип события'})
+
+    async def chat_event(self, event):
+        await self.send_json(event['payload'])
+
+    @database_sync_to_async
+    def get_chat_room(self):
+        """Активный чат, если пользователь - его участник"""
+        try:
+            chat_room = ChatRoom.objects.get(id=self.chat_room_id, is_active=True)
+        except ChatRoom.DoesNotExist:
+            return None
+        if self.user.id not in (chat_room.user1_id, chat_room.user2_id):
+            return None
+        return chat_room
+
+    @database_sync_to_async
+    def mark_read(self):
+        self.chat_room.mark_read(self.user)
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """WebSocket-канал личных уведомлений пользователя, например {"type": "match", "match": {...}}"""
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group_name = user_group(self.user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notify(self, event):
+        await self.send_json(event['payload'])
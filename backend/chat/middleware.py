@@ -0,0 +1,44 @@
+# chat/middleware.py
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    """Пользователь по access-токену SimpleJWT; AnonymousUser, если токен не подходит"""
+    authentication = JWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Аутентификация WebSocket-соединений токеном SimpleJWT.
+
+    Браузер не может передать заголовок Authorization при открытии WebSocket,
+    поэтому токен берется из параметра ?token=, а при его отсутствии - из заголовка.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = AnonymousUser()
+
+        raw_token = None
+        query = parse_qs(scope.get('query_string', b'').decode())
+        if query.get('token'):
+            raw_token = query['token'][0]
+        else:
+            headers = dict(scope.get('headers', []))
+            parts = headers.get(b'authorization', b'').split()
+            if len(parts) == 2 and parts[0].lower() == b'bearer':
+                raw_token = parts[1].decode()
+
+        if raw_token:
+            scope['user'] = await get_user_for_token(raw_token)
+        return await super().__call__(scope, receive, send)
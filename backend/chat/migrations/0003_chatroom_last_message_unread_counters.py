@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_room_stats(apps, schema_editor):
+    """Заполнить последнее сообщение и счетчики непрочитанных для существующих чатов"""
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    for room in ChatRoom.objects.all():
+        messages = Message.objects.filter(chat_room=room)
+        last = messages.order_by('-id').first()
+        unread = messages.filter(is_read=False)
+        ChatRoom.objects.filter(pk=room.pk).update(
+            last_message=last,
+            last_message_at=last.timestamp if last else None,
+            user1_unread_count=unread.exclude(sender_id=room.user1_id).count(),
+            user2_unread_count=unread.exclude(sender_id=room.user2_id).count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_alter_message_options_rename_text_message_content_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user1_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user2_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_room_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_room_timestamp_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user1'], name='chat_room_user1_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user2'], name='chat_room_user2_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['chat_room', 'sender'], name='chat_msg_unread_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 # chat/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.auth.models import User
+from .tasks import mark_messages_read
 
 
 class ChatRoom(models.Model):
@@ -9,13 +11,70 @@ class ChatRoom(models.Model):
     user2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_rooms_as_user2')
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Денормализованные данные для списка чатов (обновляются в register_message/mark_read)
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    user1_unread_count = models.PositiveIntegerField(default=0)
+    user2_unread_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ['user1', 'user2']
+        indexes = [
+            # Список чатов: user1 = ? OR user2 = ? среди активных
+            models.Index(fields=['user1'], condition=Q(is_active=True), name='chat_room_user1_active_idx'),
+            models.Index(fields=['user2'], condition=Q(is_active=True), name='chat_room_user2_active_idx'),
+        ]
 
     def __str__(self):
         return f"Chat: {self.user1.username} & {self.user2.username}"
 
+    def _unread_field(self, user_id):
+        """Имя счетчика непрочитанных для участника user_id"""
+        return 'user1_unread_count' if user_id == self.user1_id else 'user2_unread_count'
+
+    def unread_count_for(self, user_id):
+        return getattr(self, self._unread_field(user_id))
+
+    def register_message(self, message):
+        """Учесть новое сообщение: последнее сообщение и +1 непрочитанное у получателя.
+
+        Выполняется одним UPDATE, поэтому параллельные отправки не теряют инкременты.
+        """
+        recipient_field = 'user2_unread_count' if message.sender_id == self.user1_id else 'user1_unread_count'
+        is_newer = Q(last_message__isnull=True) | Q(last_message_id__lt=message.pk)
+        ChatRoom.objects.filter(pk=self.pk).update(
+            last_message=Case(
+                When(is_newer, then=Value(message.pk)),
+                default=F('last_message'),
+                output_field=models.BigIntegerField()
+            ),
+            last_message_at=Case(
+                When(is_newer, then=Value(message.timestamp)),
+                default=F('last_message_at'),
+                output_field=models.DateTimeField()
+            ),
+            **{recipient_field: F(recipient_field) + 1}
+        )
+
+    def mark_read(self, user):
+        """Обнулить счетчик непрочитанных пользователя; флаги сообщений и рассылка - в фоне.
+
+        Список чатов и повторный запрос истории видят счетчик сразу, а UPDATE
+        непрочитанных сообщений и отметка о прочтении для WebSocket выполняются задачей
+        после коммита и не задерживают ответ. Задача помечает только сообщения до
+        последнего, учтенного в обнуленном счетчике: пришедшие позже остаются
+        непрочитанными. Возвращает id этого сообщения (None, если сообщений нет)."""
+        with transaction.atomic():
+            # Граница читается под блокировкой строки чата: register_message обновляет ту же
+            # строку, поэтому сообщение не может попасть в счетчик после чтения границы
+            up_to_id = ChatRoom.objects.select_for_update().filter(pk=self.pk).values_list(
+                'last_message_id', flat=True
+            ).first()
+            ChatRoom.objects.filter(pk=self.pk).update(**{self._unread_field(user.id): 0})
+            if up_to_id is not None:
+                mark_messages_read.enqueue(chat_room_id=self.pk, user_id=user.id, up_to_id=up_to_id)
+        return up_to_id
+
 
 class Message(models.Model):
     """Сообщение в чате"""
@@ -27,6 +86,12 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Keyset-пагинация истории чата по (timestamp, id)
+            models.Index(fields=['chat_room', 'timestamp', 'id'], name='chat_msg_room_ts_id_idx'),
+            # Отметка о прочтении: непрочитанные сообщения чата от собеседника
+            models.Index(fields=['chat_room', 'sender'], condition=Q(is_read=False), name='chat_msg_unread_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} at {self.timestamp}"
\ No newline at end of file
@@ -0,0 +1,38 @@
+# chat/realtime.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def room_group(chat_room_id):
+    """Имя группы channel layer для WebSocket-подписчиков чата"""
+    return f'chat_{chat_room_id}'
+
+
+def broadcast(chat_room_id, payload):
+    """Разослать событие подписчикам чата после коммита текущей транзакции"""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    def send():
+        async_to_sync(layer.group_send)(room_group(chat_room_id), {'type': 'chat.event', 'payload': payload})
+
+    transaction.on_commit(send)
+
+
+def user_group(user_id):
+    """Имя группы channel layer для личных уведомлений пользователя"""
+    return f'user_{user_id}'
+
+
+def notify_user(user_id, payload):
+    """Отправить личное уведомление подключенным клиентам пользователя после коммита"""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    def send():
+        async_to_sync(layer.group_send)(user_group(user_id), {'type': 'notify', 'payload': payload})
+
+    transaction.on_commit(send)
@@ -1,19 +1,9 @@
 # chat/serializers.py
 from rest_framework import serializers
+from users.serializers import simple_profile
 from .models import ChatRoom, Message
 
 
-class SimpleProfileSerializer(serializers.Serializer):
-    """Упрощенный сериализатор профиля для чата"""
-    id = serializers.IntegerField(source='user.id')
-    username = serializers.CharField(source='user.username')
-    first_name = serializers.CharField(source='user.first_name')
-    last_name = serializers.CharField(source='user.last_name')
-    faculty = serializers.CharField()
-    year_of_study = serializers.IntegerField()
-    bio = serializers.CharField()
-
-
 class MessageSerializer(serializers.ModelSerializer):
     sender_profile = serializers.SerializerMethodField()
 
@@ -23,13 +13,11 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['sender', 'timestamp']
 
     def get_sender_profile(self, obj):
-        try:
-            return SimpleProfileSerializer(obj.sender.profile).data
-        except:
-            return None
+        return simple_profile(obj.sender)
 
 
 class ChatRoomSerializer(serializers.ModelSerializer):
+    """Чат для списка; пользователи, профили и last_message ожидаются загруженными через select_related"""
     other_user = serializers.SerializerMethodField()
     other_user_profile = serializers.SerializerMethodField()
     last_message = serializers.SerializerMethodField()
@@ -43,32 +31,26 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     def get_other_user(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            if obj.user1 == request.user:
-                return obj.user2.id
+            if obj.user1_id == request.user.id:
+                return obj.user2_id
             else:
-                return obj.user1.id
+                return obj.user1_id
         return None
 
     def get_other_user_profile(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            try:
-                if obj.user1 == request.user:
-                    return SimpleProfileSerializer(obj.user2.profile).data
-                else:
-                    return SimpleProfileSerializer(obj.user1.profile).data
-            except:
-                return None
+            other = obj.user2 if obj.user1_id == request.user.id else obj.user1
+            return simple_profile(other)
         return None
 
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
-        if last_message:
-            return MessageSerializer(last_message).data
+        if obj.last_message_id:
+            return MessageSerializer(obj.last_message).data
         return None
 
     def get_unread_count(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
-        return 0
\ No newline at end of file
+            return obj.unread_count_for(request.user.id)
+        return 0
@@ -0,0 +1,14 @@
+# chat/tasks.py
+from jobs.queue import task
+from .realtime import broadcast
+
+
+@task('chat.mark_messages_read')
+def mark_messages_read(chat_room_id, user_id, up_to_id):
+    """Пометить входящие сообщения пользователя до up_to_id прочитанными и разослать отметку о прочтении"""
+    from .models import Message
+
+    Message.objects.filter(chat_room_id=chat_room_id, is_read=False, id__lte=up_to_id).exclude(
+        sender_id=user_id
+    ).update(is_read=True)
+    broadcast(chat_room_id, {'type': 'read', 'user_id': user_id})
@@ -1,3 +1,391 @@
-from django.test import TestCase
+# chat/tests.py
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from datetime import timedelta
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from studymatch.cursors import encode_cursor
+from studymatch.testing import QueryPlanAssertionsMixin, TestCase, TransactionTestCase
+from users.models import UserProfile
+from .middleware import JWTAuthMiddleware
+from .models import ChatRoom, Message
+from .routing import websocket_urlpatterns
+from .serializers import ChatRoomSerializer, MessageSerializer
 
-# Create your tests here.
+# Стек WebSocket без проверки Origin (ее добавляет studymatch/asgi.py)
+websocket_application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+class ChatWebSocketTestCase(TransactionTestCase):
+    """WebSocket-канал чата на in-memory channel layer, без внешнего брокера"""
+
+    def setUp(self):
+        self.user1 = User.objects.create(username='alice')
+        self.user2 = User.objects.create(username='bob')
+        self.outsider = User.objects.create(username='eve')
+        for user in (self.user1, self.user2, self.outsider):
+            UserProfile.objects.create(user=user)
+        self.chat_room = ChatRoom.objects.create(user1=self.user1, user2=self.user2)
+
+    def communicator(self, user=None, token=None):
+        if token is None and user is not None:
+            token = str(AccessToken.for_user(user))
+        path = f'/ws/chat/{self.chat_room.id}/'
+        if token:
+            path += f'?token={token}'
+        return WebsocketCommunicator(websocket_application, path)
+
+    async def test_rejects_anonymous_and_outsiders(self):
+        for communicator in (self.communicator(), self.communicator(token='garbage'),
+                             self.communicator(self.outsider)):
+            connected, _ = await communicator.connect()
+            self.assertFalse(connected)
+
+    async def test_pushes_messages_sent_over_http(self):
+        communicator = self.communicator(self.user1)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        def send_message():
+            client = APIClient()
+            client.force_authenticate(self.user2)
+            return client.post(f'/api/chat/messages/{self.chat_room.id}/', {'content': 'Привет'})
+
+        response = await sync_to_async(send_message)()
+        self.assertEqual(response.status_code, 201)
+
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['type'], 'message')
+        self.assertEqual(event['message']['content'], 'Привет')
+        await communicator.disconnect()
+
+    async def test_typing_and_read_receipts(self):
+        alice = self.communicator(self.user1)
+        bob = self.communicator(self.user2)
+        self.assertTrue((await alice.connect())[0])
+        self.assertTrue((await bob.connect())[0])
+
+        await alice.send_json_to({'type': 'typing', 'is_typing': True})
+        event = await bob.receive_json_from()
+        self.assertEqual(event, {'type': 'typing', 'user_id': self.user1.id, 'is_typing': True})
+        await alice.receive_json_from()
+
+        message = await sync_to_async(Message.objects.create)(chat_room=self.chat_room, sender=self.user1, content='Привет')
+        await sync_to_async(self.chat_room.register_message)(message)
+        await bob.send_json_to({'type': 'read'})
+        event = await alice.receive_json_from()
+        self.assertEqual(event, {'type': 'read', 'user_id': self.user2.id})
+        # Флаги сообщений обновляет фоновая задача до рассылки отметки
+        self.assertFalse(await Message.objects.filter(is_read=False).aexists())
+
+        await alice.disconnect()
+        await bob.disconnect()
+
+    async def test_match_notifications(self):
+        communicators = {}
+        for user in (self.user1, self.user2):
+            communicators[user.id] = WebsocketCommunicator(
+                websocket_application, f'/ws/notifications/?token={AccessToken.for_user(user)}'
+            )
+            self.assertTrue((await communicators[user.id].connect())[0])
+
+        def like(user, other):
+            client = APIClient()
+            client.force_authenticate(user)
+            return client.post(f'/api/matching/swipe/{other.id}/', {'action': 'like'})
+
+        await sync_to_async(like)(self.user1, self.user2)
+        self.assertTrue(await communicators[self.user1.id].receive_nothing())
+        response = await sync_to_async(like)(self.user2, self.user1)
+        self.assertTrue(response.data['match_created'])
+
+        for user, other in ((self.user1, self.user2), (self.user2, self.user1)):
+            event = await communicators[user.id].receive_json_from()
+            self.assertEqual(event['type'], 'match')
+            self.assertEqual(event['match']['other_user'], other.id)
+            await communicators[user.id].disconnect()
+
+
+class ChatRoomCountersTestCase(TestCase):
+    """Денормализованные последнее сообщение и счетчики непрочитанных в ChatRoom"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.other = User.objects.create(username='bob')
+        for user in (self.user, self.other):
+            UserProfile.objects.create(user=user)
+        self.room = ChatRoom.objects.create(user1=self.user, user2=self.other)
+
+    def send(self, sender, content):
+        message = Message.objects.create(chat_room=self.room, sender=sender, content=content)
+        self.room.register_message(message)
+        self.room.refresh_from_db()
+        return message
+
+    def test_register_message_and_mark_read(self):
+        first = self.send(self.other, 'Привет')
+        second = self.send(self.other, 'Как дела?')
+        self.assertEqual((self.room.last_message, self.room.last_message_at), (second, second.timestamp))
+        self.assertEqual(self.room.unread_count_for(self.user.id), 2)
+        self.assertEqual(self.room.unread_count_for(self.other.id), 0)
+
+        reply = self.send(self.user, 'Отлично')
+        self.assertEqual(self.room.last_message, reply)
+        self.assertEqual(self.room.unread_count_for(self.other.id), 1)
+
+        # Запоздавшая регистрация более старого сообщения не откатывает last_message
+        self.room.register_message(first)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message, reply)
+
+        self.assertEqual(self.room.mark_read(self.user), reply.id)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.unread_count_for(self.user.id), 0)
+        self.assertEqual(self.room.unread_count_for(self.other.id), 1)
+
+    def test_room_list_queries_do_not_grow(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for count in (1, 10):
+            for i in range(ChatRoom.objects.count(), count):
+                other = User.objects.create(username=f'friend{i}')
+                UserProfile.objects.create(user=other)
+                room = ChatRoom.objects.create(user1=other, user2=self.user)
+                room.register_message(Message.objects.create(chat_room=room, sender=other, content='Привет'))
+            with self.assertNumQueries(1):
+                response = client.get('/api/chat/rooms/')
+            self.assertEqual(len(response.data), count)
+            # Чат без сообщений - последним; у остальных последнее сообщение и 1 непрочитанное
+            self.assertEqual(response.data[-1]['id'], self.room.id)
+            self.assertEqual({(item['last_message']['content'], item['unread_count']) for item in response.data[:-1]},
+                             {('Привет', 1)} if count > 1 else set())
+
+
+class CreateChatRoomTestCase(TestCase):
+    """Создание чата: новый чат - 201, повторный запрос возвращает тот же чат"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.other = User.objects.create(username='bob')
+        for user in (self.user, self.other):
+            UserProfile.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.other)
+
+    def test_create_chat_room(self):
+        response = self.client.post(f'/api/chat/rooms/create/{self.user.id}/')
+        self.assertEqual(response.status_code, 201)
+        room = ChatRoom.objects.get()
+        self.assertEqual((room.user1, room.user2), (self.user, self.other))
+        self.assertEqual(response.data['id'], room.id)
+        self.assertEqual(response.data['other_user'], self.user.id)
+        self.assertIsNone(response.data['last_message'])
+
+        response = self.client.post(f'/api/chat/rooms/create/{self.user.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], room.id)
+        self.assertEqual(self.client.post('/api/chat/rooms/create/999999/').status_code, 404)
+
+
+class MessageHistoryTestCase(TestCase):
+    """История сообщений по курсорам: более старые страницы (before) и новые с последнего просмотра (after)"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.other = User.objects.create(username='bob')
+        for user in (self.user, self.other):
+            UserProfile.objects.create(user=user)
+        self.room = ChatRoom.objects.create(user1=self.user, user2=self.other)
+        start = timezone.now() - timedelta(hours=1)
+        self.messages = []
+        for i in range(7):
+            message = Message.objects.create(chat_room=self.room, sender=self.other, content=f'Сообщение {i}')
+            # Сообщения 3 и 4 с одним временем - порядок внутри секунды задает id
+            Message.objects.filter(pk=message.pk).update(timestamp=start + timedelta(minutes=3 if i == 4 else i))
+            self.messages.append(message.id)
+        self.url = f'/api/chat/messages/{self.room.id}/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_pages_backwards_with_before(self):
+        response = self.client.get(self.url, {'limit': 3})
+        self.assertEqual(set(response.data), {'results', 'before_cursor', 'after_cursor', 'has_more'})
+        self.assertEqual(self.ids(response), self.messages[4:])
+        self.assertTrue(response.data['has_more'])
+
+        # Каждая следующая страница старше предыдущей, внутри страницы - по возрастанию времени
+        pages = [self.ids(response)]
+        while response.data['has_more']:
+            response = self.client.get(self.url, {'limit': 3, 'before': response.data['before_cursor']})
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.ids(response))
+        self.assertEqual(pages, [self.messages[4:], self.messages[1:4], self.messages[:1]])
+        self.assertIsNone(response.data['before_cursor'])
+
+    def test_after_returns_new_messages(self):
+        response = self.client.get(self.url, {'limit': 3})
+        seen = response.data['after_cursor']
+
+        new = [Message.objects.create(chat_room=self.room, sender=self.user, content=f'Новое {i}').id for i in range(3)]
+        response = self.client.get(self.url, {'after': seen, 'limit': 2})
+        self.assertEqual(self.ids(response), new[:2])
+        self.assertTrue(response.data['has_more'])
+        self.assertIsNone(response.data['before_cursor'])
+        response = self.client.get(self.url, {'after': response.data['after_cursor'], 'limit': 2})
+        self.assertEqual(self.ids(response), new[2:])
+        self.assertFalse(response.data['has_more'])
+
+        # Новых сообщений нет - тот же курсор возвращается для следующего опроса
+        seen = response.data['after_cursor']
+        response = self.client.get(self.url, {'after': seen})
+        self.assertEqual(response.data, {'results': [], 'before_cursor': None, 'after_cursor': seen, 'has_more': False})
+
+    def test_bad_and_foreign_cursors(self):
+        for cursor in ('мусор', encode_cursor('2026-01-01T00:00:00+00:00', 'abc'), encode_cursor('вчера', 1),
+                       encode_cursor('2026-01-01T00:00:00+00:00', [1])):
+            for direction in ('before', 'after'):
+                response = self.client.get(self.url, {direction: cursor})
+                self.assertEqual(response.status_code, 400, (direction, cursor))
+        self.assertEqual(self.client.get(self.url, {'limit': 0}).status_code, 400)
+
+        # Курсор из чужого чата - только позиция во времени: видны лишь сообщения этого чата
+        stranger = User.objects.create(username='eve')
+        foreign_room = ChatRoom.objects.create(user1=self.other, user2=stranger)
+        foreign = Message.objects.create(chat_room=foreign_room, sender=stranger, content='Чужое')
+        cursor = encode_cursor(foreign.timestamp.isoformat(), foreign.id)
+        response = self.client.get(self.url, {'before': cursor})
+        self.assertEqual(self.ids(response), self.messages)
+        response = self.client.get(self.url, {'after': cursor})
+        self.assertEqual(self.ids(response), [])
+
+
+class QueryPlanTestCase(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAIN запросов горячих эндпоинтов чата на заполненной базе"""
+
+    def setUp(self):
+        users = [User.objects.create(username=f'user{i}') for i in range(12)]
+        for user in users:
+            UserProfile.objects.create(user=user)
+        self.user = users[0]
+        self.rooms = [ChatRoom.objects.create(user1=self.user, user2=other) for other in users[1:]]
+        for room in self.rooms:
+            for i in range(5):
+                message = Message.objects.create(chat_room=room, sender=room.user2, content=f'Сообщение {i}')
+                room.register_message(message)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_room_list(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/chat/rooms/'))
+
+    def test_history_marks_read(self):
+        room = self.rooms[0]
+        response = self.assertNoFullScans(lambda: self.client.get(f'/api/chat/messages/{room.id}/'))
+        self.assertEqual(len(response.data['results']), 5)
+        older = self.client.get(f'/api/chat/messages/{room.id}/', {'limit': 2}).data['before_cursor']
+        self.assertNoFullScans(lambda: self.client.get(f'/api/chat/messages/{room.id}/', {'before': older}))
+
+    def test_send_message(self):
+        room = self.rooms[0]
+        self.assertNoFullScans(lambda: self.client.post(f'/api/chat/messages/{room.id}/', {'content': 'Привет'}))
+
+
+class FastPathPayloadTestCase(TestCase):
+    """Списки чатов и сообщений из строк .values() совпадают по JSON с DRF-сериализаторами"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice', first_name='Алиса')
+        UserProfile.objects.create(user=self.user, faculty='ИТ', year_of_study=3, bio='Привет')
+        self.rooms = []
+        for i in range(3):
+            other = User.objects.create(username=f'friend{i}')
+            if i != 1:
+                UserProfile.objects.create(user=other)
+            room = ChatRoom.objects.create(user1=self.user, user2=other) if i % 2 else ChatRoom.objects.create(user1=other, user2=self.user)
+            if i:
+                for sender in (self.user, other):
+                    message = Message.objects.create(chat_room=room, sender=sender, content=f'Сообщение {i}')
+                    room.register_message(message)
+            self.rooms.append(room)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.renderer = JSONRenderer()
+
+    def test_chat_rooms(self):
+        response = self.client.get('/api/chat/rooms/')
+        rooms = [ChatRoom.objects.select_related('user1__profile', 'user2__profile', 'last_message__sender__profile').get(id=item['id'])
+                 for item in response.data]
+        expected = ChatRoomSerializer(rooms, many=True, context={'request': SimpleNamespace(user=self.user)}).data
+        self.assertEqual(self.renderer.render(response.data), self.renderer.render(expected))
+
+    def test_messages(self):
+        room = self.rooms[2]
+        # Флаги прочтения обновляет задача после коммита - сравниваем с итоговым состоянием
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(f'/api/chat/messages/{room.id}/')
+        expected = MessageSerializer(Message.objects.filter(chat_room=room).order_by('timestamp', 'id'), many=True).data
+        self.assertEqual(self.renderer.render(response.data['results']), self.renderer.render(expected))
+
+    def test_messages_reject_both_cursors(self):
+        url = f'/api/chat/messages/{self.rooms[2].id}/'
+        cursor = self.client.get(url).data['after_cursor']
+        response = self.client.get(url, {'before': cursor, 'after': cursor})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncViewsTestCase(TestCase):
+    """Асинхронные представления через ASGI-обработчик с JWT, без перехода в поток на весь запрос"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.other = User.objects.create(username='bob')
+        for user in (self.user, self.other):
+            UserProfile.objects.create(user=user)
+        self.room = ChatRoom.objects.create(user1=self.user, user2=self.other)
+        message = Message.objects.create(chat_room=self.room, sender=self.other, content='Привет')
+        self.room.register_message(message)
+        self.headers = {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_mark_read_stops_at_counted_messages(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.room.mark_read(self.user)
+        # Сообщение пришло после обнуления счетчика, но до выполнения задачи
+        late = Message.objects.create(chat_room=self.room, sender=self.other, content='Еще одно')
+        self.room.register_message(late)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(list(Message.objects.filter(is_read=False)), [late])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.unread_count_for(self.user.id), 1)
+
+    async def test_rooms_and_messages(self):
+        response = await self.async_client.get('/api/chat/rooms/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['unread_count'], 1)
+
+        response = await self.async_client.post(
+            f'/api/chat/messages/{self.room.id}/', {'content': 'Как дела?'},
+            content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = await self.async_client.get(f'/api/chat/messages/{self.room.id}/', headers=self.headers)
+        self.assertEqual([item['content'] for item in response.json()['results']], ['Привет', 'Как дела?'])
+        # Флаги в базе обновит задача после коммита, ответ уже показывает входящее прочитанным
+        self.assertTrue(response.json()['results'][0]['is_read'])
+        await self.room.arefresh_from_db()
+        self.assertEqual(self.room.unread_count_for(self.user.id), 0)
+
+        response = await self.async_client.get('/api/matching/matches/', headers=self.headers)
+        self.assertEqual(response.json(), [])
+        response = await self.async_client.get('/api/chat/rooms/')
+        self.assertEqual(response.status_code, 401)
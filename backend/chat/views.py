@@ -1,12 +1,23 @@
 # chat/views.py
+from datetime import datetime
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny  # ДОБАВЛЯЕМ AllowAny
-from django.db.models import Q
-from .models import ChatRoom, Message
+from django.db import transaction
+from django.db.models import F, Q
+from studymatch.cursors import encode_cursor, decode_cursor
+from studymatch.payloads import chat_room_payload, message_payload, CHAT_ROOM_VALUES, MESSAGE_VALUES
+from .models import ChatRoom
+from .realtime import broadcast
 from .serializers import ChatRoomSerializer, MessageSerializer
 
+# Размер страницы истории сообщений по умолчанию и максимальный
+MESSAGES_PAGE_SIZE = 50
+MAX_MESSAGES_PAGE_SIZE = 200
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])  # ИСПРАВЛЕНО: AllowAny вместо IsAuthenticated
@@ -14,51 +25,138 @@ def health_check(request):
     return Response({"status": "Chat API is working"})
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_chat_rooms(request):
+async def get_chat_rooms(request):
     """Получить список чатов пользователя"""
-    chat_rooms = ChatRoom.objects.filter(
-        Q(user1=request.user) | Q(user2=request.user),
+    # Один запрос: участники, профили и последнее сообщение подтягиваются JOIN-ами,
+    # счетчики непрочитанных хранятся в самой комнате; ответ собирается из строк .values()
+    rows = ChatRoom.objects.filter(
+        Q(user1_id=request.user.id) | Q(user2_id=request.user.id),
         is_active=True
-    )
-    serializer = ChatRoomSerializer(chat_rooms, many=True, context={'request': request})
-    return Response(serializer.data)
+    ).order_by(F('last_message_at').desc(nulls_last=True), '-created_at').values(*CHAT_ROOM_VALUES)
+    return Response([chat_room_payload(row, request.user.id) async for row in rows])
 
 
-@api_view(['GET', 'POST'])
+@async_api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
-def chat_messages(request, chat_room_id):
+async def chat_messages(request, chat_room_id):
     """Получить сообщения чата или отправить новое"""
     try:
-        chat_room = ChatRoom.objects.get(
+        chat_room = await ChatRoom.objects.aget(
             id=chat_room_id,
             is_active=True
         )
-        # Проверяем, что пользователь участник чата
-        if request.user not in [chat_room.user1, chat_room.user2]:
+        # Проверяем, что пользователь участник чата (по id, без загрузки пользователей)
+        if request.user.id not in (chat_room.user1_id, chat_room.user2_id):
             return Response({'error': 'Доступ запрещен'}, status=status.HTTP_403_FORBIDDEN)
     except ChatRoom.DoesNotExist:
         return Response({'error': 'Чат не найден'}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        # Помечаем сообщения как прочитанные
-        Message.objects.filter(
-            chat_room=chat_room
-        ).exclude(sender=request.user).update(is_read=True)
-
-        messages = chat_room.messages.all()
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        return await _message_page(request, chat_room)
 
     elif request.method == 'POST':
         serializer = MessageSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(chat_room=chat_room, sender=request.user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # Транзакции в асинхронном коде недоступны - запись целиком выполняется в потоке
+            data = await sync_to_async(_send_message)(request, chat_room, serializer)
+            return Response(data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _send_message(request, chat_room, serializer):
+    with transaction.atomic():
+        message = serializer.save(chat_room=chat_room, sender=request.user)
+        chat_room.register_message(message)
+        # Новое сообщение уходит подписчикам WebSocket после коммита
+        broadcast(chat_room.id, {'type': 'message', 'message': serializer.data})
+    return serializer.data
+
+
+async def _message_page(request, chat_room):
+    """Страница истории сообщений с keyset-пагинацией по (timestamp, id).
+
+    Без параметров - последние limit сообщений. ?before=<курсор> - более старые,
+    ?after=<курсор> - только новые с момента последнего просмотра (для опроса);
+    оба курсора сразу - ошибка 400. Сообщения в ответе всегда идут по возрастанию времени.
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', MESSAGES_PAGE_SIZE)), MAX_MESSAGES_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'Неверный параметр limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+    before = request.query_params.get('before')
+    after = request.query_params.get('after')
+    if before and after:
+        return Response({'error': 'Укажите только один курсор: before или after'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        before = _decode_message_cursor(before) if before else None
+        after = _decode_message_cursor(after) if after else None
+    except ValueError:
+        return Response({'error': 'Неверный курсор'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Помечаем сообщения как прочитанные, только если есть непрочитанные -
+    # опрос без новых сообщений не делает записей в базу
+    read_up_to = None
+    if chat_room.unread_count_for(request.user.id):
+        read_up_to = await sync_to_async(chat_room.mark_read)(request.user)
+
+    messages = chat_room.messages.values(*MESSAGE_VALUES)
+    if after is not None:
+        timestamp, message_id = after
+        messages = messages.filter(
+            Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id)
+        ).order_by('timestamp', 'id')
+        page = [row async for row in messages[:limit + 1]]
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        if before is not None:
+            timestamp, message_id = before
+            messages = messages.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id)
+            )
+        page = [row async for row in messages.order_by('-timestamp', '-id')[:limit + 1]]
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
+
+    if read_up_to is not None:
+        # Флаги в базе обновит задача chat.mark_messages_read - в ответе показываем итоговое
+        # состояние входящих сообщений, которые пользователь сейчас прочитал
+        for row in page:
+            if row['sender_id'] != request.user.id and row['id'] <= read_up_to:
+                row['is_read'] = True
+
+    if page:
+        before_cursor = _encode_message_cursor(page[0]) if (has_more and after is None) else None
+        after_cursor = _encode_message_cursor(page[-1])
+    else:
+        before_cursor = None
+        after_cursor = request.query_params.get('after')
+
+    return Response({
+        'results': [message_payload(row) for row in page],
+        'before_cursor': before_cursor,
+        'after_cursor': after_cursor,
+        'has_more': has_more
+    })
+
+
+def _encode_message_cursor(row):
+    return encode_cursor(row['timestamp'].isoformat(), row['id'])
+
+
+def _decode_message_cursor(cursor):
+    timestamp, message_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except TypeError:
+        raise ValueError('Неверный курсор')
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_chat_room(request, user_id):
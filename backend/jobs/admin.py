@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'locked_until', 'last_error']
+    actions = ['requeue']
+
+    @admin.action(description='Вернуть в очередь')
+    def requeue(self, request, queryset):
+        queryset.update(status='queued', attempts=0, run_at=timezone.now(), locked_until=None)
@@ -0,0 +1,34 @@
+# jobs/management/commands/run_jobs.py
+import time
+from django.core.management.base import BaseCommand
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Процесс-исполнитель фоновых задач: пул из --workers потоков. Процессов можно запустить '
+        'несколько; веб-процессы тогда запускают с JOBS_AUTOSTART=0. --once выполняет готовые '
+        'задачи в текущем потоке и завершается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Потоков пула (по умолчанию JOBS["WORKERS"])')
+        parser.add_argument('--once', action='store_true', help='Выполнить готовые задачи и выйти')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            queue.requeue_expired()
+            done = 0
+            while job_ids := queue.due_job_ids(100):
+                done += sum(queue.execute(job_id) for job_id in job_ids)
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+            return
+
+        queue.runner.start(options['workers'])
+        self.stdout.write(f'Исполнитель задач запущен: {queue.runner.workers} потоков')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка: ждем выполняющиеся задачи')
+            queue.runner.stop()
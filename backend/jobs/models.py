@@ -0,0 +1,37 @@
+# jobs/models.py
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди (см. jobs/queue.py).
+
+    Выполненные задачи удаляются; исчерпавшие попытки остаются со статусом failed."""
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('failed', 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # До какого момента задача закреплена за исполнителем
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Выборка готовых к выполнению задач в порядке очереди
+            models.Index(fields=['run_at', 'id'], condition=Q(status='queued'), name='job_queued_idx'),
+            # Возврат в очередь задач с истекшей блокировкой
+            models.Index(fields=['locked_until'], condition=Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
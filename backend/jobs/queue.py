@@ -0,0 +1,311 @@
+# jobs/queue.py
+import functools
+import logging
+import threading
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from studymatch.profiling import Histogram, TIME_BOUNDS_MS
+from .models import Job
+
+# Очередь фоновых задач в базе данных. enqueue() пишет строку Job в текущей транзакции:
+# задача появляется в очереди только вместе с данными, которые ее породили, а откат
+# отменяет и ее. Исполнитель будится после коммита, не дожидаясь опроса.
+# Исполнителей может быть несколько (потоки одного процесса и процессы run_jobs):
+# задачу получает тот, чей условный UPDATE перевел ее из queued в running.
+# Задача выполняется в транзакции вместе с удалением своей строки, поэтому ее записи
+# в базу либо применяются вместе с завершением задачи, либо откатываются до повтора.
+
+logger = logging.getLogger(__name__)
+
+# Ожидание в очереди бывает много дольше выполнения - корзины до 15 минут
+WAIT_BOUNDS_MS = TIME_BOUNDS_MS + (30000, 60000, 300000, 900000)
+
+
+def _options():
+    options = {
+        'EAGER': False, 'AUTOSTART': True, 'WORKERS': 4, 'POLL_SECONDS': 1, 'LEASE_SECONDS': 300,
+        'MAX_ATTEMPTS': 5, 'RETRY_BASE_SECONDS': 5, 'RETRY_MAX_SECONDS': 3600,
+    }
+    options.update(getattr(settings, 'JOBS', {}))
+    return options
+
+
+class Task:
+    """Функция, зарегистрированная как задача; прямой вызов выполняет ее синхронно"""
+
+    def __init__(self, func, name, max_attempts=None):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, delay=0, **payload):
+        return enqueue(self.name, payload, delay=delay, max_attempts=self.max_attempts)
+
+
+# Имя задачи -> Task; заполняется при импорте модулей с задачами (из AppConfig.ready)
+tasks = {}
+
+
+def task(name, max_attempts=None):
+    """Декоратор: зарегистрировать функцию как задачу очереди.
+
+    Аргументы задачи передаются именованными и должны сериализоваться в JSON."""
+    def decorator(func):
+        if name in tasks:
+            raise ValueError(f'Задача {name} уже зарегистрирована')
+        tasks[name] = Task(func, name, max_attempts)
+        return tasks[name]
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """Поставить задачу в очередь; выполнится после коммита текущей транзакции"""
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts or _options()['MAX_ATTEMPTS'],
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    transaction.on_commit(lambda: runner.dispatch(job.pk, name))
+    return job
+
+
+def claim(job_id):
+    """Закрепить задачу за собой; False, если ее уже забрал другой исполнитель"""
+    locked_until = timezone.now() + timedelta(seconds=_options()['LEASE_SECONDS'])
+    return Job.objects.filter(pk=job_id, status='queued').update(
+        status='running', attempts=F('attempts') + 1, locked_until=locked_until
+    ) == 1
+
+
+def requeue_expired():
+    """Вернуть в очередь задачи, не завершенные за LEASE_SECONDS (например, упал процесс)"""
+    return Job.objects.filter(status='running', locked_until__lt=timezone.now()).update(
+        status='queued', locked_until=None
+    )
+
+
+def due_job_ids(limit):
+    return list(Job.objects.filter(status='queued', run_at__lte=timezone.now()).order_by(
+        'run_at', 'id'
+    ).values_list('id', flat=True)[:limit])
+
+
+def execute(job_id):
+    """Забрать и выполнить задачу в текущем потоке; False, если ее уже забрал другой исполнитель"""
+    if not claim(job_id):
+        return False
+    run_claimed(job_id)
+    return True
+
+
+def run_claimed(job_id):
+    job = Job.objects.get(pk=job_id)
+    wait_ms = max((timezone.now() - job.run_at).total_seconds() * 1000, 0)
+    task = tasks.get(job.name)
+    started = time.perf_counter()
+    try:
+        if task is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        with transaction.atomic():
+            task.func(**job.payload)
+            Job.objects.filter(pk=job.pk).delete()
+    except Exception:
+        outcome = _retry_or_fail(job, traceback.format_exc(), permanent=task is None)
+        logger.exception('Задача %s #%s: ошибка (попытка %s из %s)', job.name, job.pk, job.attempts, job.max_attempts)
+    else:
+        outcome = 'succeeded'
+    metrics.record(job.name, outcome, wait_ms, (time.perf_counter() - started) * 1000)
+
+
+def _retry_or_fail(job, error, permanent=False):
+    options = _options()
+    if permanent or job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status='failed', locked_until=None, last_error=error)
+        return 'failed'
+    # Экспоненциальная задержка: 5 с, 10 с, 20 с... не больше RETRY_MAX_SECONDS
+    delay = min(options['RETRY_BASE_SECONDS'] * 2 ** (job.attempts - 1), options['RETRY_MAX_SECONDS'])
+    Job.objects.filter(pk=job.pk).update(
+        status='queued', locked_until=None, last_error=error, run_at=timezone.now() + timedelta(seconds=delay)
+    )
+    return 'retried'
+
+
+class JobMetrics:
+    """Счетчики и гистограммы ожидания в очереди и выполнения по задачам - с запуска процесса"""
+
+    COUNTERS = ('enqueued', 'succeeded', 'retried', 'failed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def _entry(self, name):
+        entry = self._tasks.get(name)
+        if entry is None:
+            entry = self._tasks[name] = {
+                'counters': dict.fromkeys(self.COUNTERS, 0),
+                'wait_ms': Histogram(WAIT_BOUNDS_MS),
+                'run_ms': Histogram(TIME_BOUNDS_MS),
+            }
+        return entry
+
+    def count(self, name, counter):
+        with self._lock:
+            self._entry(name)['counters'][counter] += 1
+
+    def record(self, name, outcome, wait_ms, run_ms):
+        with self._lock:
+            entry = self._entry(name)
+            entry['counters'][outcome] += 1
+            entry['wait_ms'].add(wait_ms)
+            entry['run_ms'].add(run_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    **entry['counters'],
+                    'wait_ms': entry['wait_ms'].summary(),
+                    'run_ms': entry['run_ms'].summary(),
+                }
+                for name, entry in sorted(self._tasks.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._tasks = {}
+
+
+metrics = JobMetrics()
+
+
+class JobRunner:
+    """Пул потоков, выполняющий задачи из базы.
+
+    Поток-диспетчер забирает готовые задачи по числу свободных потоков пула
+    и засыпает до коммита новой задачи (wake) или на POLL_SECONDS - так
+    подхватываются отложенные повторы и задачи, поставленные другими процессами.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._free = None  # семафор свободных потоков пула
+        self.workers = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, workers=None):
+        with self._lock:
+            if self.running:
+                return
+            self.workers = workers or _options()['WORKERS']
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='jobs')
+            self._free = threading.Semaphore(self.workers)
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name='jobs-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановить диспетчер и дождаться выполняющихся задач"""
+        with self._lock:
+            thread, executor = self._thread, self._executor
+            self._thread = None
+        if thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        thread.join()
+        executor.shutdown(wait=True)
+
+    def wake(self):
+        self._wake.set()
+
+    def dispatch(self, job_id, name):
+        """Задача закоммичена: выполнить сразу (EAGER) или разбудить пул"""
+        metrics.count(name, 'enqueued')
+        options = _options()
+        if options['EAGER']:
+            execute(job_id)
+            return
+        if not self.running and options['AUTOSTART']:
+            self.start()
+        self.wake()
+
+    def _loop(self):
+        poll_seconds = _options()['POLL_SECONDS']
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                submitted = self._submit_due()
+            except Exception:
+                logger.exception('Ошибка выборки задач из очереди')
+                submitted = 0
+            finally:
+                close_old_connections()
+            if not submitted:
+                self._wake.wait(poll_seconds)
+
+    def _submit_due(self):
+        """Забрать готовые задачи по числу свободных потоков и отдать их пулу"""
+        free = 0
+        while self._free.acquire(blocking=False):
+            free += 1
+        if not free:
+            return 0
+        claimed = []
+        try:
+            requeue_expired()
+            claimed = [job_id for job_id in due_job_ids(free) if claim(job_id)]
+        finally:
+            for _ in range(free - len(claimed)):
+                self._free.release()
+        for job_id in claimed:
+            self._executor.submit(self._work, job_id)
+        return len(claimed)
+
+    def _work(self, job_id):
+        try:
+            run_claimed(job_id)
+        except Exception:
+            logger.exception('Задача #%s: ошибка исполнителя', job_id)
+        finally:
+            close_old_connections()
+            self._free.release()
+            self.wake()
+
+
+runner = JobRunner()
+
+
+def stats():
+    """Глубина очереди по задачам и статусам (из базы) и метрики задач этого процесса"""
+    now = timezone.now()
+    depth = defaultdict(dict)
+    for name, status, count in Job.objects.values_list('name', 'status').annotate(count=Count('id')).order_by():
+        depth[name][status] = count
+    oldest_due = Job.objects.filter(status='queued', run_at__lte=now).aggregate(oldest=Min('run_at'))['oldest']
+    return {
+        'depth': dict(depth),
+        # Отставание очереди: сколько ждет самая старая готовая к выполнению задача
+        'lag_seconds': round((now - oldest_due).total_seconds(), 3) if oldest_due else 0,
+        'runner': {'running': runner.running, 'workers': runner.workers, 'eager': _options()['EAGER']},
+        'tasks': metrics.snapshot(),
+    }
@@ -0,0 +1,101 @@
+# jobs/tests.py
+import threading
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from matching.models import Subject
+from studymatch.testing import TestCase, TransactionTestCase
+from . import queue
+from .models import Job
+
+calls = []
+finished = threading.Event()
+
+
+@queue.task('tests.record')
+def record(value):
+    calls.append(value)
+    finished.set()
+
+
+@queue.task('tests.fail', max_attempts=2)
+def fail(name):
+    # Запись откатывается вместе с неудачной попыткой
+    Subject.objects.create(name=name)
+    raise ValueError('Сбой задачи')
+
+
+class QueueTestCase(TestCase):
+    """Постановка после коммита, повторы с задержкой, метрики (в тестах задачи выполняются сразу)"""
+
+    def setUp(self):
+        calls.clear()
+        queue.metrics.reset()
+
+    def test_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    record.enqueue(value='откачено')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            job = record.enqueue(value='готово')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['готово'])
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+        self.assertEqual(queue.metrics.snapshot()['tests.record']['succeeded'], 1)
+
+    def test_retries_with_backoff(self):
+        with self.assertLogs('jobs.queue', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            job = fail.enqueue(name='Химия')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertIn('ValueError', job.last_error)
+        self.assertFalse(Subject.objects.exists())
+        self.assertEqual(queue.due_job_ids(10), [])
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertTrue(queue.execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertFalse(queue.execute(job.pk))
+        self.assertEqual(queue.metrics.snapshot()['tests.fail']['retried'], 1)
+        self.assertEqual(queue.metrics.snapshot()['tests.fail']['failed'], 1)
+
+    def test_expired_lease_requeued(self):
+        job = Job.objects.create(name='tests.record', payload={'value': 1}, status='running', attempts=1,
+                                 locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(queue.requeue_expired(), 1)
+        self.assertEqual(queue.due_job_ids(10), [job.pk])
+
+    def test_stats(self):
+        record.enqueue(delay=60, value=1)
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        response = client.get('/api/jobs/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['depth'], {'tests.record': {'queued': 1}})
+        self.assertEqual(response.data['lag_seconds'], 0)
+
+
+@override_settings(JOBS={'EAGER': False, 'AUTOSTART': True, 'WORKERS': 2, 'POLL_SECONDS': 0.05})
+class RunnerTestCase(TransactionTestCase):
+    """Пул потоков забирает задачи из базы после коммита"""
+
+    def tearDown(self):
+        queue.runner.stop()
+
+    def test_pool_runs_committed_jobs(self):
+        calls.clear()
+        finished.clear()
+        with transaction.atomic():
+            record.enqueue(value='из пула')
+        self.assertTrue(finished.wait(5))
+        self.assertTrue(queue.runner.running)
+        self.assertEqual(calls, ['из пула'])
@@ -0,0 +1,12 @@
+# jobs/views.py
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from . import queue
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_stats(request):
+    """Глубина очереди задач, ее отставание и время ожидания/выполнения задач в этом процессе"""
+    return Response(queue.stats())
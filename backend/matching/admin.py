@@ -1,6 +1,6 @@
 # matching/admin.py
 from django.contrib import admin
-from .models import Subject, UserSubject, Swipe, Match
+from .models import Subject, UserSubject, Swipe, Match, SwipeBatch
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -23,4 +23,9 @@ class SwipeAdmin(admin.ModelAdmin):
 class MatchAdmin(admin.ModelAdmin):
     list_display = ['user1', 'user2', 'created_at', 'is_active']
     list_filter = ['is_active', 'created_at']
-    search_fields = ['user1__username', 'user2__username']
\ No newline at end of file
+    search_fields = ['user1__username', 'user2__username']
+
+@admin.register(SwipeBatch)
+class SwipeBatchAdmin(admin.ModelAdmin):
+    list_display = ['user', 'idempotency_key', 'created_at']
+    search_fields = ['user__username', 'idempotency_key']
\ No newline at end of file
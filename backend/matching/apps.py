@@ -5,3 +5,9 @@ from django.apps import AppConfig
 class MatchingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matching'
+
+    def ready(self):
+        # Подключаем сигналы, поддерживающие индекс кандидатов
+        from . import signals  # noqa: F401
+        # Регистрируем фоновые задачи приложения (jobs/queue.py)
+        from . import tasks  # noqa: F401
@@ -0,0 +1,66 @@
+# matching/graph.py
+import numpy as np
+from django.db.models import Count
+from .models import Match, MatchEdge
+
+# Граф мэтчей в таблице MatchEdge: у каждого активного мэтча два ребра, user -> other
+# и other -> user. Соседи пользователя - записи с его user_id, поэтому список мэтчей,
+# проверка "есть ли мэтч", общие мэтчи и друзья друзей читаются по одному индексу
+# (user, other) без OR по user1/user2. Ребра пишутся в той же транзакции, что и мэтч.
+
+
+def _edges(matches):
+    return [
+        edge
+        for match_id, user1_id, user2_id in matches
+        for edge in (MatchEdge(user_id=user1_id, other_id=user2_id, match_id=match_id),
+                     MatchEdge(user_id=user2_id, other_id=user1_id, match_id=match_id))
+    ]
+
+
+def add_match(match):
+    """Ребра нового активного мэтча"""
+    if match.user1_id is not None and match.user2_id is not None:
+        MatchEdge.objects.bulk_create(_edges([(match.id, match.user1_id, match.user2_id)]), ignore_conflicts=True)
+
+
+def sync_matches(match_ids):
+    """Привести ребра мэтчей к их состоянию: активные - в графе, неактивные - нет"""
+    rows = list(Match.objects.filter(id__in=match_ids).values_list('id', 'user1_id', 'user2_id', 'is_active'))
+    MatchEdge.objects.filter(match_id__in=[row[0] for row in rows if not row[3]]).delete()
+    MatchEdge.objects.bulk_create(
+        _edges(row[:3] for row in rows if row[3] and row[1] is not None and row[2] is not None),
+        ignore_conflicts=True
+    )
+
+
+def matched_ids(user_id):
+    """QuerySet id пользователей, с которыми у user_id есть мэтч"""
+    return MatchEdge.objects.filter(user_id=user_id).values('other_id')
+
+
+def are_matched(user_id, other_id):
+    """Есть ли у пары активный мэтч - один поиск по уникальному индексу"""
+    return MatchEdge.objects.filter(user_id=user_id, other_id=other_id).exists()
+
+
+def mutual_match_counts(user_id, other_ids):
+    """{id: число общих мэтчей с user_id} для other_ids; нули не возвращаются"""
+    return dict(
+        MatchEdge.objects.filter(user_id__in=other_ids, other_id__in=matched_ids(user_id)).values_list(
+            'user_id'
+        ).annotate(mutual=Count('id')).order_by()
+    )
+
+
+def second_degree(user_id):
+    """Друзья друзей: (ids, числа общих мэтчей) по убыванию общих мэтчей, затем по id.
+
+    Прямые мэтчи и сам пользователь исключены; уже свайпнутых отсекает вызывающий."""
+    rows = MatchEdge.objects.filter(user_id__in=matched_ids(user_id)).exclude(
+        other_id__in=matched_ids(user_id)
+    ).exclude(other_id=user_id).values_list('other_id').annotate(mutual=Count('id')).order_by()
+    pairs = sorted(rows, key=lambda row: (-row[1], row[0]))
+    ids = np.array([other_id for other_id, _ in pairs], dtype=np.int64)
+    counts = np.array([mutual for _, mutual in pairs], dtype=np.float64)
+    return ids, counts
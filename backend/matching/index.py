@@ -0,0 +1,127 @@
+# matching/index.py
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from studymatch import shared_version
+from .swiped_cache import swiped_cache
+
+# Имя общей версии индекса (studymatch/shared_version.py)
+VERSION_NAME = 'candidate_index'
+
+
+class CandidateIndex:
+    """Инвертированный индекс «предмет -> пользователи» для подбора кандидатов.
+
+    Индекс живет в памяти процесса, строится лениво при первом обращении
+    и поддерживается в актуальном состоянии сигналами UserSubject
+    (см. matching/signals.py). Вместе с пользователями хранится уровень
+    знаний по предмету - он нужен для ранжирования (matching/scoring.py).
+    Уже свайпнутые пользователи отсекаются через swiped_cache.
+
+    Изменения из других процессов индекс узнает по общей версии в кэше:
+    при расхождении он перестраивается. MAX_AGE_SECONDS ограничивает
+    устаревание, даже если общий кэш процессами не разделяется (LocMemCache).
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age or getattr(settings, 'CANDIDATE_INDEX', {}).get('MAX_AGE_SECONDS', 300)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version = None  # общая версия, с которой индекс совпадает
+        self._loaded_at = 0
+        self._subject_users = defaultdict(dict)  # subject_id -> {user_id: level}
+        self._user_subjects = defaultdict(dict)  # user_id -> {subject_id: level}
+
+    def _ensure_loaded(self):
+        if self._loaded and (
+            time.monotonic() - self._loaded_at > self.max_age
+            or shared_version.get(VERSION_NAME) != self._version
+        ):
+            self.reset()
+        if not self._loaded:
+            self.load()
+
+    def load(self):
+        """Полностью перестроить индекс из базы данных"""
+        from .models import UserSubject
+
+        # Версия читается до данных: изменение, закоммиченное во время загрузки,
+        # поднимет ее, и следующее обращение перестроит индекс еще раз
+        version = shared_version.get(VERSION_NAME)
+        subject_users = defaultdict(dict)
+        user_subjects = defaultdict(dict)
+
+        for user_id, subject_id, level in UserSubject.objects.values_list('user_id', 'subject_id', 'level'):
+            subject_users[subject_id][user_id] = level
+            user_subjects[user_id][subject_id] = level
+
+        with self._lock:
+            self._subject_users = subject_users
+            self._user_subjects = user_subjects
+            self._version = version
+            self._loaded_at = time.monotonic()
+            self._loaded = True
+
+    def changed(self):
+        """Изменение закоммичено и уже применено к индексу этого процесса: поднять общую версию.
+
+        Если до него версия совпадала с нашей, индекс остается актуальным; иначе
+        были изменения из других процессов, и при следующем обращении он перестроится."""
+        version = shared_version.bump(VERSION_NAME)
+        with self._lock:
+            if self._loaded and self._version == version - 1:
+                self._version = version
+
+    def reset(self):
+        """Сбросить индекс - он будет перестроен при следующем обращении"""
+        with self._lock:
+            self._loaded = False
+            self._subject_users = defaultdict(dict)
+            self._user_subjects = defaultdict(dict)
+
+    def add_user_subject(self, user_id, subject_id, level):
+        with self._lock:
+            if not self._loaded:
+                return
+            self._subject_users[subject_id][user_id] = level
+            self._user_subjects[user_id][subject_id] = level
+
+    def remove_user_subject(self, user_id, subject_id):
+        with self._lock:
+            if not self._loaded:
+                return
+            self._subject_users[subject_id].pop(user_id, None)
+            self._user_subjects[user_id].pop(subject_id, None)
+
+    def shared_subject_users(self, user_id):
+        """Множество id пользователей с общими с user_id предметами (без него самого)"""
+        with self._lock:
+            self._ensure_loaded()
+            result = set()
+            for subject_id in self._user_subjects.get(user_id, ()):
+                result.update(self._subject_users.get(subject_id, ()))
+        result.discard(user_id)
+        return result
+
+    def candidates(self, user_id):
+        """Множество id пользователей с общими предметами, которых user_id еще не свайпал"""
+        return swiped_cache.exclude_swiped(user_id, self.shared_subject_users(user_id))
+
+    def subject_levels(self, user_id, candidate_ids=None):
+        """Уровни по предметам пользователя и (опционально) кандидатов по тем же предметам.
+
+        Возвращает пару ({subject_id: level}, {subject_id: {candidate_id: level}}).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            own = dict(self._user_subjects.get(user_id, {}))
+            columns = {}
+            if candidate_ids is not None:
+                for subject_id in own:
+                    users = self._subject_users.get(subject_id, {})
+                    columns[subject_id] = {uid: users[uid] for uid in candidate_ids if uid in users}
+            return own, columns
+
+
+candidate_index = CandidateIndex()
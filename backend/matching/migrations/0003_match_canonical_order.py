@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def canonicalize_matches(apps, schema_editor):
+    """Привести существующие мэтчи к порядку user1.id < user2.id и убрать зеркальные дубли"""
+    Match = apps.get_model('matching', 'Match')
+    for match in Match.objects.filter(user1__gt=models.F('user2')):
+        if Match.objects.filter(user1_id=match.user2_id, user2_id=match.user1_id).exists():
+            match.delete()
+        else:
+            Match.objects.filter(pk=match.pk).update(user1_id=match.user2_id, user2_id=match.user1_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_alter_subject_options_remove_subject_icon_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_matches, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.CheckConstraint(condition=models.Q(('user1__lt', models.F('user2'))), name='match_users_canonical_order'),
+        ),
+    ]
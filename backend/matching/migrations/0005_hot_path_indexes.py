@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_swipebatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user1'], name='match_user1_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user2'], name='match_user2_active_idx'),
+        ),
+    ]
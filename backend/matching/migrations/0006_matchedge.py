@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_edges(apps, schema_editor):
+    """Ребра для уже существующих активных мэтчей"""
+    Match = apps.get_model('matching', 'Match')
+    MatchEdge = apps.get_model('matching', 'MatchEdge')
+    rows = Match.objects.filter(is_active=True, user1__isnull=False, user2__isnull=False).values_list(
+        'id', 'user1_id', 'user2_id'
+    )
+    MatchEdge.objects.bulk_create(
+        (
+            edge
+            for match_id, user1_id, user2_id in rows.iterator()
+            for edge in (MatchEdge(user_id=user1_id, other_id=user2_id, match_id=match_id),
+                         MatchEdge(user_id=user2_id, other_id=user1_id, match_id=match_id))
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='edges', to='matching.match')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='match_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'other'), name='match_edge_unique')],
+            },
+        ),
+        migrations.RunPython(build_edges, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+
 class Subject(models.Model):
     """Модель учебного предмета"""
     name = models.CharField(max_length=100, unique=True)
@@ -11,6 +12,7 @@ class Subject(models.Model):
     def __str__(self):
         return self.name
 
+
 class UserSubject(models.Model):
     """Связь пользователя с предметом и его уровнем знаний"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_subjects')
@@ -32,6 +34,7 @@ class UserSubject(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.subject.name} ({self.level})"
 
+
 class Swipe(models.Model):
     """Модель для свайпов (лайков/дизлайков)"""
     swiper = models.ForeignKey(User, on_delete=models.CASCADE, related_name='swipes_made')
@@ -51,6 +54,7 @@ class Swipe(models.Model):
     def __str__(self):
         return f"{self.swiper.username} -> {self.swiped_user.username} ({self.action})"
 
+
 class Match(models.Model):
     """Модель мэтча между пользователями"""
     user1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='matches_as_user1', null=True, blank=True)
@@ -60,8 +64,52 @@ class Match(models.Model):
 
     class Meta:
         unique_together = ['user1', 'user2']
+        constraints = [
+            # Пара хранится в каноническом порядке (user1.id < user2.id),
+            # поэтому (A, B) и (B, A) не могут оказаться двумя разными мэтчами
+            models.CheckConstraint(condition=models.Q(user1__lt=models.F('user2')), name='match_users_canonical_order'),
+        ]
+        indexes = [
+            # Список мэтчей: user1 = ? OR user2 = ? среди активных
+            models.Index(fields=['user1'], condition=models.Q(is_active=True), name='match_user1_active_idx'),
+            models.Index(fields=['user2'], condition=models.Q(is_active=True), name='match_user2_active_idx'),
+        ]
 
     def __str__(self):
         if self.user1 and self.user2:
             return f"Match: {self.user1.username} & {self.user2.username}"
-        return "Match (incomplete)"
\ No newline at end of file
+        return "Match (incomplete)"
+
+
+class MatchEdge(models.Model):
+    """Ребро графа мэтчей: по строке в каждую сторону на активный мэтч.
+
+    Поддерживается сигналами Match и пакетным свайпом (см. matching/graph.py);
+    QuerySet.update(is_active=...) сигналов не отправляет - после него нужен graph.sync_matches."""
+    # Индекс по user не нужен - его покрывает уникальный (user, other)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='match_edges', db_index=False)
+    other = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='edges')
+
+    class Meta:
+        constraints = [
+            # Он же индекс "соседи пользователя" и проверки "есть ли мэтч" одним поиском по индексу
+            models.UniqueConstraint(fields=['user', 'other'], name='match_edge_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.other_id}"
+
+
+class SwipeBatch(models.Model):
+    """Обработанный пакет свайпов - для идемпотентных повторов по ключу клиента"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='swipe_batches')
+    idempotency_key = models.CharField(max_length=64)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'idempotency_key']
+
+    def __str__(self):
+        return f"{self.user.username} batch {self.idempotency_key}"
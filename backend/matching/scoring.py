@@ -0,0 +1,86 @@
+# matching/scoring.py
+import numpy as np
+
+# Числовой ранг уровня знаний для сравнения уровней
+LEVEL_RANKS = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
+
+# Веса составляющих итогового балла
+SUBJECT_WEIGHT = 1.0
+UNIVERSITY_WEIGHT = 0.5
+FACULTY_WEIGHT = 0.3
+YEAR_WEIGHT = 0.2
+
+# Баллы округляются, чтобы курсор (балл, id) сравнивался без ошибок плавающей точки
+SCORE_PRECISION = 4
+
+
+def _normalize_faculty(value):
+    return (value or '').strip().lower()
+
+
+def score_candidates(own_levels, level_columns, own_profile, candidate_profiles):
+    """Посчитать баллы кандидатов за один векторный проход.
+
+    own_levels - {subject_id: level} пользователя,
+    level_columns - {subject_id: {candidate_id: level}} из CandidateIndex,
+    own_profile - (university_id, faculty, year_of_study) пользователя,
+    candidate_profiles - список (user_id, university_id, faculty, year_of_study).
+
+    Возвращает пару массивов (ids, scores), отсортированную по убыванию балла,
+    при равенстве - по возрастанию id.
+    """
+    n = len(candidate_profiles)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    ids = np.fromiter((row[0] for row in candidate_profiles), dtype=np.int64, count=n)
+    position = {user_id: i for i, user_id in enumerate(ids.tolist())}
+
+    # Матрица признаков: строки - кандидаты, столбцы - предметы пользователя, значения - ранг уровня
+    subjects = list(own_levels)
+    levels = np.zeros((n, len(subjects)), dtype=np.float64)
+    for column, subject_id in enumerate(subjects):
+        for user_id, level in level_columns.get(subject_id, {}).items():
+            row = position.get(user_id)
+            if row is not None:
+                levels[row, column] = LEVEL_RANKS.get(level, 1)
+    own = np.array([LEVEL_RANKS.get(own_levels[s], 1) for s in subjects], dtype=np.float64)
+
+    # Общий предмет дает от 1/3 (beginner vs advanced) до 1 (одинаковый уровень)
+    shared = levels > 0
+    compatibility = 1.0 - np.abs(levels - own) / len(LEVEL_RANKS)
+    subject_score = np.where(shared, compatibility, 0.0).sum(axis=1)
+
+    own_university, own_faculty, own_year = own_profile
+    universities = np.array([row[1] if row[1] is not None else -1 for row in candidate_profiles], dtype=np.int64)
+    same_university = (universities == own_university) if own_university is not None else np.zeros(n, dtype=bool)
+
+    own_faculty = _normalize_faculty(own_faculty)
+    faculties = np.array([_normalize_faculty(row[2]) for row in candidate_profiles], dtype=object)
+    same_faculty = (faculties == own_faculty) if own_faculty else np.zeros(n, dtype=bool)
+
+    years = np.array([row[3] if row[3] is not None else np.nan for row in candidate_profiles], dtype=np.float64)
+    if own_year is not None:
+        year_score = np.nan_to_num(1.0 / (1.0 + np.abs(years - own_year)), nan=0.0)
+    else:
+        year_score = np.zeros(n, dtype=np.float64)
+
+    scores = (
+        SUBJECT_WEIGHT * subject_score
+        + UNIVERSITY_WEIGHT * same_university
+        + FACULTY_WEIGHT * same_faculty.astype(np.float64)
+        + YEAR_WEIGHT * year_score
+    ).round(SCORE_PRECISION)
+
+    # Стабильный порядок: балл по убыванию, затем id по возрастанию
+    order = np.lexsort((ids, -scores))
+    return ids[order], scores[order]
+
+
+def page_after(ids, scores, after=None, limit=10):
+    """Выбрать страницу ранжированного списка после позиции курсора (score, id)"""
+    if after is not None:
+        after_score, after_id = after
+        mask = (scores < after_score) | ((scores == after_score) & (ids > after_id))
+        ids, scores = ids[mask], scores[mask]
+    return ids[:limit].tolist(), scores[:limit].tolist(), len(ids) > limit
@@ -1,5 +1,6 @@
 # matching/serializers.py
 from rest_framework import serializers
+from users.serializers import SimpleProfileSerializer, simple_profile_data, simple_profile
 from .models import Subject, UserSubject, Swipe, Match
 
 
@@ -22,15 +23,10 @@ class UserSubjectSerializer(serializers.ModelSerializer):
         fields = ['id', 'subject', 'subject_id', 'level', 'created_at']
 
 
-class SimpleProfileSerializer(serializers.Serializer):
-    """Упрощенный сериализатор профиля для рекомендаций"""
-    id = serializers.IntegerField()
-    username = serializers.CharField()
-    first_name = serializers.CharField()
-    last_name = serializers.CharField()
-    faculty = serializers.CharField()
-    year_of_study = serializers.IntegerField()
-    bio = serializers.CharField()
+class RecommendationSerializer(SimpleProfileSerializer):
+    """Профиль рекомендации с баллом совместимости и числом общих мэтчей"""
+    score = serializers.FloatField()
+    mutual_matches = serializers.IntegerField()
 
 
 class SwipeSerializer(serializers.ModelSerializer):
@@ -42,22 +38,11 @@ class SwipeSerializer(serializers.ModelSerializer):
         read_only_fields = ['swiper', 'timestamp']
 
     def get_swiped_user_profile(self, obj):
-        try:
-            profile = obj.swiped_user.profile
-            return SimpleProfileSerializer({
-                'id': obj.swiped_user.id,
-                'username': obj.swiped_user.username,
-                'first_name': obj.swiped_user.first_name,
-                'last_name': obj.swiped_user.last_name,
-                'faculty': profile.faculty,
-                'year_of_study': profile.year_of_study,
-                'bio': profile.bio
-            }).data
-        except:
-            return None
+        return simple_profile(obj.swiped_user)
 
 
 class MatchSerializer(serializers.ModelSerializer):
+    """Мэтч; пользователи и профили ожидаются загруженными через select_related"""
     other_user = serializers.SerializerMethodField()
     other_user_profile = serializers.SerializerMethodField()
 
@@ -65,35 +50,21 @@ class MatchSerializer(serializers.ModelSerializer):
         model = Match
         fields = ['id', 'user1', 'user2', 'other_user', 'other_user_profile', 'created_at', 'is_active']
 
+    def _other_user_is_user2(self, obj):
+        # Сравниваем по id, чтобы не загружать пользователей ради проверки
+        return obj.user1_id == self.context['request'].user.id
+
     def get_other_user(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            if obj.user1 == request.user:
-                return obj.user2.id
-            else:
-                return obj.user1.id
+            return obj.user2_id if self._other_user_is_user2(obj) else obj.user1_id
         return None
 
     def get_other_user_profile(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            try:
-                if obj.user1 == request.user:
-                    profile = obj.user2.profile
-                    user = obj.user2
-                else:
-                    profile = obj.user1.profile
-                    user = obj.user1
-
-                return SimpleProfileSerializer({
-                    'id': user.id,
-                    'username': user.username,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'faculty': profile.faculty,
-                    'year_of_study': profile.year_of_study,
-                    'bio': profile.bio
-                }).data
-            except:
+            user = obj.user2 if self._other_user_is_user2(obj) else obj.user1
+            if user is None:
                 return None
-        return None
\ No newline at end of file
+            return simple_profile(user)
+        return None
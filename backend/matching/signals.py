@@ -0,0 +1,72 @@
+# matching/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from studymatch import reference_cache
+from . import graph
+from .models import Subject, UserSubject, Swipe, Match
+from .index import candidate_index
+from .swiped_cache import swiped_cache
+
+
+# Индекс и кэш обновляем только после коммита, чтобы откаченные записи в них не попадали
+
+def _update_index(apply):
+    """После коммита применить изменение к индексу и сообщить о нем другим процессам"""
+    def callback():
+        apply()
+        candidate_index.changed()
+    transaction.on_commit(callback)
+
+
+@receiver(post_save, sender=UserSubject)
+def user_subject_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Прежнее значение предмета неизвестно - перестраиваем индекс целиком
+        _update_index(candidate_index.reset)
+        return
+    _update_index(
+        lambda: candidate_index.add_user_subject(instance.user_id, instance.subject_id, instance.level)
+    )
+
+
+@receiver(post_delete, sender=UserSubject)
+def user_subject_deleted(sender, instance, **kwargs):
+    _update_index(
+        lambda: candidate_index.remove_user_subject(instance.user_id, instance.subject_id)
+    )
+
+
+@receiver(post_save, sender=Swipe)
+def swipe_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Смена действия (like/pass) на состав индекса не влияет
+        return
+    transaction.on_commit(
+        lambda: swiped_cache.add(instance.swiper_id, instance.swiped_user_id)
+    )
+
+
+@receiver(post_delete, sender=Swipe)
+def swipe_deleted(sender, instance, **kwargs):
+    # Из фильтра Блума удалить нельзя - множество пользователя перезагрузится
+    transaction.on_commit(lambda: swiped_cache.invalidate(instance.swiper_id))
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def subject_changed(sender, **kwargs):
+    reference_cache.invalidate('subjects')
+
+
+# Граф мэтчей - часть данных, а не кэш: ребра пишутся в той же транзакции, что и мэтч;
+# при удалении мэтча они удаляются каскадом
+
+@receiver(post_save, sender=Match)
+def match_saved(sender, instance, created, **kwargs):
+    if created:
+        if instance.is_active:
+            graph.add_match(instance)
+        return
+    # Мог измениться is_active
+    graph.sync_matches([instance.pk])
@@ -0,0 +1,211 @@
+# matching/swiped_cache.py
+import hashlib
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from studymatch import shared_version
+
+# Примерный размер int в множестве (объект + слот хэш-таблицы), байт
+_SET_ITEM_BYTES = 60
+
+
+class BloomFilter:
+    """Компактное вероятностное множество id: ложные срабатывания возможны, пропуски - нет"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.to_bytes(8, 'little', signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class SwipedSetCache:
+    """LRU-кэш множеств «кого пользователь уже свайпал» с ограничением по памяти.
+
+    Множество загружается из Swipe при первом обращении и дальше обновляется
+    сигналами (см. matching/signals.py). Для пользователей с большим числом
+    свайпов вместо множества хранится фильтр Блума: он в разы компактнее, а
+    редкое ложное срабатывание лишь скрывает кандидата из рекомендаций.
+
+    Свайпы из других процессов множество узнает по общей версии пользователя
+    в кэше (studymatch/shared_version.py) и перезагружается; TTL ограничивает
+    устаревание, даже если общий кэш процессами не разделяется.
+    """
+
+    def __init__(self, max_bytes=None, bloom_threshold=None, bloom_error_rate=None, ttl=None):
+        config = getattr(settings, 'SWIPED_CACHE', {})
+        self.max_bytes = max_bytes or config.get('MAX_BYTES', 32 * 1024 * 1024)
+        self.bloom_threshold = bloom_threshold or config.get('BLOOM_THRESHOLD', 2000)
+        self.bloom_error_rate = bloom_error_rate or config.get('BLOOM_ERROR_RATE', 0.01)
+        self.ttl = ttl or config.get('TTL', 300)
+        self._lock = threading.Lock()
+        # user_id -> (set | BloomFilter, nbytes, общая версия, время загрузки)
+        self._entries = OrderedDict()
+        # user_id -> [число идущих загрузок, счетчик изменений] - только пока идет загрузка
+        self._loading = {}
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def _version_name(user_id):
+        return f'swiped:{user_id}'
+
+    def _build(self, swiped_ids):
+        if len(swiped_ids) >= self.bloom_threshold:
+            # Запас по емкости, чтобы новые свайпы не поднимали долю ложных срабатываний
+            entry = BloomFilter(len(swiped_ids) * 2, self.bloom_error_rate)
+            for swiped_id in swiped_ids:
+                entry.add(swiped_id)
+            return entry, entry.nbytes
+        entry = set(swiped_ids)
+        return entry, sys.getsizeof(entry) + len(entry) * _SET_ITEM_BYTES
+
+    def _store(self, user_id, entry, nbytes, version, loaded_at):
+        self._drop(user_id)
+        self._entries[user_id] = (entry, nbytes, version, loaded_at)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_bytes, _, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+            self.evictions += 1
+
+    def _drop(self, user_id):
+        old = self._entries.pop(user_id, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+    def _fresh(self, cached, version, now):
+        return cached is not None and cached[2] == version and now - cached[3] <= self.ttl
+
+    def get(self, user_id):
+        """Множество (или фильтр Блума) свайпнутых пользователем user_id"""
+        # Версия читается до блокировки (общий кэш может быть сетевым) и до данных:
+        # свайп, закоммиченный во время загрузки, поднимет ее и вызовет перезагрузку
+        version = shared_version.get(self._version_name(user_id))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if self._fresh(cached, version, now):
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return cached[0]
+            self._drop(user_id)
+            self.misses += 1
+            loading = self._loading.setdefault(user_id, [0, 0])
+            loading[0] += 1
+            token = loading[1]
+
+        from .models import Swipe
+        try:
+            entry, nbytes = self._build(list(
+                Swipe.objects.filter(swiper_id=user_id).values_list('swiped_user_id', flat=True)
+            ))
+        finally:
+            with self._lock:
+                # Записи нет, если кэш очистили во время загрузки - тогда не кэшируем
+                loading = self._loading.get(user_id)
+                changed = loading is None or loading[1] != token
+                if loading is not None:
+                    loading[0] -= 1
+                    if not loading[0]:
+                        del self._loading[user_id]
+
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if self._fresh(cached, version, now):
+                # Параллельная загрузка успела раньше, и ее данные могли уже обновиться
+                return cached[0]
+            # Если во время загрузки множество менялось, не кэшируем возможно устаревшие данные
+            if not changed:
+                self._store(user_id, entry, nbytes, version, now)
+        return entry
+
+    def exclude_swiped(self, user_id, candidate_ids, swiped=None):
+        """Кандидаты без тех, кого пользователь уже свайпал (проверка в памяти).
+
+        swiped - уже полученный результат get(user_id), если он есть."""
+        if swiped is None:
+            swiped = self.get(user_id)
+        if isinstance(swiped, set):
+            return set(candidate_ids) - swiped
+        return {candidate_id for candidate_id in candidate_ids if candidate_id not in swiped}
+
+    def _mark_loading_changed(self, user_id):
+        # Отмечаем изменение для загрузки, которая может идти прямо сейчас
+        loading = self._loading.get(user_id)
+        if loading is not None:
+            loading[1] += 1
+
+    def add(self, user_id, swiped_user_id):
+        """Учесть закоммиченный свайп и сообщить о нем другим процессам"""
+        version = shared_version.bump(self._version_name(user_id))
+        with self._lock:
+            self._mark_loading_changed(user_id)
+            cached = self._entries.get(user_id)
+            if cached is None:
+                return
+            entry, nbytes, entry_version, loaded_at = cached
+            if entry_version != version - 1:
+                # Были свайпы из других процессов - множество перезагрузится при обращении
+                self._drop(user_id)
+                return
+            if isinstance(entry, set):
+                entry.add(swiped_user_id)
+                if len(entry) >= self.bloom_threshold:
+                    self._store(user_id, *self._build(entry), version, loaded_at)
+                else:
+                    self._store(user_id, entry, nbytes + _SET_ITEM_BYTES, version, loaded_at)
+            else:
+                entry.add(swiped_user_id)
+                self._entries[user_id] = (entry, nbytes, version, loaded_at)
+
+    def invalidate(self, user_id):
+        """Сбросить множество пользователя (например, после удаления свайпа - из фильтра Блума удалять нельзя)"""
+        shared_version.bump(self._version_name(user_id))
+        with self._lock:
+            self._mark_loading_changed(user_id)
+            self._drop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loading.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bloom_entries': sum(1 for entry, *_ in self._entries.values() if isinstance(entry, BloomFilter)),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+            }
+
+
+swiped_cache = SwipedSetCache()
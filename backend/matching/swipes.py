@@ -0,0 +1,152 @@
+# matching/swipes.py
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from .swiped_cache import swiped_cache
+from .graph import sync_matches
+from .models import Swipe, Match, SwipeBatch
+from .tasks import notify_matches
+
+# Максимальное число свайпов в одном пакете
+MAX_BATCH_SIZE = 100
+
+
+class AlreadySwiped(Exception):
+    """Пользователь уже свайпал этого пользователя"""
+
+
+def canonical_pair(user_a, user_b):
+    """Пара пользователей в каноническом порядке (меньший id первым), как в create_chat_room"""
+    return (user_a, user_b) if user_a.id < user_b.id else (user_b, user_a)
+
+
+def record_swipe(swiper_id, swiped_user_id, action):
+    """Записать свайп и, если лайк взаимный, создать мэтч - в одной транзакции.
+
+    Строки обоих пользователей блокируются в порядке id, поэтому встречные лайки
+    одной пары выполняются по очереди: второй из них гарантированно видит первый
+    и создает ровно один мэтч. Возвращает (swipe, match или None).
+    Бросает User.DoesNotExist, если пользователя нет, и AlreadySwiped при повторе.
+    """
+    with transaction.atomic():
+        # Блокировка пары и загрузка пользователей (с профилями для ответа) одним запросом
+        users = {
+            user.id: user
+            for user in User.objects.select_for_update(of=('self',)).select_related('profile').filter(
+                id__in=(swiper_id, swiped_user_id)
+            ).order_by('id')
+        }
+        if swiped_user_id not in users or swiper_id not in users:
+            raise User.DoesNotExist('Пользователь не найден')
+        swiper, swiped_user = users[swiper_id], users[swiped_user_id]
+
+        # Один запрос: наш прежний свайп и встречный лайк
+        existing = set(Swipe.objects.filter(
+            Q(swiper_id=swiper_id, swiped_user_id=swiped_user_id) |
+            Q(swiper_id=swiped_user_id, swiped_user_id=swiper_id, action='like')
+        ).values_list('swiper_id', flat=True))
+        if swiper_id in existing:
+            raise AlreadySwiped()
+
+        swipe = Swipe.objects.create(swiper=swiper, swiped_user=swiped_user, action=action)
+
+        match = None
+        if action == 'like' and swiped_user_id in existing:
+            user1, user2 = canonical_pair(swiper, swiped_user)
+            # Под блокировкой пары гонки нет - достаточно поиска без savepoint из get_or_create
+            match = Match.objects.filter(user1=user1, user2=user2).first()
+            if match is None:
+                match = Match.objects.create(user1=user1, user2=user2)
+                # Уведомление участникам - в фоне, только если мэтч закоммичен
+                notify_matches.enqueue(match_ids=[match.id])
+
+        return swipe, match
+
+
+def record_swipe_batch(swiper_id, items, idempotency_key):
+    """Записать пакет свайпов [(user_id, action), ...] одной транзакцией.
+
+    Проверки выполняются над множествами id (существующие пользователи, уже
+    свайпнутые, встречные лайки), свайпы и мэтчи вставляются через bulk_create.
+    Повтор с тем же idempotency_key возвращает сохраненный результат, ничего не записывая.
+    Результат - {'created': [...], 'skipped': [...], 'match_ids': [...]}.
+    """
+    with transaction.atomic():
+        target_ids = {user_id for user_id, _ in items}
+
+        # Блокируем пользователя и все цели в порядке id - как в record_swipe,
+        # поэтому пакет не гоняется с одиночными свайпами и повторами того же ключа
+        users = {
+            user.id: user
+            for user in User.objects.select_for_update(of=('self',)).select_related('profile').filter(
+                id__in=target_ids | {swiper_id}
+            ).order_by('id')
+        }
+        if swiper_id not in users:
+            raise User.DoesNotExist('Пользователь не найден')
+        swiper = users[swiper_id]
+
+        batch = SwipeBatch.objects.filter(user_id=swiper_id, idempotency_key=idempotency_key).first()
+        if batch is not None:
+            return batch.result
+
+        already_swiped = set(Swipe.objects.filter(
+            swiper_id=swiper_id, swiped_user_id__in=target_ids
+        ).values_list('swiped_user_id', flat=True))
+
+        created, skipped, seen = [], [], set()
+        for user_id, action in items:
+            if user_id == swiper_id:
+                reason = 'self'
+            elif user_id not in users:
+                reason = 'not_found'
+            elif user_id in already_swiped or user_id in seen:
+                reason = 'already_swiped'
+            else:
+                reason = None
+            if reason:
+                skipped.append({'user_id': user_id, 'action': action, 'reason': reason})
+            else:
+                created.append({'user_id': user_id, 'action': action})
+            seen.add(user_id)
+
+        Swipe.objects.bulk_create([
+            Swipe(swiper=swiper, swiped_user=users[item['user_id']], action=item['action'])
+            for item in created
+        ])
+
+        liked_ids = {item['user_id'] for item in created if item['action'] == 'like'}
+        mutual_ids = set(Swipe.objects.filter(
+            swiper_id__in=liked_ids, swiped_user_id=swiper_id, action='like'
+        ).values_list('swiper_id', flat=True)) if liked_ids else set()
+
+        pair_matches = Match.objects.filter(
+            Q(user1_id=swiper_id, user2_id__in=mutual_ids) | Q(user2_id=swiper_id, user1_id__in=mutual_ids)
+        ).order_by('id').values_list('id', flat=True)
+        existing_match_ids = set(pair_matches) if mutual_ids else set()
+        # Уже существующие мэтчи пары пропускаются уникальным ограничением
+        Match.objects.bulk_create([
+            Match(user1=user1, user2=user2)
+            for user1, user2 in (canonical_pair(swiper, users[user_id]) for user_id in sorted(mutual_ids))
+        ], ignore_conflicts=True)
+        match_ids = list(pair_matches.all()) if mutual_ids else []
+
+        new_match_ids = [match_id for match_id in match_ids if match_id not in existing_match_ids]
+        if new_match_ids:
+            # bulk_create не отправляет post_save - ребра графа мэтчей добавляем сами
+            sync_matches(new_match_ids)
+            notify_matches.enqueue(match_ids=new_match_ids)
+
+        result = {'created': created, 'skipped': skipped, 'match_ids': match_ids}
+        SwipeBatch.objects.create(user=swiper, idempotency_key=idempotency_key, result=result)
+
+        # bulk_create не отправляет post_save - обновляем кэш свайпов сами
+        new_ids = [item['user_id'] for item in created]
+
+        def update_swiped_cache():
+            for user_id in new_ids:
+                swiped_cache.add(swiper_id, user_id)
+
+        transaction.on_commit(update_swiped_cache)
+
+        return result
@@ -0,0 +1,14 @@
+# matching/tasks.py
+from chat.realtime import notify_user
+from jobs.queue import task
+from studymatch.payloads import match_payload, MATCH_VALUES
+
+
+@task('matching.notify_matches')
+def notify_matches(match_ids):
+    """Уведомить обоих участников новых мэтчей через WebSocket (/ws/notifications/)"""
+    from .models import Match
+
+    for row in Match.objects.filter(id__in=match_ids, is_active=True).values(*MATCH_VALUES):
+        for user_id in (row['user1_id'], row['user2_id']):
+            notify_user(user_id, {'type': 'match', 'match': match_payload(row, user_id)})
@@ -1,4 +1,617 @@
 # matching/tests
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from types import SimpleNamespace
+from rest_framework.renderers import JSONRenderer
+from django.db import connection
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+from jobs.models import Job
+from studymatch import shared_version
+from studymatch.testing import QueryPlanAssertionsMixin, TestCase, TransactionTestCase
+from users.models import UserProfile
+from .index import candidate_index, VERSION_NAME
+from .swiped_cache import swiped_cache, SwipedSetCache, BloomFilter
+from .models import Subject, UserSubject, Swipe, Match, MatchEdge, SwipeBatch
+from .scoring import score_candidates, page_after
+from .swipes import MAX_BATCH_SIZE
+from .serializers import MatchSerializer
 
-# Create your tests here.
+
+def make_user(username, subject=None):
+    user = User.objects.create(username=username, first_name=username.title())
+    UserProfile.objects.create(user=user, faculty='ИТ', year_of_study=2)
+    if subject is not None:
+        UserSubject.objects.create(user=user, subject=subject)
+    return user
+
+
+class QueryCountTestCase(TestCase):
+    """Проверки числа запросов: количество не должно зависеть от числа строк"""
+
+    def setUp(self):
+        self.subject = Subject.objects.create(name='Математика', code='MATH')
+        # Пользователи с меньшими id - чтобы владелец оказывался и user1, и user2 мэтча
+        self.earlier_users = [make_user(f'early{i}') for i in range(25)]
+        self.user = make_user('owner', self.subject)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        candidate_index.reset()
+        swiped_cache.clear()
+
+    def tearDown(self):
+        candidate_index.reset()
+        swiped_cache.clear()
+
+    def assertConstantQueries(self, num, url, populate, sizes=(5, 50), **params):
+        """Наполнить данные до каждого из sizes и проверить, что запрос стоит ровно num запросов"""
+        created = 0
+        for size in sizes:
+            populate(created, size)
+            created = size
+            candidate_index.load()
+            swiped_cache.get(self.user.id)
+            with self.assertNumQueries(num):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+
+    def test_matches_list(self):
+        def populate(start, end):
+            for i in range(start, end):
+                # Пары хранятся в порядке id: половина мэтчей - с владельцем в роли user2
+                if i % 2:
+                    Match.objects.create(user1=self.user, user2=make_user(f'match{i}'))
+                else:
+                    Match.objects.create(user1=self.earlier_users[i // 2], user2=self.user)
+
+        self.assertConstantQueries(1, '/api/matching/matches/', populate)
+        response = self.client.get('/api/matching/matches/')
+        self.assertEqual(len(response.data), 50)
+        for item in response.data:
+            self.assertNotEqual(item['other_user'], self.user.id)
+            self.assertEqual(item['other_user_profile']['id'], item['other_user'])
+
+    def test_matches_fast_path_renders_like_serializer(self):
+        Match.objects.create(user1=self.earlier_users[0], user2=self.user)
+        Match.objects.create(user1=self.user, user2=make_user('matched'))
+        Match.objects.create(user1=self.user, user2=User.objects.create(username='no_profile'))
+
+        response = self.client.get('/api/matching/matches/')
+        matches = Match.objects.filter(id__in=[item['id'] for item in response.data]).order_by('id')
+        expected = MatchSerializer(matches, many=True, context={'request': SimpleNamespace(user=self.user)}).data
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(sorted(response.data, key=lambda item: item['id'])), renderer.render(expected))
+
+    def test_recommendations(self):
+        def populate(start, end):
+            for i in range(start, end):
+                make_user(f'candidate{i}', self.subject)
+
+        # Признаки профилей кандидатов + пользователи страницы с профилями + общие мэтчи
+        self.assertConstantQueries(3, '/api/matching/recommendations/', populate, limit=50)
+
+    def test_recommendations_skip_users_without_profile(self):
+        no_profile = User.objects.create(username='noprofile')
+        UserSubject.objects.create(user=no_profile, subject=self.subject)
+        make_user('candidate', self.subject)
+        # Кэши читаются из базы в потоках пула - на своих соединениях, которым не видна
+        # незакоммиченная транзакция теста; загружаем их заранее
+        candidate_index.load()
+        swiped_cache.get(self.user.id)
+
+        response = self.client.get('/api/matching/recommendations/')
+        self.assertEqual([item['username'] for item in response.data['results']], ['candidate'])
+
+    def test_swipe_with_match(self):
+        other = make_user('other', self.subject)
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        other_client.post(f'/api/matching/swipe/{self.user.id}/', {'action': 'like'})
+
+        # Savepoint, блокировка пары, прежние свайпы, свайп, поиск и создание мэтча,
+        # ребра графа мэтчей, задача уведомления в очередь, release
+        with self.assertNumQueries(9):
+            response = self.client.post(f'/api/matching/swipe/{other.id}/', {'action': 'like'})
+        self.assertTrue(response.data['match_created'])
+        self.assertEqual(response.data['match']['other_user_profile']['username'], 'other')
+
+
+class ScoringTestCase(SimpleTestCase):
+    """Балл: совместимость уровней по общим предметам, затем университет, факультет и курс"""
+
+    OWN_LEVELS = {1: 'intermediate', 2: 'advanced'}
+    OWN_PROFILE = (10, 'ИТ', 2)
+
+    def test_ranking(self):
+        level_columns = {
+            1: {7: 'intermediate', 3: 'intermediate', 5: 'intermediate', 9: 'intermediate', 2: 'advanced', 8: 'beginner'},
+            2: {7: 'advanced'},
+        }
+        candidate_profiles = [
+            (2, None, 'Физфак', None),   # уровень на ступень ниже
+            (3, 10, 'ИТ', 3),            # курс отличается на 1
+            (4, 10, 'ИТ', 2),            # нет общих предметов, но совпадают университет, факультет и курс
+            (5, 11, ' ит ', 2),          # другой университет; факультет без учета регистра и пробелов
+            (7, 10, 'ИТ', 2),            # два общих предмета
+            (8, None, '', None),         # уровень на ступень ниже - тот же балл, что у 2
+            (9, 10, 'Физфак', 2),        # другой факультет
+        ]
+        ids, scores = score_candidates(self.OWN_LEVELS, level_columns, self.OWN_PROFILE, candidate_profiles)
+        self.assertEqual(ids.tolist(), [7, 3, 9, 5, 4, 2, 8])
+        self.assertEqual(scores.tolist(), [3.0, 1.9, 1.7, 1.5, 1.0, 0.6667, 0.6667])
+
+    def test_ties_ordered_by_id(self):
+        level_columns = {1: {user_id: 'intermediate' for user_id in (6, 2, 4)}}
+        candidate_profiles = [(user_id, None, '', None) for user_id in (6, 2, 4)]
+        ids, scores = score_candidates(self.OWN_LEVELS, level_columns, (None, '', None), candidate_profiles)
+        self.assertEqual(ids.tolist(), [2, 4, 6])
+        self.assertEqual(scores.tolist(), [1.0, 1.0, 1.0])
+
+    def test_page_after(self):
+        ids, scores = score_candidates(
+            self.OWN_LEVELS, {1: {user_id: 'intermediate' for user_id in range(1, 6)}}, (None, '', None),
+            [(user_id, None, '', None) for user_id in range(1, 6)]
+        )
+        self.assertEqual(page_after(ids, scores, limit=2), ([1, 2], [1.0, 1.0], True))
+        self.assertEqual(page_after(ids, scores, (1.0, 2), limit=2), ([3, 4], [1.0, 1.0], True))
+        self.assertEqual(page_after(ids, scores, (1.0, 4), limit=2), ([5], [1.0], False))
+
+
+class RecommendationsTestCase(TestCase):
+    """Страницы рекомендаций по курсору (балл, id) без пропусков и повторов"""
+
+    def setUp(self):
+        self.subject = Subject.objects.create(name='Математика', code='MATH')
+        self.user = make_user('owner', self.subject)
+        self.candidates = [make_user(f'candidate{i}', self.subject) for i in range(7)]
+        # Разные баллы: часть кандидатов с другого курса
+        UserProfile.objects.filter(user__in=self.candidates[::2]).update(year_of_study=4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Кэши читаются из базы в потоках пула, которым не видна транзакция теста
+        candidate_index.reset()
+        swiped_cache.clear()
+        candidate_index.load()
+        swiped_cache.get(self.user.id)
+
+    def tearDown(self):
+        candidate_index.reset()
+        swiped_cache.clear()
+
+    def test_pages_follow_ranking(self):
+        response = self.client.get('/api/matching/recommendations/', {'limit': 50})
+        self.assertEqual(set(response.data), {'results', 'next_cursor'})
+        self.assertIsNone(response.data['next_cursor'])
+        ranked = [(item['id'], item['score']) for item in response.data['results']]
+        self.assertEqual(sorted(ranked, key=lambda item: (-item[1], item[0])), ranked)
+        self.assertEqual({user_id for user_id, _ in ranked}, {user.id for user in self.candidates})
+
+        pages, cursor = [], None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/matching/recommendations/', params)
+            self.assertEqual(response.status_code, 200)
+            pages.append([(item['id'], item['score']) for item in response.data['results']])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([item for page in pages for item in page], ranked)
+
+    def test_bad_parameters(self):
+        for params in ({'limit': 0}, {'limit': 'десять'}, {'cursor': 'не-курсор'}):
+            response = self.client.get('/api/matching/recommendations/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.data)
+
+
+class CandidateIndexTestCase(TestCase):
+    """Кандидаты из индекса совпадают с запросом к базе после изменений предметов"""
+
+    def setUp(self):
+        caches['default'].clear()
+        candidate_index.reset()
+        swiped_cache.clear()
+        self.math = Subject.objects.create(name='Математика', code='MATH')
+        self.physics = Subject.objects.create(name='Физика', code='PHYS')
+        self.user = make_user('owner', self.math)
+        self.others = [make_user(f'user{i}', self.math if i % 2 else self.physics) for i in range(6)]
+        Swipe.objects.create(swiper=self.user, swiped_user=self.others[1])
+
+    def tearDown(self):
+        candidate_index.reset()
+        swiped_cache.clear()
+
+    def expected(self, user=None):
+        """Прежний запрос: общие предметы без себя и уже свайпнутых"""
+        user = user or self.user
+        return set(UserSubject.objects.filter(
+            subject__in=UserSubject.objects.filter(user=user).values('subject')
+        ).exclude(user=user).exclude(
+            user__in=Swipe.objects.filter(swiper=user).values('swiped_user')
+        ).values_list('user_id', flat=True))
+
+    def test_follows_subject_changes(self):
+        self.assertEqual(candidate_index.candidates(self.user.id), self.expected())
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSubject.objects.create(user=self.others[0], subject=self.math)
+            UserSubject.objects.create(user=self.user, subject=self.physics)
+        self.assertEqual(candidate_index.candidates(self.user.id), self.expected())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSubject.objects.filter(user=self.user, subject=self.physics).delete()
+            UserSubject.objects.get(user=self.others[3], subject=self.math).delete()
+        self.assertEqual(candidate_index.candidates(self.user.id), self.expected())
+
+    def test_matches_query_for_every_user(self):
+        users = [self.user, *self.others]
+        for user in users:
+            self.assertEqual(candidate_index.candidates(user.id), self.expected(user), user.username)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSubject.objects.create(user=self.others[2], subject=self.math, level='advanced')
+            UserSubject.objects.filter(user=self.others[1], subject=self.math).delete()
+            Swipe.objects.create(swiper=self.others[3], swiped_user=self.user)
+        for user in users:
+            self.assertEqual(candidate_index.candidates(user.id), self.expected(user), user.username)
+
+    def test_subject_levels(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            subject = UserSubject.objects.get(user=self.others[3], subject=self.math)
+            subject.level = 'advanced'
+            subject.save()
+        candidate_ids = {self.others[0].id, self.others[1].id, self.others[3].id}
+        own, columns = candidate_index.subject_levels(self.user.id, candidate_ids)
+        self.assertEqual(own, {self.math.id: 'beginner'})
+        self.assertEqual(columns, {self.math.id: {self.others[1].id: 'beginner', self.others[3].id: 'advanced'}})
+        self.assertEqual(candidate_index.subject_levels(self.user.id), (own, {}))
+
+    def test_reloads_after_change_in_other_process(self):
+        candidate_index.candidates(self.user.id)
+        # Запись другого процесса: сигналы здесь не срабатывают, но общая версия растет
+        UserSubject.objects.bulk_create([UserSubject(user=self.others[0], subject=self.math)])
+        self.assertNotEqual(candidate_index.candidates(self.user.id), self.expected())
+        shared_version.bump(VERSION_NAME)
+        self.assertEqual(candidate_index.candidates(self.user.id), self.expected())
+
+        # Без общего кэша индекс все равно перестраивается не реже чем раз в max_age
+        UserSubject.objects.bulk_create([UserSubject(user=self.others[2], subject=self.math)])
+        candidate_index.max_age, max_age = 0, candidate_index.max_age
+        try:
+            self.assertEqual(candidate_index.candidates(self.user.id), self.expected())
+        finally:
+            candidate_index.max_age = max_age
+
+
+class MatchGraphTestCase(TestCase):
+    """Ребра графа мэтчей следуют за Match; проверка мэтча, общие мэтчи и друзья друзей"""
+
+    def setUp(self):
+        swiped_cache.clear()
+        self.user, self.friend, self.other_friend, self.stranger, self.near, self.far = [
+            make_user(name) for name in ('owner', 'friend', 'other_friend', 'stranger', 'near', 'far')
+        ]
+        for first, second in ((self.user, self.friend), (self.user, self.other_friend),
+                              (self.friend, self.near), (self.other_friend, self.near), (self.friend, self.far)):
+            Match.objects.create(user1=first, user2=second)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        swiped_cache.clear()
+
+    def neighbours(self, user):
+        return set(MatchEdge.objects.filter(user=user).values_list('other_id', flat=True))
+
+    def test_edges_follow_matches(self):
+        self.assertEqual(self.neighbours(self.friend), {self.user.id, self.near.id, self.far.id})
+        match = Match.objects.get(user1=self.friend, user2=self.far)
+        match.is_active = False
+        match.save()
+        self.assertEqual(self.neighbours(self.far), set())
+        match.is_active = True
+        match.save()
+        self.assertEqual(self.neighbours(self.far), {self.friend.id})
+        match.delete()
+        self.assertEqual(self.neighbours(self.far), set())
+
+        # Пакетный свайп создает мэтчи через bulk_create
+        Swipe.objects.create(swiper=self.stranger, swiped_user=self.user, action='like')
+        response = self.client.post('/api/matching/swipe/batch/', {
+            'idempotency_key': 'graph', 'swipes': [{'user_id': self.stranger.id, 'action': 'like'}]
+        }, format='json')
+        self.assertEqual(len(response.data['matches']), 1)
+        self.assertIn(self.stranger.id, self.neighbours(self.user))
+
+    def test_match_status(self):
+        response = self.client.get(f'/api/matching/matches/{self.near.id}/')
+        self.assertEqual(response.data, {'user_id': self.near.id, 'matched': False, 'mutual_matches': 2})
+        response = self.client.get(f'/api/matching/matches/{self.friend.id}/')
+        self.assertEqual(response.data, {'user_id': self.friend.id, 'matched': True, 'mutual_matches': 0})
+
+    def test_mutual_recommendations(self):
+        response = self.client.get('/api/matching/recommendations/mutual/', {'limit': 1})
+        self.assertEqual([(item['id'], item['mutual_matches']) for item in response.data['results']],
+                         [(self.near.id, 2)])
+        response = self.client.get('/api/matching/recommendations/mutual/',
+                                   {'limit': 1, 'cursor': response.data['next_cursor']})
+        self.assertEqual([(item['id'], item['mutual_matches']) for item in response.data['results']],
+                         [(self.far.id, 1)])
+        self.assertIsNone(response.data['next_cursor'])
+
+        # Уже свайпнутые не рекомендуются
+        Swipe.objects.create(swiper=self.user, swiped_user=self.near, action='pass')
+        swiped_cache.invalidate(self.user.id)
+        response = self.client.get('/api/matching/recommendations/mutual/')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.far.id])
+
+
+class SwipeBatchTestCase(TestCase):
+    """Пакетный свайп: причины пропуска, мэтчи, идемпотентный повтор и проверка тела запроса"""
+
+    def setUp(self):
+        swiped_cache.clear()
+        self.user, self.fan, self.matched, self.swiped, self.plain = [
+            make_user(name) for name in ('owner', 'fan', 'matched', 'swiped', 'plain')
+        ]
+        # fan лайкнул нас - взаимный лайк даст новый мэтч; с matched мэтч уже есть
+        Swipe.objects.create(swiper=self.fan, swiped_user=self.user, action='like')
+        Swipe.objects.create(swiper=self.matched, swiped_user=self.user, action='like')
+        self.existing_match = Match.objects.create(user1=self.user, user2=self.matched)
+        Swipe.objects.create(swiper=self.user, swiped_user=self.swiped, action='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        swiped_cache.clear()
+
+    def post(self, swipes, key='batch-1'):
+        return self.client.post('/api/matching/swipe/batch/', {'idempotency_key': key, 'swipes': swipes}, format='json')
+
+    def notify_jobs(self):
+        return list(Job.objects.filter(name='matching.notify_matches').values_list('payload', flat=True))
+
+    def test_skip_reasons_and_matches(self):
+        swipes = [
+            {'user_id': self.fan.id, 'action': 'like'},
+            {'user_id': self.matched.id, 'action': 'like'},
+            {'user_id': self.plain.id, 'action': 'pass'},
+            {'user_id': self.user.id, 'action': 'like'},
+            {'user_id': 999999, 'action': 'like'},
+            {'user_id': self.swiped.id, 'action': 'like'},
+            {'user_id': self.plain.id, 'action': 'like'},
+        ]
+        response = self.post(swipes)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], [
+            {'user_id': self.fan.id, 'action': 'like'},
+            {'user_id': self.matched.id, 'action': 'like'},
+            {'user_id': self.plain.id, 'action': 'pass'},
+        ])
+        self.assertEqual([(item['user_id'], item['reason']) for item in response.data['skipped']], [
+            (self.user.id, 'self'), (999999, 'not_found'), (self.swiped.id, 'already_swiped'),
+            (self.plain.id, 'already_swiped'),
+        ])
+        new_match = Match.objects.get(user1=self.user, user2=self.fan)
+        self.assertEqual({item['id'] for item in response.data['matches']}, {new_match.id, self.existing_match.id})
+        self.assertEqual(Swipe.objects.filter(swiper=self.user).count(), 4)
+
+        # Ребра графа и уведомление - только для нового мэтча, по одному разу
+        self.assertEqual(MatchEdge.objects.filter(match=new_match).count(), 2)
+        self.assertEqual(self.notify_jobs(), [{'match_ids': [new_match.id]}])
+
+    def test_retry_returns_same_result(self):
+        swipes = [{'user_id': self.fan.id, 'action': 'like'}, {'user_id': self.plain.id, 'action': 'pass'}]
+        first = self.post(swipes)
+        counts = (Swipe.objects.count(), Match.objects.count(), MatchEdge.objects.count(), SwipeBatch.objects.count())
+
+        retry = self.post(swipes)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(
+            (Swipe.objects.count(), Match.objects.count(), MatchEdge.objects.count(), SwipeBatch.objects.count()),
+            counts
+        )
+        self.assertEqual(len(self.notify_jobs()), 1)
+
+        # Ключ можно передать заголовком; другой ключ - новый пакет
+        response = self.client.post('/api/matching/swipe/batch/', {'swipes': swipes}, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='batch-1')
+        self.assertEqual(response.data, first.data)
+        response = self.post(swipes, key='batch-2')
+        self.assertEqual(len(response.data['skipped']), 2)
+
+    def test_rejects_malformed_batches(self):
+        like = {'user_id': self.fan.id, 'action': 'like'}
+        for payload in (
+            {'swipes': [like]},
+            {'idempotency_key': 'k' * 65, 'swipes': [like]},
+            {'idempotency_key': 'bad', 'swipes': []},
+            {'idempotency_key': 'bad', 'swipes': like},
+            {'idempotency_key': 'bad', 'swipes': [{'user_id': self.fan.id}]},
+            {'idempotency_key': 'bad', 'swipes': [{'user_id': 'fan', 'action': 'like'}]},
+            {'idempotency_key': 'bad', 'swipes': [{'user_id': self.fan.id, 'action': 'superlike'}]},
+            {'idempotency_key': 'bad', 'swipes': [like] * (MAX_BATCH_SIZE + 1)},
+        ):
+            response = self.client.post('/api/matching/swipe/batch/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(SwipeBatch.objects.exists())
+        self.assertFalse(Swipe.objects.filter(swiper=self.user, swiped_user=self.fan).exists())
+
+
+class ConcurrentSwipeTestCase(TransactionTestCase):
+    """Нагрузочная проверка: встречные лайки из параллельных потоков"""
+
+    PAIRS = 20
+
+    def swipe(self, swiper, target):
+        try:
+            client = APIClient()
+            client.force_authenticate(swiper)
+            return client.post(f'/api/matching/swipe/{target.id}/', {'action': 'like'}).status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_mutual_likes_create_one_match_per_pair(self):
+        pairs = [(make_user(f'a{i}'), make_user(f'b{i}')) for i in range(self.PAIRS)]
+        jobs = []
+        for a, b in pairs:
+            # Каждую пару лайкают с обеих сторон, плюс повторные попытки
+            jobs += [(a, b), (b, a), (a, b), (b, a)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            codes = list(executor.map(lambda job: self.swipe(*job), jobs))
+
+        self.assertEqual(codes.count(201), 2 * self.PAIRS)
+        self.assertEqual(codes.count(400), 2 * self.PAIRS)
+        self.assertEqual(Match.objects.count(), self.PAIRS)
+        for a, b in pairs:
+            self.assertTrue(Match.objects.filter(user1=a, user2=b).exists())
+
+
+class SwipedSetCacheTestCase(TestCase):
+    """Кэш свайпнутых: синхронизация с Swipe, фильтр Блума и вытеснение"""
+
+    def setUp(self):
+        swiped_cache.clear()
+        self.user = make_user('owner')
+        self.others = [make_user(f'other{i}') for i in range(5)]
+
+    def tearDown(self):
+        swiped_cache.clear()
+
+    def test_follows_swipe_writes(self):
+        Swipe.objects.create(swiper=self.user, swiped_user=self.others[0])
+        ids = {other.id for other in self.others}
+        self.assertEqual(swiped_cache.exclude_swiped(self.user.id, ids), ids - {self.others[0].id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Swipe.objects.create(swiper=self.user, swiped_user=self.others[1])
+        with self.assertNumQueries(0):
+            remaining = swiped_cache.exclude_swiped(self.user.id, ids)
+        self.assertEqual(remaining, ids - {self.others[0].id, self.others[1].id})
+        self.assertEqual(swiped_cache.stats()['misses'], 1)
+
+    def test_sees_swipes_from_other_processes(self):
+        ids = {other.id for other in self.others}
+        swiped_cache.get(self.user.id)
+        # Свайп другого процесса: сигнал здесь не срабатывает, но общая версия пользователя растет
+        Swipe.objects.bulk_create([Swipe(swiper=self.user, swiped_user=self.others[0])])
+        shared_version.bump(f'swiped:{self.user.id}')
+        self.assertEqual(swiped_cache.exclude_swiped(self.user.id, ids), ids - {self.others[0].id})
+
+        # Без общего кэша множество перезагружается по TTL
+        Swipe.objects.bulk_create([Swipe(swiper=self.user, swiped_user=self.others[1])])
+        cache = SwipedSetCache(ttl=60)
+        cache.get(self.user.id)
+        cache._entries[self.user.id] = cache._entries[self.user.id][:3] + (0,)
+        self.assertEqual(cache.exclude_swiped(self.user.id, ids), ids - {self.others[0].id, self.others[1].id})
+
+    def test_writes_for_uncached_users_are_not_kept(self):
+        for other in self.others:
+            swiped_cache.add(other.id, self.user.id)
+            swiped_cache.invalidate(other.id)
+        swiped_cache.get(self.user.id)
+        self.assertEqual(swiped_cache._loading, {})
+        self.assertEqual(swiped_cache.stats()['entries'], 1)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(i)
+        self.assertTrue(all(i in bloom for i in range(1000)))
+        false_positives = sum(1 for i in range(1000, 11000) if i in bloom)
+        self.assertLess(false_positives, 300)
+
+    def test_large_sets_become_bloom_filters_and_lru_evicts(self):
+        cache = SwipedSetCache(max_bytes=600, bloom_threshold=3)
+        for other in self.others[:3]:
+            Swipe.objects.create(swiper=self.user, swiped_user=other)
+        self.assertIsInstance(cache.get(self.user.id), BloomFilter)
+        self.assertEqual(cache.exclude_swiped(self.user.id, [self.others[0].id]), set())
+
+        for other in self.others:
+            cache.get(other.id)
+        self.assertLessEqual(cache.stats()['bytes'], 600)
+        self.assertGreater(cache.stats()['evictions'], 0)
+
+
+class QueryPlanTestCase(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAIN запросов горячих эндпоинтов мэтчинга на заполненной базе"""
+
+    def setUp(self):
+        candidate_index.reset()
+        swiped_cache.clear()
+        subject = Subject.objects.create(name='Физика', code='PHYS')
+        users = [make_user(f'user{i}', subject) for i in range(30)]
+        self.user = users[10]
+        for other in users[:10]:
+            Match.objects.create(user1=other, user2=self.user)
+            Swipe.objects.create(swiper=other, swiped_user=self.user)
+        for other in users[11:20]:
+            Match.objects.create(user1=self.user, user2=other, is_active=False)
+        self.target = users[25]
+        Swipe.objects.create(swiper=self.target, swiped_user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        candidate_index.reset()
+        swiped_cache.clear()
+
+    def test_recommendations(self):
+        # Первичная загрузка индекса кандидатов читает UserSubject целиком
+        self.assertNoFullScans(candidate_index.load, allowed_tables={'matching_usersubject'})
+        self.assertNoFullScans(lambda: swiped_cache.get(self.user.id))
+        self.assertNoFullScans(lambda: self.client.get('/api/matching/recommendations/'))
+
+    def test_matches(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/matching/matches/'))
+        self.assertNoFullScans(lambda: self.client.get(f'/api/matching/matches/{self.target.id}/'))
+
+    def test_mutual_recommendations(self):
+        swiped_cache.get(self.user.id)
+        self.assertNoFullScans(lambda: self.client.get('/api/matching/recommendations/mutual/'))
+
+    def test_swipe(self):
+        response = self.assertNoFullScans(
+            lambda: self.client.post(f'/api/matching/swipe/{self.target.id}/', {'action': 'like'})
+        )
+        self.assertTrue(response.data['match_created'])
+
+    def test_swipe_batch(self):
+        self.assertNoFullScans(lambda: self.client.post('/api/matching/swipe/batch/', {
+            'idempotency_key': 'plan',
+            'swipes': [{'user_id': self.target.id, 'action': 'like'}]
+        }, format='json'))
+
+
+class ReferenceCacheTestCase(TestCase):
+    """Справочник предметов: готовое тело из кэша, ETag/304 и сброс при изменении"""
+
+    def setUp(self):
+        caches['reference'].clear()
+        Subject.objects.create(name='Физика', code='PHY')
+        self.client = APIClient()
+
+    def tearDown(self):
+        caches['reference'].clear()
+
+    def test_etag_and_invalidation(self):
+        response = self.client.get('/api/matching/subjects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([subject['name'] for subject in response.json()], ['Физика'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/matching/subjects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='Химия', code='CHEM')
+        response = self.client.get('/api/matching/subjects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()), 2)
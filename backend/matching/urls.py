@@ -5,6 +5,11 @@ from . import views
 urlpatterns = [
     path('subjects/', views.get_subjects, name='subjects'),
     path('recommendations/', views.get_recommendations, name='recommendations'),
+    path('recommendations/mutual/', views.get_mutual_recommendations, name='mutual_recommendations'),
     path('swipe/<int:user_id>/', views.swipe, name='swipe'),
+    path('swipe/batch/', views.swipe_batch, name='swipe_batch'),
+    path('matches/', views.get_matches, name='matches'),
+    path('matches/<int:user_id>/', views.match_status, name='match_status'),
+    path('swiped-cache/stats/', views.swiped_cache_stats, name='swiped_cache_stats'),
     path('health/', views.health_check, name='health_check'),
 ]
\ No newline at end of file
@@ -1,12 +1,31 @@
 # matching/views.py
+import asyncio
+import numpy as np
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Q
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django.contrib.auth.models import User
-from .models import Subject, UserSubject, Swipe, Match
-from .serializers import SubjectSerializer, UserSubjectSerializer, SwipeSerializer, MatchSerializer, SimpleProfileSerializer
+from django.db import connections
+from studymatch.cursors import encode_cursor, decode_cursor
+from studymatch.reference_cache import reference_response
+from studymatch.payloads import match_edge_payload, MATCH_EDGE_VALUES
+from users.models import UserProfile
+from .models import Subject, UserSubject, Match, MatchEdge
+from . import graph
+from .index import candidate_index
+from .swiped_cache import swiped_cache
+from .scoring import score_candidates, page_after
+from .swipes import record_swipe, record_swipe_batch, AlreadySwiped, MAX_BATCH_SIZE
+from .serializers import (
+    SubjectSerializer, UserSubjectSerializer, SwipeSerializer, MatchSerializer, RecommendationSerializer,
+    simple_profile_data
+)
+
+# Максимальный размер страницы рекомендаций
+MAX_RECOMMENDATIONS_PAGE = 50
 
 
 @api_view(['GET'])
@@ -18,10 +37,10 @@ def health_check(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])  # ИСПРАВЛЕНО: AllowAny вместо IsAuthenticated
 def get_subjects(request):
-    """Получить список всех предметов"""
-    subjects = Subject.objects.all()
-    serializer = SubjectSerializer(subjects, many=True)
-    return Response(serializer.data)
+    """Получить список всех предметов (из кэша справочников, с поддержкой ETag)"""
+    return reference_response(
+        request, 'subjects', lambda: SubjectSerializer(Subject.objects.all(), many=True).data
+    )
 
 
 @api_view(['GET', 'POST'])
@@ -29,7 +48,7 @@ def get_subjects(request):
 def user_subjects(request):
     """Получить или добавить предметы пользователя"""
     if request.method == 'GET':
-        user_subjects = UserSubject.objects.filter(user=request.user)
+        user_subjects = UserSubject.objects.filter(user_id=request.user.id)
         serializer = UserSubjectSerializer(user_subjects, many=True)
         return Response(serializer.data)
 
@@ -37,10 +56,10 @@ def user_subjects(request):
         serializer = UserSubjectSerializer(data=request.data)
         if serializer.is_valid():
             # Проверяем, не добавлен ли уже этот предмет
-            if UserSubject.objects.filter(user=request.user, subject=serializer.validated_data['subject']).exists():
+            if UserSubject.objects.filter(user_id=request.user.id, subject=serializer.validated_data['subject']).exists():
                 return Response({'error': 'Этот предмет уже добавлен'}, status=status.HTTP_400_BAD_REQUEST)
 
-            serializer.save(user=request.user)
+            serializer.save(user_id=request.user.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -50,61 +69,140 @@ def user_subjects(request):
 def delete_user_subject(request, subject_id):
     """Удалить предмет у пользователя"""
     try:
-        user_subject = UserSubject.objects.get(user=request.user, subject_id=subject_id)
+        user_subject = UserSubject.objects.get(user_id=request.user.id, subject_id=subject_id)
         user_subject.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
     except UserSubject.DoesNotExist:
         return Response({'error': 'Предмет не найден'}, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_recommendations(request):
-    """Получить рекомендации пользователей для мэтчинга"""
-    # Базовая логика рекомендаций - пользователи с общих предметов
-    user_subjects = UserSubject.objects.filter(user=request.user).values_list('subject', flat=True)
-
-    # Исключаем уже просмотренных пользователей и себя
-    swiped_users = Swipe.objects.filter(swiper=request.user).values_list('swiped_user', flat=True)
-
-    recommended_users = User.objects.exclude(
-        Q(id=request.user.id) |
-        Q(id__in=swiped_users)
-    ).filter(
-        user_subjects__subject__in=user_subjects
-    ).distinct()[:10]  # Ограничиваем 10 рекомендациями
-
-    # Создаем список профилей для сериализации
-    profiles_data = []
-    for user in recommended_users:
+async def get_recommendations(request):
+    """Получить рекомендации пользователей для мэтчинга, ранжированные по совместимости"""
+    try:
+        limit, after = _page_params(request)
+    except ValueError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Кандидаты - пользователи с общими предметами, которых еще не свайпали (без себя).
+    # Считаются по индексу в памяти, без JOIN по UserSubject/Swipe на каждый запрос.
+    # Общие предметы и множество свайпнутых независимы и при промахе кэша читаются
+    # из базы - запрашиваем их одновременно, каждое в своем потоке
+    shared_users, swiped = await asyncio.gather(
+        _in_own_thread(candidate_index.shared_subject_users)(request.user.id),
+        _in_own_thread(swiped_cache.get)(request.user.id),
+    )
+    candidate_ids = swiped_cache.exclude_swiped(request.user.id, shared_users, swiped)
+    # В памяти, но индекс мог быть сброшен сигналом и перестроится из базы
+    own_levels, level_columns = await sync_to_async(candidate_index.subject_levels)(request.user.id, candidate_ids)
+
+    # Признаки профилей одним запросом; пользователи без профиля в выдачу не попадают
+    profile_rows = UserProfile.objects.filter(
+        user_id__in=candidate_ids | {request.user.id}
+    ).values_list('user_id', 'university_id', 'faculty', 'year_of_study')
+    own_profile = (None, '', None)
+    candidate_profiles = []
+    async for row in profile_rows:
+        if row[0] == request.user.id:
+            own_profile = row[1:]
+        else:
+            candidate_profiles.append(row)
+
+    ids, scores = score_candidates(own_levels, level_columns, own_profile, candidate_profiles)
+    page_ids, page_scores, has_more = page_after(ids, scores, after, limit)
+
+    # Пользователи страницы вместе с профилями - одним запросом, общие мэтчи - вторым
+    users_by_id = await User.objects.select_related('profile').ain_bulk(page_ids)
+    mutual = await sync_to_async(graph.mutual_match_counts)(request.user.id, page_ids)
+    return Response(_recommendation_page(page_ids, page_scores, has_more, users_by_id, mutual))
+
+
+def _in_own_thread(func):
+    """sync_to_async вне общего потока синхронного кода, чтобы вызовы в gather шли параллельно.
+
+    С thread_sensitive=True все вызовы выполняются по очереди в одном потоке. Здесь каждый
+    идет в потоке пула; соединение с базой, открытое при промахе кэша, закрывается сразу -
+    соединения привязаны к потоку, и иначе пул копил бы открытые соединения.
+    """
+    def call(*args):
         try:
-            profile = user.profile
-            profiles_data.append({
-                'id': user.id,
-                'username': user.username,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'faculty': profile.faculty,
-                'year_of_study': profile.year_of_study,
-                'bio': profile.bio
-            })
-        except:
-            # Если профиль не существует, пропускаем пользователя
+            return func(*args)
+        finally:
+            connections.close_all()
+    return sync_to_async(call, thread_sensitive=False)
+
+
+def _recommendation_page(page_ids, page_scores, has_more, users_by_id, mutual):
+    # Создаем список профилей для сериализации в порядке ранжирования
+    profiles_data = []
+    for user_id, score in zip(page_ids, page_scores):
+        user = users_by_id.get(user_id)
+        data = simple_profile_data(user) if user is not None else None
+        if data is None:
+            # Если пользователь удален или профиль не существует, пропускаем его
             continue
+        data['score'] = score
+        data['mutual_matches'] = mutual.get(user_id, 0)
+        profiles_data.append(data)
 
-    serializer = SimpleProfileSerializer(profiles_data, many=True)
-    return Response(serializer.data)
+    next_cursor = None
+    if has_more and page_ids:
+        next_cursor = encode_cursor(page_scores[-1], page_ids[-1])
+
+    serializer = RecommendationSerializer(profiles_data, many=True)
+    return {
+        'results': serializer.data,
+        'next_cursor': next_cursor
+    }
+
+
+def _page_params(request):
+    """(limit, after) страницы рекомендаций из параметров запроса; ValueError с текстом ошибки"""
+    try:
+        limit = min(int(request.query_params.get('limit', 10)), MAX_RECOMMENDATIONS_PAGE)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        raise ValueError('Неверный параметр limit')
+
+    after = None
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            after_score, after_id = decode_cursor(cursor, 2)
+            after = (float(after_score), int(after_id))
+        except (TypeError, ValueError):
+            raise ValueError('Неверный курсор')
+    return limit, after
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_mutual_recommendations(request):
+    """Друзья друзей: пользователи с общими мэтчами, ранжированные по их числу.
+
+    Балл рекомендации - число общих мэтчей; уже свайпнутые и прямые мэтчи не попадают."""
+    try:
+        limit, after = _page_params(request)
+    except ValueError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    ids, counts = graph.second_degree(request.user.id)
+    remaining = swiped_cache.exclude_swiped(request.user.id, ids.tolist())
+    keep = np.isin(ids, np.fromiter(remaining, dtype=np.int64, count=len(remaining)))
+    ids, counts = ids[keep], counts[keep]
+    page_ids, page_scores, has_more = page_after(ids, counts, after, limit)
+
+    users_by_id = User.objects.select_related('profile').in_bulk(page_ids)
+    mutual = {user_id: int(score) for user_id, score in zip(page_ids, page_scores)}
+    return Response(_recommendation_page(page_ids, page_scores, has_more, users_by_id, mutual))
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def swipe(request, user_id):
     """Сделать свайп (лайк/пас) на пользователя"""
-    try:
-        swiped_user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
-        return Response({'error': 'Пользователь не найден'}, status=status.HTTP_404_NOT_FOUND)
-
     if request.user.id == user_id:
         return Response({'error': 'Нельзя свайпнуть себя'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -112,36 +210,20 @@ def swipe(request, user_id):
     if action not in ['like', 'pass']:
         return Response({'error': 'Неверное действие. Используйте like или pass'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Проверяем, не свайпали ли уже этого пользователя
-    if Swipe.objects.filter(swiper=request.user, swiped_user=swiped_user).exists():
+    # Свайп, проверка взаимности и мэтч - одна транзакция (см. matching/swipes.py)
+    try:
+        swipe, match = record_swipe(request.user.id, user_id, action)
+    except User.DoesNotExist:
+        return Response({'error': 'Пользователь не найден'}, status=status.HTTP_404_NOT_FOUND)
+    except AlreadySwiped:
         return Response({'error': 'Вы уже свайпали этого пользователя'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Создаем свайп
-    swipe = Swipe.objects.create(
-        swiper=request.user,
-        swiped_user=swiped_user,
-        action=action
-    )
-
-    # Если это взаимный лайк - создаем мэтч
-    if action == 'like':
-        mutual_swipe = Swipe.objects.filter(
-            swiper=swiped_user,
-            swiped_user=request.user,
-            action='like'
-        ).first()
-
-        if mutual_swipe:
-            # Создаем мэтч
-            match = Match.objects.create(
-                user1=request.user,
-                user2=swiped_user
-            )
-            return Response({
-                'swipe': SwipeSerializer(swipe).data,
-                'match_created': True,
-                'match': MatchSerializer(match, context={'request': request}).data
-            }, status=status.HTTP_201_CREATED)
+    if match is not None:
+        return Response({
+            'swipe': SwipeSerializer(swipe).data,
+            'match_created': True,
+            'match': MatchSerializer(match, context={'request': request}).data
+        }, status=status.HTTP_201_CREATED)
 
     return Response({
         'swipe': SwipeSerializer(swipe).data,
@@ -149,13 +231,67 @@ def swipe(request, user_id):
     }, status=status.HTTP_201_CREATED)
 
 
-@api_view(['GET'])
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def swipe_batch(request):
+    """Пакетный свайп: {"idempotency_key": "...", "swipes": [{"user_id": 1, "action": "like"}, ...]}
+
+    Ключ идемпотентности можно передать и заголовком Idempotency-Key;
+    повтор пакета с тем же ключом возвращает тот же результат без новых записей.
+    """
+    idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    if not idempotency_key or len(str(idempotency_key)) > 64:
+        return Response({'error': 'Нужен ключ идемпотентности (до 64 символов)'}, status=status.HTTP_400_BAD_REQUEST)
+
+    swipes = request.data.get('swipes')
+    if not isinstance(swipes, list) or not swipes:
+        return Response({'error': 'Передайте непустой список swipes'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(swipes) > MAX_BATCH_SIZE:
+        return Response({'error': f'Не больше {MAX_BATCH_SIZE} свайпов в пакете'}, status=status.HTTP_400_BAD_REQUEST)
+
+    items = []
+    for item in swipes:
+        try:
+            user_id, action = int(item['user_id']), item['action']
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Каждый свайп - объект с user_id и action'}, status=status.HTTP_400_BAD_REQUEST)
+        if action not in ['like', 'pass']:
+            return Response({'error': 'Неверное действие. Используйте like или pass'}, status=status.HTTP_400_BAD_REQUEST)
+        items.append((user_id, action))
+
+    result = record_swipe_batch(request.user.id, items, str(idempotency_key))
+
+    matches = Match.objects.filter(id__in=result['match_ids']).select_related('user1__profile', 'user2__profile')
+    return Response({
+        'created': result['created'],
+        'skipped': result['skipped'],
+        'matches': MatchSerializer(matches, many=True, context={'request': request}).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_matches(request):
+async def get_matches(request):
     """Получить список мэтчей пользователя"""
-    matches = Match.objects.filter(
-        Q(user1=request.user) | Q(user2=request.user),
-        is_active=True
-    )
-    serializer = MatchSerializer(matches, many=True, context={'request': request})
-    return Response(serializer.data)
\ No newline at end of file
+    # Один запрос .values() по ребрам графа мэтчей пользователя (индекс (user, other),
+    # без OR по user1/user2) с мэтчем и профилем собеседника, без моделей и сериализаторов
+    rows = MatchEdge.objects.filter(user_id=request.user.id).values(*MATCH_EDGE_VALUES)
+    return Response([match_edge_payload(row) async for row in rows])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def match_status(request, user_id):
+    """Есть ли мэтч с пользователем и сколько у нас общих мэтчей - для его профиля"""
+    return Response({
+        'user_id': user_id,
+        'matched': graph.are_matched(request.user.id, user_id),
+        'mutual_matches': graph.mutual_match_counts(request.user.id, [user_id]).get(user_id, 0),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def swiped_cache_stats(request):
+    """Статистика кэша свайпнутых пользователей (попадания, промахи, память)"""
+    return Response(swiped_cache.stats())
@@ -0,0 +1,11 @@
+# search/apps.py
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        # Подключаем сигналы, поддерживающие поисковый индекс
+        from . import signals  # noqa: F401
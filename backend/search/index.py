@@ -0,0 +1,176 @@
+# search/index.py
+import math
+import threading
+from collections import Counter, defaultdict
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from jobs.queue import task
+from matching.models import Subject, UserSubject
+from study_sessions.models import StudySession
+from .models import Posting
+from .text import analyze
+
+# Инвертированный индекс в таблице Posting: для каждого объекта - его термы с весами.
+# Вес терма в объекте - сумма по полям: вес поля * (1 + ln(число вхождений)).
+# При поиске вес умножается на IDF терма ln(1 + N / df), баллы термов складываются.
+
+INDEX_BATCH_SIZE = 1000
+DOC_COUNT_CACHE_TIMEOUT = 300
+
+# Поля объектов и их веса
+USER_FIELDS = (
+    ('username', 3), ('first_name', 3), ('last_name', 3), ('profile__faculty', 2),
+    ('profile__university__name', 1.5), ('profile__university__short_name', 1.5), ('profile__bio', 1),
+)
+USER_SUBJECT_WEIGHT = 2
+SUBJECT_FIELDS = (('name', 3), ('code', 3), ('description', 1))
+SESSION_FIELDS = (('title', 3), ('subject_name', 2), ('description', 1))
+
+
+def term_weights(fields):
+    """{терм: вес} для [(текст, вес поля), ...]"""
+    weights = defaultdict(float)
+    for text, field_weight in fields:
+        for term, count in Counter(analyze(text)).items():
+            weights[term] += field_weight * (1 + math.log(count))
+    return {term: round(weight, 4) for term, weight in weights.items()}
+
+
+def _user_documents(ids):
+    rows = User.objects.filter(id__in=ids, is_active=True).values('id', *(field for field, _ in USER_FIELDS))
+    subjects = defaultdict(list)
+    for user_id, name in UserSubject.objects.filter(user_id__in=ids).values_list('user_id', 'subject__name'):
+        subjects[user_id].append((name, USER_SUBJECT_WEIGHT))
+    return {
+        row['id']: [(row[field], weight) for field, weight in USER_FIELDS] + subjects[row['id']]
+        for row in rows
+    }
+
+
+def _subject_documents(ids):
+    rows = Subject.objects.filter(id__in=ids).values('id', *(field for field, _ in SUBJECT_FIELDS))
+    return {row['id']: [(row[field], weight) for field, weight in SUBJECT_FIELDS] for row in rows}
+
+
+def _session_documents(ids):
+    # Отмененные сессии не ищутся: их записи удаляются при переиндексации
+    rows = StudySession.objects.filter(id__in=ids, is_active=True).values('id', *(field for field, _ in SESSION_FIELDS))
+    return {row['id']: [(row[field], weight) for field, weight in SESSION_FIELDS] for row in rows}
+
+
+# Тип объекта -> (документы по id, QuerySet индексируемых объектов - для перестройки и IDF)
+KINDS = {
+    'user': (_user_documents, lambda: User.objects.filter(is_active=True)),
+    'subject': (_subject_documents, lambda: Subject.objects.all()),
+    'session': (_session_documents, lambda: StudySession.objects.filter(is_active=True)),
+}
+
+
+def index_objects(kind, ids):
+    """Переиндексировать объекты по текущему состоянию базы; удаленных - убрать из индекса"""
+    build_documents, _ = KINDS[kind]
+    ids = list(ids)
+    for start in range(0, len(ids), INDEX_BATCH_SIZE):
+        batch = ids[start:start + INDEX_BATCH_SIZE]
+        documents = build_documents(batch)
+        with transaction.atomic():
+            Posting.objects.filter(kind=kind, object_id__in=batch).delete()
+            Posting.objects.bulk_create(
+                Posting(term=term, kind=kind, object_id=object_id, weight=weight)
+                for object_id, fields in documents.items()
+                for term, weight in term_weights(fields).items()
+            )
+
+
+def rebuild(kinds=None):
+    """Перестроить индекс целиком; возвращает {тип: число объектов}"""
+    counts = {}
+    for kind in kinds or KINDS:
+        _, queryset = KINDS[kind]
+        Posting.objects.filter(kind=kind).delete()
+        ids = list(queryset().values_list('id', flat=True))
+        index_objects(kind, ids)
+        counts[kind] = len(ids)
+        cache.delete(_doc_count_key(kind))
+    return counts
+
+
+# Изменения копятся до коммита: несколько сигналов по одному объекту в транзакции
+# (пользователь, профиль, предметы) дают одну переиндексацию - одну задачу в очереди
+_pending = threading.local()
+
+
+def schedule(kind, ids):
+    """Переиндексировать объекты в фоне после коммита текущей транзакции"""
+    items = _pending.__dict__.setdefault('items', set())
+    items.update((kind, object_id) for object_id in ids)
+    # Переиндексация читает состояние базы, поэтому объекты из откаченной транзакции,
+    # оставшиеся в очереди, просто переиндексируются вместе со следующими
+    transaction.on_commit(flush)
+
+
+def flush():
+    # Строка задачи пишется уже после коммита: если процесс упадет в этот момент,
+    # индекс догонит manage.py rebuild_search_index
+    items = getattr(_pending, 'items', None)
+    if not items:
+        return
+    _pending.items = set()
+    by_kind = defaultdict(list)
+    for kind, object_id in items:
+        by_kind[kind].append(object_id)
+    reindex.enqueue(objects={kind: sorted(ids) for kind, ids in by_kind.items()})
+
+
+@task('search.reindex')
+def reindex(objects):
+    """Переиндексировать объекты {тип: [id, ...]}"""
+    for kind, ids in objects.items():
+        index_objects(kind, ids)
+
+
+def _doc_count_key(kind):
+    return f'search:doc_count:{kind}'
+
+
+def document_count(kind):
+    """Число объектов типа для IDF; кэшируется - точность здесь не нужна"""
+    count = cache.get(_doc_count_key(kind))
+    if count is None:
+        _, queryset = KINDS[kind]
+        count = queryset().count()
+        cache.set(_doc_count_key(kind), count, DOC_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def search(query, kinds, limit, after=None):
+    """Страница результатов [(тип, id, балл)] по убыванию балла и признак следующей страницы.
+
+    after - (балл, тип, id) последнего результата предыдущей страницы."""
+    terms = set(analyze(query))
+    if not terms:
+        return [], False
+
+    # Документная частота термов - одним запросом по индексу
+    frequencies = Posting.objects.filter(kind__in=kinds, term__in=terms).values_list('kind', 'term').annotate(
+        df=Count('id')
+    )
+    weights = [
+        When(kind=kind, term=term, then=Value(math.log(1 + max(document_count(kind), df) / df)))
+        for kind, term, df in frequencies
+    ]
+    if not weights:
+        return [], False
+
+    rows = Posting.objects.filter(kind__in=kinds, term__in=terms).values('kind', 'object_id').annotate(
+        score=Sum(F('weight') * Case(*weights, default=Value(0.0), output_field=FloatField()))
+    )
+    if after is not None:
+        score, kind, object_id = after
+        rows = rows.filter(
+            Q(score__lt=score) | Q(score=score, kind__gt=kind) | Q(score=score, kind=kind, object_id__gt=object_id)
+        )
+    page = list(rows.order_by('-score', 'kind', 'object_id')[:limit + 1])
+    return [(row['kind'], row['object_id'], row['score']) for row in page[:limit]], len(page) > limit
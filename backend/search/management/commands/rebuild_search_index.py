@@ -0,0 +1,19 @@
+# search/management/commands/rebuild_search_index.py
+import time
+from django.core.management.base import BaseCommand
+from search import index
+
+
+class Command(BaseCommand):
+    help = 'Перестроить поисковый индекс (после загрузки данных в обход сигналов, например bulk_create)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=sorted(index.KINDS),
+                            help='Только указанные типы объектов (можно несколько раз)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = index.rebuild(options['kind'])
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Индекс перестроен за {time.perf_counter() - started:.1f} с'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('subject', 'Предмет'), ('session', 'Учебная сессия')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('weight', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'kind', 'object_id', 'weight'], name='posting_term_idx')],
+                'constraints': [models.UniqueConstraint(fields=('object_id', 'kind', 'term'), name='posting_unique_term')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# search/models.py
+from django.db import models
+
+
+class Posting(models.Model):
+    """Запись инвертированного индекса: терм встречается в объекте kind/object_id с весом weight"""
+    KIND_CHOICES = [
+        ('user', 'Пользователь'),
+        ('subject', 'Предмет'),
+        ('session', 'Учебная сессия'),
+    ]
+
+    term = models.CharField(max_length=64)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # Он же индекс для удаления записей объекта при переиндексации. object_id первым:
+            # с порядком (kind, object_id) SQLite выбирает этот индекс для GROUP BY поиска
+            # и просматривает все записи типа вместо записей искомых термов
+            models.UniqueConstraint(fields=['object_id', 'kind', 'term'], name='posting_unique_term'),
+        ]
+        indexes = [
+            # Поиск: все записи терма нужного типа читаются из индекса, без обращения к таблице
+            models.Index(fields=['term', 'kind', 'object_id', 'weight'], name='posting_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind}:{self.object_id}"
@@ -0,0 +1,49 @@
+# search/signals.py
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from matching.models import Subject, UserSubject
+from study_sessions.models import StudySession
+from users.models import UserProfile, University
+from . import index
+
+
+# Переиндексация идет после коммита (index.schedule), по одному разу на объект в транзакции
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    index.schedule('user', [instance.pk])
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=UserSubject)
+@receiver(post_delete, sender=UserSubject)
+def user_data_changed(sender, instance, **kwargs):
+    index.schedule('user', [instance.user_id])
+
+
+@receiver(post_save, sender=Subject)
+def subject_saved(sender, instance, created, **kwargs):
+    index.schedule('subject', [instance.pk])
+    if not created:
+        # Название предмета входит в документы изучающих его пользователей
+        index.schedule('user', UserSubject.objects.filter(subject_id=instance.pk).values_list('user_id', flat=True))
+
+
+@receiver(post_delete, sender=Subject)
+def subject_deleted(sender, instance, **kwargs):
+    index.schedule('subject', [instance.pk])
+
+
+@receiver(post_save, sender=University)
+def university_saved(sender, instance, created, **kwargs):
+    if not created:
+        index.schedule('user', UserProfile.objects.filter(university_id=instance.pk).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=StudySession)
+@receiver(post_delete, sender=StudySession)
+def session_changed(sender, instance, **kwargs):
+    index.schedule('session', [instance.pk])
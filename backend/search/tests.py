@@ -0,0 +1,112 @@
+# search/tests.py
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from matching.models import Subject, UserSubject
+from study_sessions.models import StudySession
+from studymatch.testing import QueryPlanAssertionsMixin, TestCase
+from users.models import UserProfile
+from .models import Posting
+from .text import analyze, stem
+
+
+class AnalyzerTestCase(SimpleTestCase):
+    """Нормализация и стемминг русского текста"""
+
+    def test_stem(self):
+        for word, expected in [
+            ('математика', 'математик'), ('математику', 'математик'), ('программирования', 'программирован'),
+            ('студентов', 'студент'), ('вероятность', 'вероятн'), ('красивейший', 'красив'), ('изучаю', 'изуча'),
+        ]:
+            self.assertEqual(stem(word), expected)
+
+    def test_analyze(self):
+        self.assertEqual(
+            analyze('Ищу партнёра по Высшей математике и CS101!'),
+            ['ищ', 'партнер', 'высш', 'математик', 'cs101']
+        )
+
+
+class SearchTestCase(QueryPlanAssertionsMixin, TestCase):
+    """Инвертированный индекс: обновление сигналами, ранжирование и страницы"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject = Subject.objects.create(name='Математика', code='MATH', description='Высшая математика')
+            self.user = self.make_user('searcher', 'Люблю историю')
+            self.mathematician = self.make_user('gauss', 'Изучаю математику и статистику', self.subject)
+            self.others = [self.make_user(f'student{i}', 'Готовлюсь к экзамену по математике') for i in range(6)]
+            self.session = StudySession.objects.create(
+                title='Разбор задач по математике', created_by=self.user,
+                scheduled_time=timezone.now() + timedelta(days=1)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_user(self, username, bio, subject=None):
+        user = User.objects.create(username=username)
+        UserProfile.objects.create(user=user, faculty='ИТ', bio=bio)
+        if subject is not None:
+            UserSubject.objects.create(user=user, subject=subject)
+        return user
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_results(self):
+        data = self.search(q='математики')
+        found = [(item['type'], item['object']['id']) for item in data['results']]
+        # Название предмета весит больше описания, предмет в профиле - больше упоминания в био
+        self.assertEqual(found[0], ('subject', self.subject.id))
+        self.assertLess(found.index(('user', self.mathematician.id)), found.index(('user', self.others[0].id)))
+        self.assertIn(('session', self.session.id), found)
+        self.assertNotIn(('user', self.user.id), found)
+
+        data = self.search(q='статистикой', type='user')
+        self.assertEqual([item['object']['username'] for item in data['results']], ['gauss'])
+        self.assertEqual(self.search(q='квантовая')['results'], [])
+
+    def test_pages(self):
+        first = self.search(q='математика', type='user', limit=4)
+        self.assertEqual(len(first['results']), 4)
+        second = self.search(q='математика', type='user', limit=4, cursor=first['next_cursor'])
+        self.assertIsNone(second['next_cursor'])
+        ids = [item['object']['id'] for item in first['results'] + second['results']]
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_index_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.filter(user=self.user).update(bio='')
+            profile = self.user.profile
+            profile.bio = 'Интересуюсь философией'
+            profile.save()
+            self.session.is_active = False
+            self.session.save()
+            self.subject.name = 'Алгебра'
+            self.subject.save()
+        self.assertEqual([item['object']['id'] for item in self.search(q='философия')['results']], [self.user.id])
+        self.assertEqual(self.search(q='разбор задач', type='session')['results'], [])
+        self.assertEqual([item['object']['id'] for item in self.search(q='алгебра', type='user')['results']],
+                         [self.mathematician.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mathematician.delete()
+        self.assertFalse(Posting.objects.filter(kind='user', object_id=self.mathematician.id).exists())
+
+    def test_bad_params(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'type': 'chat'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'cursor': 'bad'}).status_code, 400)
+
+    def test_query_plan(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/search/', {'q': 'математика статистика'}),
+                               # Число объектов для IDF считается раз в DOC_COUNT_CACHE_TIMEOUT
+                               allowed_tables={'auth_user', 'matching_subject', 'study_sessions_studysession'})
+        self.assertNoFullScans(lambda: self.client.get('/api/search/', {'q': 'математика статистика'}))
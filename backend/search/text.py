@@ -0,0 +1,126 @@
+# search/text.py
+import re
+
+# Разбор текста для поиска: нормализация (регистр, ё -> е), токены, стоп-слова
+# и стемминг русских слов по алгоритму Snowball (Портера) для русского языка.
+# Латиница и цифры (коды предметов, ники) остаются как есть, без стемминга.
+
+TOKEN_RE = re.compile(r'[0-9a-zа-я]+')
+CYRILLIC_RE = re.compile(r'[а-я]')
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset('''
+    и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне
+    было вот от меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до
+    вас нибудь опять уж вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя
+    их чем была сам чтоб без будто чего раз тоже себе под будет ж тогда кто этот того потому этого
+    какой совсем ним здесь этом один почти мой тем чтобы нее сейчас были куда зачем всех никогда можно
+    при наконец два об другой хоть после над больше тот через эти нас про всего них какая много разве
+    три эту моя впрочем хорошо свою этой перед иногда лучше чуть том нельзя такой им более всегда
+    конечно всю между the a an and or of to in for on with is are
+'''.split())
+
+VOWELS = 'аеиоуыэюя'
+
+# Окончания по группам алгоритма; окончания "после а/я" требуют перед собой а или я
+PERFECTIVE_GERUND = (('в', 'вши', 'вшись'), ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'))
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'
+))
+PARTICIPLE = (('ем', 'нн', 'вш', 'ющ', 'щ'), ('ивш', 'ывш', 'ующ'))
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+     'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю')
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий', 'й',
+    'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я'
+))
+DERIVATIONAL = ('ость', 'ост')
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def _after_vowel_consonant(word, start):
+    """Начало области после первой пары "гласная, согласная" начиная с start"""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _remove_ending(word, groups):
+    """Отрезать самое длинное окончание из групп; None, если ничего не подошло.
+
+    Как в Snowball, условие "после а/я" проверяется только для найденного самого
+    длинного окончания - более короткие после неудачи не пробуются."""
+    conditional, plain = groups
+    best = max((ending for ending in conditional + plain if word.endswith(ending)), key=len, default=None)
+    if best is None:
+        return None
+    stem = word[:-len(best)]
+    if best in conditional and best not in plain and not (stem and stem[-1] in 'ая'):
+        return None
+    return stem
+
+
+def stem(word):
+    """Основа русского слова (Snowball); слово должно быть нормализовано"""
+    rv_start = next((i + 1 for i, char in enumerate(word) if char in VOWELS), len(word))
+    r2_start = _after_vowel_consonant(word, _after_vowel_consonant(word, 0) - 1)
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1: деепричастие, иначе возвратная частица и прилагательное/глагол/существительное
+    removed = _remove_ending(rv, PERFECTIVE_GERUND)
+    if removed is not None:
+        rv = removed
+    else:
+        rv = _remove_ending(rv, REFLEXIVE) if rv.endswith(REFLEXIVE[1]) else rv
+        adjective = _remove_ending(rv, ADJECTIVE)
+        if adjective is not None:
+            participle = _remove_ending(adjective, PARTICIPLE)
+            rv = adjective if participle is None else participle
+        else:
+            for groups in (VERB, NOUN):
+                removed = _remove_ending(rv, groups)
+                if removed is not None:
+                    rv = removed
+                    break
+
+    # Шаг 2: конечная "и"
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and len(prefix) + len(rv) - len(ending) >= r2_start:
+            rv = rv[:-len(ending)]
+            break
+
+    # Шаг 4: превосходная степень, двойная "н", мягкий знак
+    superlative = next((ending for ending in ('ейше', 'ейш') if rv.endswith(ending)), None)
+    if superlative:
+        rv = rv[:-len(superlative)]
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif rv.endswith('ь') and not superlative:
+        rv = rv[:-1]
+
+    return prefix + rv
+
+
+def analyze(text):
+    """Термы текста в порядке появления (с повторами)"""
+    terms = []
+    for token in TOKEN_RE.findall(normalize(text or '')):
+        if token in STOP_WORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        if CYRILLIC_RE.search(token):
+            token = stem(token)
+        terms.append(token[:MAX_TERM_LENGTH])
+    return terms
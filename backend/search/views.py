@@ -0,0 +1,101 @@
+# search/views.py
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from django.contrib.auth.models import User
+from matching.models import Subject
+from study_sessions.models import StudySession
+from studymatch.cursors import encode_cursor, decode_cursor
+from studymatch.payloads import format_datetime, profile_payload, PROFILE_FIELDS
+from . import index
+
+# Размер страницы результатов по умолчанию и максимальный
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_QUERY_LENGTH = 200
+
+
+def _user_objects(ids):
+    rows = User.objects.filter(id__in=ids).values(*PROFILE_FIELDS)
+    return {row['id']: profile_payload(row, '') for row in rows}
+
+
+def _subject_objects(ids):
+    return {row['id']: row for row in Subject.objects.filter(id__in=ids).values('id', 'name', 'code', 'description')}
+
+
+def _session_objects(ids):
+    rows = StudySession.objects.filter(id__in=ids).values(
+        'id', 'title', 'subject_name', 'scheduled_time', 'duration_minutes', 'max_participants', 'seats_taken'
+    )
+    return {
+        row['id']: {
+            'id': row['id'],
+            'title': row['title'],
+            'subject_name': row['subject_name'],
+            'scheduled_time': format_datetime(row['scheduled_time']),
+            'duration_minutes': row['duration_minutes'],
+            'available_slots': max(row['max_participants'] - row['seats_taken'], 0),
+        }
+        for row in rows
+    }
+
+
+OBJECT_LOADERS = {'user': _user_objects, 'subject': _subject_objects, 'session': _session_objects}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """Поиск пользователей, предметов и учебных сессий по словам, ранжированный по релевантности.
+
+    ?q=<запрос>, ?type=user,subject,session (по умолчанию все), ?limit=, ?cursor=<next_cursor>.
+    Слова приводятся к основе, так что "математику" находит "Математика"."""
+    query = request.query_params.get('q', '').strip()
+    if not query or len(query) > MAX_QUERY_LENGTH:
+        return Response({'error': f'Параметр q обязателен, не длиннее {MAX_QUERY_LENGTH} символов'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    kinds = request.query_params.get('type')
+    kinds = sorted(set(kinds.split(','))) if kinds else sorted(index.KINDS)
+    if not set(kinds) <= set(index.KINDS):
+        return Response({'error': 'Неверный параметр type'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = min(int(request.query_params.get('limit', SEARCH_PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'Неверный параметр limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+    after = None
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            after_score, after_kind, after_id = decode_cursor(cursor, 3)
+            after = (float(after_score), str(after_kind), int(after_id))
+        except (TypeError, ValueError):
+            return Response({'error': 'Неверный курсор'}, status=status.HTTP_400_BAD_REQUEST)
+
+    hits, has_more = index.search(query, kinds, limit, after)
+
+    # Объекты страницы - одним запросом на тип
+    ids_by_kind = {}
+    for kind, object_id, _ in hits:
+        ids_by_kind.setdefault(kind, []).append(object_id)
+    objects = {kind: OBJECT_LOADERS[kind](ids) for kind, ids in ids_by_kind.items()}
+
+    results = []
+    for kind, object_id, score in hits:
+        payload = objects[kind].get(object_id)
+        if payload is None:
+            # Объект удален, а индекс еще не обновлен, или у пользователя нет профиля
+            continue
+        results.append({'type': kind, 'score': round(score, 4), 'object': payload})
+
+    next_cursor = None
+    if has_more:
+        last_kind, last_id, last_score = hits[-1]
+        next_cursor = encode_cursor(last_score, last_kind, last_id)
+    return Response({'results': results, 'next_cursor': next_cursor})
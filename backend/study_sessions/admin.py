@@ -1,10 +1,10 @@
 # study_sessions/admin.py
 from django.contrib import admin
-from .models import StudySession, SessionParticipant
+from .models import StudySession, SessionParticipant, WaitlistEntry
 
 @admin.register(StudySession)
 class StudySessionAdmin(admin.ModelAdmin):
-    list_display = ['title', 'subject_name', 'created_by', 'scheduled_time', 'max_participants', 'is_active']
+    list_display = ['title', 'subject_name', 'created_by', 'scheduled_time', 'max_participants', 'seats_taken', 'is_active']
     list_filter = ['is_active', 'scheduled_time']
     search_fields = ['title', 'description', 'created_by__username']
 
@@ -12,4 +12,9 @@ class StudySessionAdmin(admin.ModelAdmin):
 class SessionParticipantAdmin(admin.ModelAdmin):
     list_display = ['user', 'session', 'joined_at', 'is_active']
     list_filter = ['is_active', 'joined_at']
+    search_fields = ['user__username', 'session__title']
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'session', 'created_at']
     search_fields = ['user__username', 'session__title']
\ No newline at end of file
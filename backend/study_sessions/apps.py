@@ -5,3 +5,7 @@ from django.apps import AppConfig
 class StudySessionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'study_sessions'
+
+    def ready(self):
+        # Подключаем сигналы, сбрасывающие кэш ленты ближайших сессий
+        from . import signals  # noqa: F401
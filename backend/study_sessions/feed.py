@@ -0,0 +1,63 @@
+# study_sessions/feed.py
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from .models import StudySession
+
+# Лента "ближайшие N часов": кэшируется целиком, сбрасывается сменой версии
+UPCOMING_VERSION_KEY = 'study_sessions:upcoming:version'
+UPCOMING_CACHE_TIMEOUT = 60
+UPCOMING_MAX_HOURS = 168
+UPCOMING_MAX_ITEMS = 100
+
+UPCOMING_FIELDS = ('id', 'title', 'subject_name', 'scheduled_time', 'duration_minutes', 'max_participants', 'seats_taken')
+
+
+def _version():
+    version = cache.get(UPCOMING_VERSION_KEY)
+    if version is None:
+        # add не перезапишет версию, успевшую появиться из другого процесса
+        cache.add(UPCOMING_VERSION_KEY, 1, timeout=None)
+        version = cache.get(UPCOMING_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_upcoming():
+    """Сбросить все закэшированные ленты (создание, удаление, вход и выход из сессии)"""
+    try:
+        cache.incr(UPCOMING_VERSION_KEY)
+    except ValueError:
+        cache.add(UPCOMING_VERSION_KEY, 1, timeout=None)
+
+
+def upcoming_sessions(hours):
+    """Активные сессии, начинающиеся в ближайшие hours часов, в порядке начала.
+
+    В кэше хранится окно с запасом на время жизни записи, поэтому при чтении
+    его достаточно отфильтровать по текущему времени, не обращаясь к базе.
+    """
+    key = f'study_sessions:upcoming:{_version()}:{hours}'
+    rows = cache.get(key)
+    if rows is None:
+        now = timezone.now()
+        rows = list(StudySession.objects.filter(
+            is_active=True,
+            scheduled_time__gte=now,
+            scheduled_time__lte=now + timedelta(hours=hours, seconds=UPCOMING_CACHE_TIMEOUT)
+        ).order_by('scheduled_time', 'id').values(*UPCOMING_FIELDS)[:UPCOMING_MAX_ITEMS])
+        cache.set(key, rows, UPCOMING_CACHE_TIMEOUT)
+
+    now = timezone.now()
+    until = now + timedelta(hours=hours)
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'subject_name': row['subject_name'],
+            'scheduled_time': row['scheduled_time'],
+            'duration_minutes': row['duration_minutes'],
+            'available_slots': row['max_participants'] - row['seats_taken'],
+        }
+        for row in rows
+        if now <= row['scheduled_time'] <= until
+    ]
@@ -0,0 +1,74 @@
+# study_sessions/management/commands/bench_join_session.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from studymatch.benchmarks import isolated_database, percentile, Timer
+from study_sessions.models import StudySession, SessionParticipant, WaitlistEntry
+
+
+class Command(BaseCommand):
+    help = 'Параллельные присоединения к одной сессии: проверка отсутствия переполнения и пропускная способность'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300, help='Сколько пользователей присоединяются')
+        parser.add_argument('--seats', type=int, default=20, help='max_participants сессии')
+        parser.add_argument('--workers', type=int, default=16, help='Размер пула потоков')
+
+    def handle(self, *args, **options):
+        if options['seats'] < 1 or options['users'] < 1:
+            raise CommandError('--users и --seats должны быть положительными')
+        with isolated_database():
+            self.run(options['users'], options['seats'], options['workers'])
+
+    def join(self, user, session_id):
+        try:
+            client = APIClient()
+            client.force_authenticate(user)
+            with Timer() as timer:
+                code = client.post(f'/api/study-sessions/join/{session_id}/').status_code
+            return code, timer.elapsed
+        finally:
+            connection.close()
+
+    def run(self, users_count, seats, workers):
+        creator = User.objects.create(username='bench_creator')
+        users = User.objects.bulk_create(User(username=f'bench_{i}') for i in range(users_count))
+        session = StudySession.objects.create(
+            title='Популярная сессия', created_by=creator,
+            scheduled_time=timezone.now() + timedelta(days=1),
+            max_participants=seats + 1, seats_taken=1
+        )
+        SessionParticipant.objects.create(session=session, user=creator)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor, Timer() as total:
+            results = list(executor.map(lambda user: self.join(user, session.id), users))
+
+        codes = [code for code, _ in results]
+        latencies = [elapsed * 1000 for _, elapsed in results]
+        session.refresh_from_db()
+        participants = SessionParticipant.objects.filter(session=session).count()
+        waitlisted = WaitlistEntry.objects.filter(session=session).count()
+
+        self.stdout.write(f'Запросов: {users_count}, потоков: {workers}, мест: {seats}')
+        self.stdout.write(f'201 joined: {codes.count(201)}, 202 waitlisted: {codes.count(202)}, '
+                          f'прочие: {len(codes) - codes.count(201) - codes.count(202)}')
+        self.stdout.write(f'Пропускная способность: {users_count / total.elapsed:.1f} запросов/с')
+        self.stdout.write(f'Задержка, мс: p50={percentile(latencies, 0.5):.1f} '
+                          f'p95={percentile(latencies, 0.95):.1f} p99={percentile(latencies, 0.99):.1f}')
+
+        problems = []
+        if participants > session.max_participants:
+            problems.append(f'переполнение: {participants} участников при лимите {session.max_participants}')
+        if participants != session.seats_taken:
+            problems.append(f'счетчик seats_taken={session.seats_taken}, участников {participants}')
+        if participants + waitlisted != users_count + 1:
+            problems.append(f'потеряны запросы: участников {participants}, в очереди {waitlisted}')
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(
+            f'OK: {participants} участников из {session.max_participants}, в очереди ожидания {waitlisted}'
+        ))
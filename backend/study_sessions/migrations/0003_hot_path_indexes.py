@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_sessions', '0002_rename_creator_studysession_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sessionparticipant',
+            index=models.Index(fields=['session', 'is_active'], name='participant_session_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionparticipant',
+            index=models.Index(fields=['user', 'is_active'], name='participant_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['scheduled_time'], name='session_active_time_idx'),
+        ),
+    ]
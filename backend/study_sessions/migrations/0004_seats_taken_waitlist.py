@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_seats_taken(apps, schema_editor):
+    """Посчитать занятые места существующих сессий по активным участникам"""
+    StudySession = apps.get_model('study_sessions', 'StudySession')
+    SessionParticipant = apps.get_model('study_sessions', 'SessionParticipant')
+    active_counts = SessionParticipant.objects.filter(
+        session=OuterRef('pk'), is_active=True
+    ).values('session').annotate(count=Count('pk')).values('count')
+    StudySession.objects.update(seats_taken=Coalesce(Subquery(active_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_sessions', '0003_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studysession',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_seats_taken, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='study_sessions.studysession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'unique_together': {('session', 'user')},
+            },
+        ),
+    ]
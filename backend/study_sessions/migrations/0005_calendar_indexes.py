@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_sessions', '0004_seats_taken_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='studysession',
+            name='session_active_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['scheduled_time', 'id'], name='session_active_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subject_name', 'scheduled_time', 'id'], name='session_subject_time_idx'),
+        ),
+    ]
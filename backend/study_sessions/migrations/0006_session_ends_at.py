@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:33
+
+from django.conf import settings
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def backfill_ends_at(apps, schema_editor):
+    """Заполнить время окончания существующих сессий"""
+    StudySession = apps.get_model('study_sessions', 'StudySession')
+    batch = []
+    for session in StudySession.objects.only('id', 'scheduled_time', 'duration_minutes').iterator(chunk_size=1000):
+        session.ends_at = session.scheduled_time + timedelta(minutes=session.duration_minutes)
+        batch.append(session)
+        if len(batch) >= 1000:
+            StudySession.objects.bulk_update(batch, ['ends_at'])
+            batch = []
+    StudySession.objects.bulk_update(batch, ['ends_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_sessions', '0005_calendar_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studysession',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_ends_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_by', 'ends_at'], name='session_creator_ends_idx'),
+        ),
+    ]
@@ -1,6 +1,27 @@
 # study_sessions/models.py
+from datetime import timedelta
 from django.db import models
+from django.db.models import Count, Prefetch, Q
 from django.contrib.auth.models import User
+from studymatch.payloads import SESSION_VALUES
+
+
+class StudySessionQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Все данные для StudySessionSerializer фиксированным числом запросов:
+        счетчик участников аннотацией, создатель и участники с профилями - пакетно"""
+        return self.with_participants_count().select_related('created_by__profile').prefetch_related(
+            Prefetch('participants', queryset=SessionParticipant.objects.select_related('user__profile').order_by('id'))
+        )
+
+    def with_participants_count(self):
+        return self.annotate(
+            active_participants_count=Count('participants', filter=Q(participants__is_active=True))
+        )
+
+    def listing_rows(self):
+        """Строки .values() для быстрого пути списков (study_sessions.serializers.session_list_data)"""
+        return self.with_participants_count().values(*SESSION_VALUES)
 
 
 class StudySession(models.Model):
@@ -12,15 +33,45 @@ class StudySession(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_sessions')
     scheduled_time = models.DateTimeField()
     duration_minutes = models.IntegerField(default=60)
+    # Время окончания (scheduled_time + duration_minutes) для поиска пересечений, заполняется в save()
+    ends_at = models.DateTimeField(null=True, editable=False)
     max_participants = models.IntegerField(default=4)
+    # Занятые места - меняется только условным UPDATE в study_sessions/seats.py
+    seats_taken = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = StudySessionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Лента и календарь предстоящих сессий: активные, по ключу курсора (время начала, id)
+            models.Index(fields=['scheduled_time', 'id'], condition=models.Q(is_active=True), name='session_active_time_idx'),
+            # Календарь с фильтром по предмету
+            models.Index(
+                fields=['subject_name', 'scheduled_time', 'id'], condition=models.Q(is_active=True),
+                name='session_subject_time_idx'
+            ),
+            # Пересечения по расписанию среди созданных пользователем сессий
+            models.Index(fields=['created_by', 'ends_at'], condition=models.Q(is_active=True), name='session_creator_ends_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.scheduled_time}"
 
+    def save(self, *args, **kwargs):
+        self.ends_at = self.scheduled_time + timedelta(minutes=self.duration_minutes)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'scheduled_time', 'duration_minutes'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'ends_at'}
+        super().save(*args, **kwargs)
+
     @property
     def current_participants_count(self):
+        # Значение из аннотации for_listing(), если сессия загружена через нее
+        annotated = getattr(self, 'active_participants_count', None)
+        if annotated is not None:
+            return annotated
         return self.participants.filter(is_active=True).count()
 
     @property
@@ -37,6 +88,25 @@ class SessionParticipant(models.Model):
 
     class Meta:
         unique_together = ['session', 'user']
+        indexes = [
+            # Подсчет участников сессии и сессии пользователя - только активные записи
+            models.Index(fields=['session', 'is_active'], name='participant_session_active_idx'),
+            models.Index(fields=['user', 'is_active'], name='participant_user_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} in {self.session.title}"
+
+
+class WaitlistEntry(models.Model):
+    """Очередь ожидания места в заполненной сессии"""
+    session = models.ForeignKey(StudySession, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['session', 'user']
+        ordering = ['created_at', 'id']
 
     def __str__(self):
-        return f"{self.user.username} in {self.session.title}"
\ No newline at end of file
+        return f"{self.user.username} waiting for {self.session.title}"
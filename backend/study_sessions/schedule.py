@@ -0,0 +1,34 @@
+# study_sessions/schedule.py
+from datetime import timedelta
+from django.db.models import Q
+from .models import StudySession, SessionParticipant
+
+# Сколько пересекающихся сессий возвращать клиенту
+MAX_REPORTED_CONFLICTS = 10
+
+
+def find_conflicts(user, scheduled_time, duration_minutes, exclude_session_id=None):
+    """Активные сессии пользователя (созданные или где он участник), пересекающиеся
+    с интервалом [scheduled_time, scheduled_time + duration_minutes).
+
+    Один запрос: интервалы пересекаются, если каждый начинается раньше конца другого.
+    Сессии пользователя выбираются по индексам (created_by, ends_at) и (user, is_active),
+    поэтому стоимость не зависит от общего числа сессий.
+    """
+    ends_at = scheduled_time + timedelta(minutes=duration_minutes)
+    participant_session_ids = SessionParticipant.objects.filter(
+        user_id=user.id,
+        is_active=True
+    ).values('session_id')
+    conflicts = StudySession.objects.filter(
+        Q(created_by_id=user.id) | Q(id__in=participant_session_ids),
+        is_active=True,
+        scheduled_time__lt=ends_at,
+        ends_at__gt=scheduled_time
+    )
+    if exclude_session_id is not None:
+        conflicts = conflicts.exclude(pk=exclude_session_id)
+    return list(
+        conflicts.order_by('scheduled_time', 'id')
+        .values('id', 'title', 'scheduled_time', 'ends_at')[:MAX_REPORTED_CONFLICTS]
+    )
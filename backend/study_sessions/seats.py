@@ -0,0 +1,80 @@
+# study_sessions/seats.py
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import StudySession, SessionParticipant, WaitlistEntry
+from .schedule import find_conflicts
+
+
+class AlreadyJoined(Exception):
+    """Пользователь уже участник (или в очереди) этой сессии"""
+
+
+def _take_seat(session_id):
+    """Занять место условным UPDATE: True, если свободное место было.
+
+    Проверка и инкремент - одна операция в базе, поэтому параллельные
+    присоединения не могут превысить max_participants.
+    """
+    return StudySession.objects.filter(
+        pk=session_id,
+        is_active=True,
+        seats_taken__lt=F('max_participants')
+    ).update(seats_taken=F('seats_taken') + 1) == 1
+
+
+def reserve_seat(session, user):
+    """Присоединить пользователя к сессии или поставить в очередь ожидания.
+
+    Возвращает ('joined', None) или ('waitlisted', позиция в очереди).
+    Бросает AlreadyJoined при повторном присоединении.
+    """
+    if WaitlistEntry.objects.filter(session=session, user_id=user.id).exists():
+        raise AlreadyJoined()
+    try:
+        with transaction.atomic():
+            if _take_seat(session.pk):
+                # Уникальность (session, user) откатит и занятое место при повторе
+                SessionParticipant.objects.create(session=session, user_id=user.id)
+                return 'joined', None
+            if SessionParticipant.objects.filter(session=session, user_id=user.id).exists():
+                raise AlreadyJoined()
+            entry = WaitlistEntry.objects.create(session=session, user_id=user.id)
+            position = WaitlistEntry.objects.filter(session=session, id__lte=entry.id).count()
+            return 'waitlisted', position
+    except IntegrityError:
+        raise AlreadyJoined()
+
+
+def release_seat(participant):
+    """Освободить место участника и отдать его первым в очереди ожидания"""
+    with transaction.atomic():
+        deleted, _ = SessionParticipant.objects.filter(pk=participant.pk, is_active=True).delete()
+        if not deleted:
+            return []
+        StudySession.objects.filter(pk=participant.session_id).update(seats_taken=F('seats_taken') - 1)
+        return promote_waitlist(participant.session_id)
+
+
+def promote_waitlist(session_id):
+    """Перевести ожидающих в участники, пока есть свободные места; возвращает id переведенных.
+
+    Пока пользователь ждал, он мог записаться на пересекающуюся сессию: очередь не видна
+    find_conflicts, поэтому пересечения проверяются заново при переводе. Такие ожидающие
+    пропускаются и остаются в очереди - место получает следующий.
+    """
+    promoted = []
+    with transaction.atomic():
+        session = StudySession.objects.filter(pk=session_id).only('scheduled_time', 'duration_minutes').first()
+        if session is None:
+            return promoted
+        entries = WaitlistEntry.objects.select_for_update(of=('self',)).select_related('user').filter(session_id=session_id)
+        for entry in entries:
+            if find_conflicts(entry.user, session.scheduled_time, session.duration_minutes,
+                              exclude_session_id=session_id):
+                continue
+            if not _take_seat(session_id):
+                break
+            SessionParticipant.objects.create(session_id=session_id, user_id=entry.user_id)
+            entry.delete()
+            promoted.append(entry.user_id)
+    return promoted
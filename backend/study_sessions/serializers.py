@@ -1,26 +1,11 @@
 # study_sessions/serializers.py
+from collections import defaultdict
 from rest_framework import serializers
+from studymatch.payloads import session_payload, PARTICIPANT_VALUES
+from users.serializers import simple_profile
 from .models import StudySession, SessionParticipant
 
 
-class SimpleProfileSerializer(serializers.Serializer):
-    """Упрощенный сериализатор профиля"""
-    id = serializers.IntegerField(source='user.id')
-    username = serializers.CharField(source='user.username')
-    first_name = serializers.CharField(source='user.first_name')
-    last_name = serializers.CharField(source='user.last_name')
-    faculty = serializers.CharField()
-    year_of_study = serializers.IntegerField()
-    bio = serializers.CharField()
-
-
-class SimpleSubjectSerializer(serializers.Serializer):
-    """Упрощенный сериализатор предмета"""
-    id = serializers.IntegerField()
-    name = serializers.CharField()
-    code = serializers.CharField()
-
-
 class SessionParticipantSerializer(serializers.ModelSerializer):
     user_profile = serializers.SerializerMethodField()
 
@@ -29,23 +14,21 @@ class SessionParticipantSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'user_profile', 'joined_at', 'is_active']
 
     def get_user_profile(self, obj):
-        try:
-            return SimpleProfileSerializer(obj.user.profile).data
-        except:
-            return None
+        return simple_profile(obj.user)
 
 
 class StudySessionSerializer(serializers.ModelSerializer):
+    """Сессия для списков; счетчики и участники берутся из StudySession.objects.for_listing()"""
     subject_info = serializers.SerializerMethodField()
     created_by_profile = serializers.SerializerMethodField()
     participants_count = serializers.ReadOnlyField(source='current_participants_count')
-    available_slots = serializers.ReadOnlyField(source='available_slots')
+    available_slots = serializers.ReadOnlyField()
     participants = SessionParticipantSerializer(many=True, read_only=True)
 
     class Meta:
         model = StudySession
         fields = [
-            'id', 'title', 'description', 'subject', 'subject_info',
+            'id', 'title', 'description', 'subject_name', 'subject_info',
             'created_by', 'created_by_profile', 'scheduled_time',
             'duration_minutes', 'max_participants', 'participants_count',
             'available_slots', 'participants', 'is_active', 'created_at'
@@ -53,21 +36,34 @@ class StudySessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at']
 
     def get_subject_info(self, obj):
-        if obj.subject:
-            return SimpleSubjectSerializer(obj.subject).data
+        # Предмет хранится в сессии только названием (subject_name)
+        if obj.subject_name:
+            return {'name': obj.subject_name}
         return None
 
     def get_created_by_profile(self, obj):
-        try:
-            return SimpleProfileSerializer(obj.created_by.profile).data
-        except:
-            return None
+        return simple_profile(obj.created_by)
 
 
 class CreateStudySessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = StudySession
         fields = [
-            'title', 'description', 'subject', 'scheduled_time',
+            'title', 'description', 'subject_name', 'scheduled_time',
             'duration_minutes', 'max_participants'
-        ]
\ No newline at end of file
+        ]
+
+
+def session_list_data(rows):
+    """Быстрый путь списков: данные StudySessionSerializer из строк listing_rows().
+
+    Участники всех сессий страницы - одним запросом .values(), без моделей и сериализаторов.
+    """
+    rows = list(rows)
+    participants = defaultdict(list)
+    participant_rows = SessionParticipant.objects.filter(
+        session_id__in=[row['id'] for row in rows]
+    ).order_by('id').values(*PARTICIPANT_VALUES)
+    for participant in participant_rows:
+        participants[participant['session_id']].append(participant)
+    return [session_payload(row, participants[row['id']]) for row in rows]
@@ -0,0 +1,16 @@
+# study_sessions/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import StudySession, SessionParticipant
+from .feed import invalidate_upcoming
+
+
+# Ленту сбрасываем после коммита, чтобы не закэшировать состояние до записи
+
+@receiver(post_save, sender=StudySession)
+@receiver(post_delete, sender=StudySession)
+@receiver(post_save, sender=SessionParticipant)
+@receiver(post_delete, sender=SessionParticipant)
+def session_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_upcoming)
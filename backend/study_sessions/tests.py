@@ -1,4 +1,305 @@
 # study_sessions/tests.py
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from studymatch.testing import QueryPlanAssertionsMixin, TestCase, TransactionTestCase
+from users.models import UserProfile, University
+from .models import StudySession, SessionParticipant, WaitlistEntry
+from .schedule import find_conflicts
+from .seats import release_seat
+from .serializers import StudySessionSerializer
 
-# Create your tests here.
+
+class QueryPlanTestCase(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAIN запросов горячих путей учебных сессий на заполненной базе"""
+
+    def setUp(self):
+        users = [User.objects.create(username=f'user{i}') for i in range(10)]
+        for user in users:
+            UserProfile.objects.create(user=user)
+        self.user = users[0]
+        now = timezone.now()
+        self.sessions = []
+        for i in range(20):
+            session = StudySession.objects.create(
+                title=f'Сессия {i}', created_by=users[i % 10],
+                scheduled_time=now + timedelta(hours=i - 5), max_participants=5,
+                is_active=i % 4 != 0
+            )
+            SessionParticipant.objects.create(session=session, user=session.created_by)
+            self.sessions.append(session)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_upcoming_sessions(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/study-sessions/sessions/'))
+
+    def test_my_sessions(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/study-sessions/my-sessions/'))
+
+    def test_participant_count(self):
+        session = self.sessions[9]
+        self.assertNoFullScans(lambda: session.current_participants_count)
+
+    def test_calendar(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/study-sessions/calendar/', {'limit': 5}))
+        self.assertNoFullScans(lambda: self.client.get('/api/study-sessions/calendar/', {'subject': 'Физика'}))
+
+    def test_schedule_conflicts(self):
+        start = timezone.now() + timedelta(hours=2)
+        self.assertNoFullScans(lambda: find_conflicts(self.user, start, 90))
+
+    def test_join_and_leave(self):
+        session = self.sessions[9]
+        response = self.assertNoFullScans(lambda: self.client.post(f'/api/study-sessions/join/{session.id}/'))
+        self.assertEqual(response.status_code, 201)
+        self.assertNoFullScans(lambda: self.client.post(f'/api/study-sessions/leave/{session.id}/'))
+
+
+class SessionListingQueryCountTestCase(TestCase):
+    """Списки сессий: число запросов не зависит от числа сессий и участников"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='owner')
+        UserProfile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def populate(self, count):
+        start = timezone.now() + timedelta(days=1)
+        for i in range(count):
+            session = StudySession.objects.create(
+                title=f'Сессия {i}', created_by=self.user,
+                scheduled_time=start + timedelta(hours=i), max_participants=6
+            )
+            SessionParticipant.objects.create(session=session, user=self.user)
+            for j in range(3):
+                member = User.objects.create(username=f'member{i}_{j}')
+                UserProfile.objects.create(user=member)
+                SessionParticipant.objects.create(session=session, user=member, is_active=j != 2)
+
+    def test_listings(self):
+        self.populate(20)
+        # Сессии с аннотацией и создателем + участники с профилями
+        for url in ('/api/study-sessions/sessions/', '/api/study-sessions/my-sessions/'):
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(len(response.data), 20)
+            first = response.data[0]
+            self.assertEqual(first['participants_count'], 3)
+            self.assertEqual(first['available_slots'], 3)
+            self.assertEqual(len(first['participants']), 4)
+            self.assertEqual(first['created_by_profile']['username'], 'owner')
+
+    def test_fast_path_renders_like_serializer(self):
+        self.populate(3)
+        StudySession.objects.create(
+            title='Без профиля', subject_name='', created_by=User.objects.create(username='anon'),
+            scheduled_time=timezone.now() + timedelta(days=5)
+        )
+        response = self.client.get('/api/study-sessions/sessions/')
+        sessions = StudySession.objects.filter(is_active=True).for_listing().order_by('scheduled_time')
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(response.data), renderer.render(StudySessionSerializer(sessions, many=True).data))
+
+
+class SeatReservationTestCase(TransactionTestCase):
+    """Параллельные присоединения не переполняют сессию, освободившееся место получает очередь"""
+
+    SEATS = 5
+    USERS = 30
+
+    def join(self, user, session_id):
+        try:
+            client = APIClient()
+            client.force_authenticate(user)
+            return client.post(f'/api/study-sessions/join/{session_id}/').status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_joins_and_waitlist_promotion(self):
+        creator = User.objects.create(username='creator')
+        users = [User.objects.create(username=f'user{i}') for i in range(self.USERS)]
+        session = StudySession.objects.create(
+            title='Популярная сессия', created_by=creator,
+            scheduled_time=timezone.now() + timedelta(days=1),
+            max_participants=self.SEATS + 1, seats_taken=1
+        )
+        SessionParticipant.objects.create(session=session, user=creator)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            codes = list(executor.map(lambda user: self.join(user, session.id), users))
+
+        self.assertEqual(codes.count(201), self.SEATS)
+        self.assertEqual(codes.count(202), self.USERS - self.SEATS)
+        session.refresh_from_db()
+        self.assertEqual(session.seats_taken, self.SEATS + 1)
+        self.assertEqual(SessionParticipant.objects.filter(session=session).count(), self.SEATS + 1)
+
+        # Повторное присоединение - ошибка, а не второе место в очереди
+        self.assertEqual(self.join(WaitlistEntry.objects.first().user, session.id), 400)
+
+        first_waiting = WaitlistEntry.objects.filter(session=session).first().user
+        leaver = SessionParticipant.objects.filter(session=session).exclude(user=creator).first().user
+        client = APIClient()
+        client.force_authenticate(leaver)
+        self.assertEqual(client.post(f'/api/study-sessions/leave/{session.id}/').status_code, 200)
+
+        session.refresh_from_db()
+        self.assertEqual(session.seats_taken, self.SEATS + 1)
+        self.assertTrue(SessionParticipant.objects.filter(session=session, user=first_waiting).exists())
+        self.assertFalse(WaitlistEntry.objects.filter(user=first_waiting).exists())
+        self.assertEqual(WaitlistEntry.objects.filter(session=session).count(), self.USERS - self.SEATS - 1)
+
+
+class CalendarFeedTestCase(TestCase):
+    """Календарь с фильтрами и курсором, кэш ленты ближайших сессий"""
+
+    def setUp(self):
+        cache.clear()
+        self.university = University.objects.create(name='МГУ')
+        self.user = User.objects.create(username='owner')
+        UserProfile.objects.create(user=self.user, university=self.university)
+        self.other = User.objects.create(username='other')
+        UserProfile.objects.create(user=self.other)
+        now = timezone.now()
+        self.sessions = [
+            StudySession.objects.create(
+                title=f'Сессия {i}', created_by=self.user if i % 2 else self.other,
+                subject_name='Физика' if i % 3 == 0 else 'Химия',
+                scheduled_time=now + timedelta(hours=i + 1), max_participants=4, seats_taken=1
+            )
+            for i in range(12)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_calendar_pages_by_cursor(self):
+        seen = []
+        params = {'limit': 5}
+        while True:
+            response = self.client.get('/api/study-sessions/calendar/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.data['results']]
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+        self.assertEqual(seen, [session.id for session in self.sessions])
+
+    def test_calendar_filters(self):
+        window_end = (timezone.now() + timedelta(hours=6, minutes=30)).isoformat()
+        response = self.client.get('/api/study-sessions/calendar/', {'to': window_end})
+        self.assertEqual([item['id'] for item in response.data['results']], [s.id for s in self.sessions[:6]])
+
+        response = self.client.get('/api/study-sessions/calendar/', {'subject': 'Физика'})
+        self.assertEqual([item['id'] for item in response.data['results']], [s.id for s in self.sessions[::3]])
+
+        response = self.client.get('/api/study-sessions/calendar/', {'university': self.university.id})
+        self.assertEqual([item['id'] for item in response.data['results']], [s.id for s in self.sessions[1::2]])
+
+        response = self.client.get('/api/study-sessions/calendar/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_upcoming_feed_is_cached_and_invalidated(self):
+        response = self.client.get('/api/study-sessions/upcoming/', {'hours': 3})
+        self.assertEqual([item['id'] for item in response.data['results']], [s.id for s in self.sessions[:3]])
+        self.assertEqual(response.data['results'][0]['available_slots'], 3)
+        with self.assertNumQueries(0):
+            self.client.get('/api/study-sessions/upcoming/', {'hours': 3})
+
+        # Вход в сессию сбрасывает ленту - свободных мест становится меньше
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/study-sessions/join/{self.sessions[0].id}/')
+        response = self.client.get('/api/study-sessions/upcoming/', {'hours': 3})
+        self.assertEqual(response.data['results'][0]['available_slots'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/study-sessions/delete/{self.sessions[1].id}/')
+        response = self.client.get('/api/study-sessions/upcoming/', {'hours': 3})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.sessions[0].id, self.sessions[2].id])
+
+
+class ScheduleConflictTestCase(TestCase):
+    """Пересечения по времени при создании и присоединении"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='owner')
+        self.other = User.objects.create(username='other')
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        # Сотни сессий пользователя в прошлом и далеком будущем не мешают проверке
+        for i in range(200):
+            session = StudySession.objects.create(
+                title=f'Старая {i}', created_by=self.other,
+                scheduled_time=self.start + timedelta(days=2 + i), duration_minutes=60
+            )
+            SessionParticipant.objects.create(session=session, user=self.user)
+        self.busy = StudySession.objects.create(
+            title='Занят', created_by=self.user, scheduled_time=self.start, duration_minutes=90
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, offset_minutes, **extra):
+        return self.client.post('/api/study-sessions/create/', {
+            'title': 'Новая', 'scheduled_time': (self.start + timedelta(minutes=offset_minutes)).isoformat(),
+            'duration_minutes': 60, **extra
+        }, format='json')
+
+    def test_ends_at_follows_schedule(self):
+        self.assertEqual(self.busy.ends_at, self.start + timedelta(minutes=90))
+        self.busy.duration_minutes = 30
+        self.busy.save(update_fields=['duration_minutes'])
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.ends_at, self.start + timedelta(minutes=30))
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            conflicts = find_conflicts(self.user, self.start + timedelta(minutes=30), 60)
+        self.assertEqual([conflict['id'] for conflict in conflicts], [self.busy.id])
+
+    def test_create_rejects_overlap(self):
+        response = self.create(60)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['conflicts'][0]['id'], self.busy.id)
+
+        # Вплотную после окончания - не пересечение
+        self.assertEqual(self.create(90).status_code, 201)
+
+        response = self.create(60, ignore_conflicts=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['conflicts']), 2)
+
+    def test_join_rejects_overlap(self):
+        session = StudySession.objects.create(
+            title='Чужая', created_by=self.other, scheduled_time=self.start - timedelta(minutes=30)
+        )
+        response = self.client.post(f'/api/study-sessions/join/{session.id}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(SessionParticipant.objects.filter(session=session, user=self.user).exists())
+
+        response = self.client.post(f'/api/study-sessions/join/{session.id}/?ignore_conflicts=true')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['conflicts'][0]['id'], self.busy.id)
+
+    def test_waitlist_skips_overlapping_users(self):
+        session = StudySession.objects.create(
+            title='Полная', created_by=self.other, scheduled_time=self.start + timedelta(minutes=30),
+            max_participants=1, seats_taken=1
+        )
+        participant = SessionParticipant.objects.create(session=session, user=self.other)
+        late = User.objects.create(username='late')
+        # Пользователь ждет места, а потом уже занят в это время своей сессией busy
+        WaitlistEntry.objects.create(session=session, user=self.user)
+        WaitlistEntry.objects.create(session=session, user=late)
+
+        self.assertEqual(release_seat(participant), [late.id])
+        self.assertFalse(SessionParticipant.objects.filter(session=session, user=self.user).exists())
+        self.assertTrue(WaitlistEntry.objects.filter(session=session, user=self.user).exists())
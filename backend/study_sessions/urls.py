@@ -5,6 +5,8 @@ from . import views
 urlpatterns = [
     path('health/', views.health_check, name='health_check'),
     path('sessions/', views.get_sessions, name='get_sessions'),
+    path('calendar/', views.get_calendar, name='get_calendar'),
+    path('upcoming/', views.get_upcoming, name='get_upcoming'),
     path('my-sessions/', views.get_my_sessions, name='get_my_sessions'),
     path('create/', views.create_session, name='create_session'),
     path('join/<int:session_id>/', views.join_session, name='join_session'),
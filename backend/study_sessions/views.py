@@ -1,12 +1,23 @@
 # study_sessions/views.py
+from datetime import datetime
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
-from .models import StudySession, SessionParticipant
-from .serializers import StudySessionSerializer, CreateStudySessionSerializer, SessionParticipantSerializer
+from django.utils.dateparse import parse_datetime
+from studymatch.cursors import encode_cursor, decode_cursor
+from .models import StudySession, SessionParticipant, WaitlistEntry
+from .feed import upcoming_sessions, UPCOMING_MAX_HOURS
+from .schedule import find_conflicts
+from .seats import reserve_seat, release_seat, AlreadyJoined
+from .serializers import StudySessionSerializer, CreateStudySessionSerializer, SessionParticipantSerializer, session_list_data
+
+# Размер страницы календаря
+CALENDAR_PAGE_SIZE = 20
+MAX_CALENDAR_PAGE_SIZE = 100
 
 
 @api_view(['GET'])
@@ -19,32 +30,119 @@ def health_check(request):
 @permission_classes([IsAuthenticated])
 def get_sessions(request):
     """Получить список учебных сессий"""
-    sessions = StudySession.objects.filter(
+    rows = StudySession.objects.filter(
         is_active=True,
         scheduled_time__gte=timezone.now()
-    ).order_by('scheduled_time')
-    serializer = StudySessionSerializer(sessions, many=True)
-    return Response(serializer.data)
+    ).order_by('scheduled_time').listing_rows()
+    return Response(session_list_data(rows))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_calendar(request):
+    """Календарь сессий: окно времени, фильтры по предмету и университету, постранично по курсору.
+
+    ?from=, ?to= - ISO-время (по умолчанию от текущего момента), ?subject= - название предмета,
+    ?university= - id университета создателя, ?limit=, ?cursor= - next_cursor прошлой страницы.
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', CALENDAR_PAGE_SIZE)), MAX_CALENDAR_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'Неверный параметр limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        start = _parse_time(request.query_params.get('from')) or timezone.now()
+        end = _parse_time(request.query_params.get('to'))
+    except ValueError:
+        return Response({'error': 'Неверный формат времени'}, status=status.HTTP_400_BAD_REQUEST)
+
+    sessions = StudySession.objects.filter(is_active=True, scheduled_time__gte=start)
+    if end is not None:
+        sessions = sessions.filter(scheduled_time__lt=end)
+
+    subject = request.query_params.get('subject')
+    if subject:
+        sessions = sessions.filter(subject_name=subject)
+    university = request.query_params.get('university')
+    if university:
+        try:
+            sessions = sessions.filter(created_by__profile__university_id=int(university))
+        except ValueError:
+            return Response({'error': 'Неверный параметр university'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            timestamp, session_id = decode_cursor(cursor, 2)
+            timestamp, session_id = datetime.fromisoformat(timestamp), int(session_id)
+        except (TypeError, ValueError):
+            return Response({'error': 'Неверный курсор'}, status=status.HTTP_400_BAD_REQUEST)
+        # Keyset по индексу (scheduled_time, id) вместо OFFSET
+        sessions = sessions.filter(
+            Q(scheduled_time__gt=timestamp) | Q(scheduled_time=timestamp, id__gt=session_id)
+        )
+
+    page = list(sessions.order_by('scheduled_time', 'id').listing_rows()[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(page[-1]['scheduled_time'].isoformat(), page[-1]['id'])
+
+    return Response({
+        'results': session_list_data(page),
+        'next_cursor': next_cursor
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upcoming(request):
+    """Облегченная лента сессий, начинающихся в ближайшие ?hours= часов (из кэша)"""
+    try:
+        hours = int(request.query_params.get('hours', 24))
+        if not 1 <= hours <= UPCOMING_MAX_HOURS:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {'error': f'Параметр hours должен быть от 1 до {UPCOMING_MAX_HOURS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response({'hours': hours, 'results': upcoming_sessions(hours)})
+
+
+def _parse_time(value):
+    """ISO-время из параметра запроса; время без зоны считается в зоне проекта"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError('Неверный формат времени')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_my_sessions(request):
     """Получить сессии пользователя (созданные или участник)"""
-    # Сессии созданные пользователем
-    created_sessions = StudySession.objects.filter(created_by=request.user, is_active=True)
-
-    # Сессии где пользователь участник
-    participant_sessions = StudySession.objects.filter(
-        participants__user=request.user,
-        participants__is_active=True,
+    # Сессии где пользователь участник - подзапросом по индексу (user, is_active),
+    # без JOIN и DISTINCT, из-за которых приходилось сканировать все сессии
+    participant_session_ids = SessionParticipant.objects.filter(
+        user_id=request.user.id,
         is_active=True
-    )
+    ).values('session_id')
 
-    # Объединяем и убираем дубликаты
-    sessions = (created_sessions | participant_sessions).distinct().order_by('scheduled_time')
-    serializer = StudySessionSerializer(sessions, many=True)
-    return Response(serializer.data)
+    # Сессии созданные пользователем или где он участник
+    rows = StudySession.objects.filter(
+        Q(created_by_id=request.user.id) | Q(id__in=participant_session_ids),
+        is_active=True
+    ).order_by('scheduled_time').listing_rows()
+    return Response(session_list_data(rows))
 
 
 @api_view(['POST'])
@@ -53,12 +151,25 @@ def create_session(request):
     """Создать учебную сессию"""
     serializer = CreateStudySessionSerializer(data=request.data)
     if serializer.is_valid():
-        session = serializer.save(created_by=request.user)
+        duration = serializer.validated_data.get(
+            'duration_minutes', StudySession._meta.get_field('duration_minutes').get_default()
+        )
+        conflicts = find_conflicts(request.user, serializer.validated_data['scheduled_time'], duration)
+        if conflicts and not _ignore_conflicts(request):
+            return _conflict_response(conflicts)
+
+        with transaction.atomic():
+            # Создатель сразу занимает одно место
+            session = serializer.save(created_by_id=request.user.id, seats_taken=1)
 
-        # Автоматически добавляем создателя как участника
-        SessionParticipant.objects.create(session=session, user=request.user)
+            # Автоматически добавляем создателя как участника
+            SessionParticipant.objects.create(session=session, user_id=request.user.id)
 
-        return Response(StudySessionSerializer(session).data, status=status.HTTP_201_CREATED)
+        session = StudySession.objects.for_listing().get(pk=session.pk)
+        data = StudySessionSerializer(session).data
+        if conflicts:
+            data['conflicts'] = conflicts
+        return Response(data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -71,21 +182,43 @@ def join_session(request, session_id):
     except StudySession.DoesNotExist:
         return Response({'error': 'Сессия не найдена'}, status=status.HTTP_404_NOT_FOUND)
 
-    # Проверяем, не присоединен ли уже
-    if SessionParticipant.objects.filter(session=session, user=request.user).exists():
-        return Response({'error': 'Вы уже присоединены к этой сессии'}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Проверяем лимит участников
-    if session.current_participants_count >= session.max_participants:
-        return Response({'error': 'Достигнут лимит участников'}, status=status.HTTP_400_BAD_REQUEST)
-
     # Проверяем, что сессия еще не началась
     if session.scheduled_time <= timezone.now():
         return Response({'error': 'Нельзя присоединиться к начавшейся сессии'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Присоединяем пользователя
-    participant = SessionParticipant.objects.create(session=session, user=request.user)
-    return Response({'status': 'Вы присоединились к сессии'}, status=status.HTTP_201_CREATED)
+    # Пересечения с другими сессиями пользователя; ignore_conflicts=true - только предупреждение
+    conflicts = find_conflicts(request.user, session.scheduled_time, session.duration_minutes, exclude_session_id=session.id)
+    if conflicts and not _ignore_conflicts(request):
+        return _conflict_response(conflicts)
+
+    # Место занимается атомарно; если мест нет - пользователь встает в очередь ожидания
+    try:
+        result, position = reserve_seat(session, request.user)
+    except AlreadyJoined:
+        return Response({'error': 'Вы уже присоединены к этой сессии'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if result == 'waitlisted':
+        data = {'status': 'Мест нет, вы в очереди ожидания', 'waitlist_position': position}
+        response_status = status.HTTP_202_ACCEPTED
+    else:
+        data = {'status': 'Вы присоединились к сессии'}
+        response_status = status.HTTP_201_CREATED
+    if conflicts:
+        data['conflicts'] = conflicts
+    return Response(data, status=response_status)
+
+
+def _ignore_conflicts(request):
+    """Флаг ignore_conflicts из тела запроса или строки запроса"""
+    value = request.data.get('ignore_conflicts', request.query_params.get('ignore_conflicts'))
+    return value in (True, 'true', 'True', '1', 1)
+
+
+def _conflict_response(conflicts):
+    return Response({
+        'error': 'Сессия пересекается с другими вашими сессиями',
+        'conflicts': conflicts
+    }, status=status.HTTP_409_CONFLICT)
 
 
 @api_view(['POST'])
@@ -95,17 +228,22 @@ def leave_session(request, session_id):
     try:
         participant = SessionParticipant.objects.get(
             session_id=session_id,
-            user=request.user,
+            user_id=request.user.id,
             is_active=True
         )
     except SessionParticipant.DoesNotExist:
+        # Выход из очереди ожидания
+        deleted, _ = WaitlistEntry.objects.filter(session_id=session_id, user_id=request.user.id).delete()
+        if deleted:
+            return Response({'status': 'Вы покинули очередь ожидания'})
         return Response({'error': 'Вы не участник этой сессии'}, status=status.HTTP_404_NOT_FOUND)
 
     # Создатель не может покинуть сессию (должен удалить её)
-    if participant.session.created_by == request.user:
+    if participant.session.created_by_id == request.user.id:
         return Response({'error': 'Создатель не может покинуть сессию'}, status=status.HTTP_400_BAD_REQUEST)
 
-    participant.delete()
+    # Освободившееся место сразу получает первый в очереди ожидания
+    release_seat(participant)
     return Response({'status': 'Вы покинули сессию'})
 
 
@@ -114,7 +252,7 @@ def leave_session(request, session_id):
 def delete_session(request, session_id):
     """Удалить учебную сессию (только создатель)"""
     try:
-        session = StudySession.objects.get(id=session_id, created_by=request.user)
+        session = StudySession.objects.get(id=session_id, created_by_id=request.user.id)
     except StudySession.DoesNotExist:
         return Response({'error': 'Сессия не найдена или у вас нет прав'}, status=status.HTTP_404_NOT_FOUND)
 
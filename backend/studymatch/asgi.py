@@ -2,6 +2,8 @@
 ASGI config for studymatch project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to the regular Django app, WebSocket connections go to the chat
+consumers (see chat/routing.py) and are authenticated with SimpleJWT tokens.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studymatch.settings')
 
-application = get_asgi_application()
+# Приложение Django нужно создать до импорта кода, который использует модели
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+from chat.middleware import JWTAuthMiddleware  # noqa: E402
+from chat.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -0,0 +1,69 @@
+# studymatch/benchmarks.py
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from chat.models import Message
+from matching.models import Match
+from study_sessions.models import StudySession, SessionParticipant
+from users.models import UserProfile
+
+
+@contextmanager
+def isolated_database(verbosity=0):
+    """Временная тестовая база для нагрузочных команд - рабочие данные не трогаются"""
+    # Тестовое окружение нужно для APIClient (ALLOWED_HOSTS с testserver)
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированной копии (ближайший ранг)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Timer:
+    """Замер времени блока: with Timer() as t: ...; t.elapsed в секундах"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def make_user(username):
+    """Пользователь с заполненным профилем"""
+    user = User.objects.create(username=username, first_name=username.title())
+    UserProfile.objects.create(user=user, faculty='ИТ', year_of_study=2, bio='Учусь')
+    return user
+
+
+def seed_owner_lists(owner, room, start, end):
+    """Дополнить списки владельца до end строк: мэтчи, сообщения в room, сессии с участниками"""
+    start_time = timezone.now() + timedelta(days=1)
+    for i in range(start, end):
+        other = make_user(f'user{i}')
+        Match.objects.create(user1=owner, user2=other)
+        message = Message.objects.create(chat_room=room, sender=other if i % 2 else owner, content=f'Сообщение {i}')
+        room.register_message(message)
+        session = StudySession.objects.create(
+            title=f'Сессия {i}', subject_name='Физика', created_by=other,
+            scheduled_time=start_time + timedelta(hours=i), seats_taken=2
+        )
+        SessionParticipant.objects.create(session=session, user=other)
+        SessionParticipant.objects.create(session=session, user=owner)
@@ -0,0 +1,112 @@
+# studymatch/compression.py
+import gzip
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - без brotli остается только gzip
+    brotli = None
+
+# Сжимаем только API и статику; HTML не сжимаем - в нем CSRF-токены (атака BREACH)
+COMPRESSIBLE_TYPES = ('application/json', 'text/css', 'text/javascript', 'application/javascript')
+
+
+def _options():
+    options = {'MIN_SIZE': 1024, 'GZIP_LEVEL': 6, 'BROTLI_QUALITY': 4}
+    options.update(getattr(settings, 'RESPONSE_COMPRESSION', {}))
+    return options
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q: {'gzip': 1.0, 'br': 0.5, ...}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if quality > 0:
+            accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """Лучшая поддерживаемая кодировка для клиента; при равном q brotli предпочтительнее"""
+    accepted = accepted_encodings(header)
+    available = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0
+    for coding in available:
+        quality = accepted.get(coding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body, encoding, options):
+    if encoding == 'br':
+        return brotli.compress(body, quality=options['BROTLI_QUALITY'])
+    return gzip.compress(body, compresslevel=options['GZIP_LEVEL'], mtime=0)
+
+
+class CompressionMiddleware:
+    """Сжатие ответов gzip/brotli по Accept-Encoding, если тело больше порога MIN_SIZE.
+
+    Работает и в синхронной, и в асинхронной цепочке - под ASGI не переводит
+    асинхронные представления в поток."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = _options()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        # Ответ зависит от Accept-Encoding, даже если этот конкретный не сжат
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.options['MIN_SIZE']:
+            return response
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding, self.options)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # Сжатое представление не побайтно равно исходному - ETag становится слабым
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
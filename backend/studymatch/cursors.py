@@ -0,0 +1,21 @@
+# studymatch/cursors.py
+import base64
+import json
+
+
+def encode_cursor(*values):
+    """Упаковать позицию (ключ сортировки) в непрозрачную строку-курсор"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Распаковать курсор из encode_cursor; ValueError, если курсор поврежден"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Неверный курсор')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Неверный курсор')
+    return values
@@ -0,0 +1,106 @@
+# studymatch/database.py
+import os
+from urllib.parse import urlsplit, unquote, parse_qs
+from django.core.exceptions import ImproperlyConfigured
+
+# Профили базы данных из окружения:
+#   DATABASE_URL не задан          - SQLite в BASE_DIR/db.sqlite3
+#   DATABASE_URL=sqlite:///путь    - SQLite в указанном файле
+#   DATABASE_URL=postgres://...    - PostgreSQL с постоянными соединениями или пулом
+# Тонкая настройка: DB_CONN_MAX_AGE, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT,
+# SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE_MB,
+# SQLITE_TUNED=0 - без WAL и прагм (например, база на сетевой ФС, где WAL не работает)
+
+# Прагмы SQLite на каждое соединение: WAL разрешает чтение параллельно с записью,
+# synchronous=NORMAL в режиме WAL безопасен при сбое процесса и не делает fsync на каждый коммит
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY',
+}
+
+
+def _int_env(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f'{name} должно быть целым числом, получено {value!r}')
+
+
+def sqlite_config(path, test_path=None, environ=os.environ):
+    """Настройки SQLite; при SQLITE_TUNED=0 - настройки Django по умолчанию"""
+    if _int_env(environ, 'SQLITE_TUNED', 1):
+        pragmas = dict(SQLITE_PRAGMAS)
+        pragmas['cache_size'] = -_int_env(environ, 'SQLITE_CACHE_SIZE_KB', 20 * 1024)
+        pragmas['mmap_size'] = _int_env(environ, 'SQLITE_MMAP_SIZE_MB', 128) * 1024 * 1024
+        options = {
+            # Транзакции сразу берут блокировку записи: параллельные свайпы ждут
+            # своей очереди (timeout, сек.), а не падают с "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': _int_env(environ, 'SQLITE_BUSY_TIMEOUT', 20),
+            'init_command': ''.join(f'PRAGMA {name}={value};' for name, value in pragmas.items()),
+        }
+    else:
+        options = {}
+
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': options,
+    }
+    if test_path is not None:
+        # Тестовая база в файле: in-memory база с shared cache не поддерживает
+        # параллельную запись из нескольких потоков (нужно нагрузочным тестам)
+        config['TEST'] = {'NAME': test_path}
+    return config
+
+
+def postgresql_config(url, environ=os.environ):
+    """Настройки PostgreSQL из URL: постоянные соединения или пул psycopg (DB_POOL_MAX_SIZE)"""
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(url.path.lstrip('/')),
+        'USER': unquote(url.username or ''),
+        'PASSWORD': unquote(url.password or ''),
+        'HOST': url.hostname or '',
+        'PORT': str(url.port or ''),
+        # Перед повторным использованием соединения проверяем, что оно живо
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': query,
+    }
+
+    pool_max_size = _int_env(environ, 'DB_POOL_MAX_SIZE', 0)
+    if pool_max_size:
+        # Пул psycopg 3 (пакет psycopg[pool]) - несовместим с CONN_MAX_AGE, поэтому 0
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': _int_env(environ, 'DB_POOL_MIN_SIZE', 2),
+            'max_size': pool_max_size,
+            'timeout': _int_env(environ, 'DB_POOL_TIMEOUT', 10),
+        }
+    else:
+        # Соединение живет между запросами вместо переподключения на каждый запрос
+        config['CONN_MAX_AGE'] = _int_env(environ, 'DB_CONN_MAX_AGE', 60)
+    return config
+
+
+def database_config(base_dir, environ=os.environ):
+    """Настройки базы 'default' по DATABASE_URL"""
+    url = environ.get('DATABASE_URL')
+    if not url:
+        return sqlite_config(base_dir / 'db.sqlite3', base_dir / 'test_db.sqlite3', environ=environ)
+
+    parsed = urlsplit(url)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db - от BASE_DIR, sqlite:////abs/path.db - абсолютный путь
+        path = unquote(parsed.path)[1:] if parsed.path.startswith('/') else unquote(parsed.path)
+        path = path if os.path.isabs(path) else base_dir / path
+        return sqlite_config(path, f'{path}.test', environ=environ)
+    if parsed.scheme in ('postgres', 'postgresql', 'pgsql'):
+        return postgresql_config(parsed, environ)
+    raise ImproperlyConfigured(f'Неподдерживаемая схема DATABASE_URL: {parsed.scheme!r}')
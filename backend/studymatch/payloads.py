@@ -0,0 +1,160 @@
+# studymatch/payloads.py
+from rest_framework import serializers
+
+# Быстрый путь для списков только на чтение: ответы собираются из строк .values()
+# обычными словарями, без создания сериализаторов и полей на каждый объект.
+# JSON совпадает с DRF-сериализаторами (SimpleProfileSerializer, MatchSerializer,
+# MessageSerializer, ChatRoomSerializer, StudySessionSerializer) - это проверяют тесты.
+
+# Одно поле на процесс: время форматируется ровно как в DRF (зона проекта, 'Z' для UTC)
+_format_datetime = serializers.DateTimeField().to_representation
+
+
+def format_datetime(value):
+    return None if value is None else _format_datetime(value)
+
+
+# Поля пользователя и профиля для SimpleProfileSerializer; profile__id - признак наличия профиля
+PROFILE_FIELDS = (
+    'id', 'username', 'first_name', 'last_name',
+    'profile__id', 'profile__faculty', 'profile__year_of_study', 'profile__bio'
+)
+
+
+def profile_values(prefix):
+    """Имена полей профиля для .values() по связи prefix (например, 'user1__')"""
+    return tuple(prefix + field for field in PROFILE_FIELDS)
+
+
+def profile_payload(row, prefix):
+    """Данные SimpleProfileSerializer из строки .values(); None, если профиля нет"""
+    if row[prefix + 'profile__id'] is None:
+        return None
+    return {
+        'id': row[prefix + 'id'],
+        'username': row[prefix + 'username'],
+        'first_name': row[prefix + 'first_name'],
+        'last_name': row[prefix + 'last_name'],
+        'faculty': row[prefix + 'profile__faculty'],
+        'year_of_study': row[prefix + 'profile__year_of_study'],
+        'bio': row[prefix + 'profile__bio'],
+    }
+
+
+MATCH_VALUES = ('id', 'user1_id', 'user2_id', 'created_at', 'is_active') + profile_values('user1__') + profile_values('user2__')
+
+
+def match_payload(row, user_id):
+    """Данные MatchSerializer для пользователя user_id"""
+    other = 'user2' if row['user1_id'] == user_id else 'user1'
+    return {
+        'id': row['id'],
+        'user1': row['user1_id'],
+        'user2': row['user2_id'],
+        'other_user': row[other + '_id'],
+        'other_user_profile': profile_payload(row, other + '__'),
+        'created_at': format_datetime(row['created_at']),
+        'is_active': row['is_active'],
+    }
+
+
+# Строка ребра графа мэтчей (matching.MatchEdge) его владельца: собеседник уже известен
+MATCH_EDGE_VALUES = (
+    'match_id', 'match__user1_id', 'match__user2_id', 'match__created_at', 'other_id'
+) + profile_values('other__')
+
+
+def match_edge_payload(row):
+    """Данные MatchSerializer из строки ребра: мэтч глазами владельца ребра"""
+    return {
+        'id': row['match_id'],
+        'user1': row['match__user1_id'],
+        'user2': row['match__user2_id'],
+        'other_user': row['other_id'],
+        'other_user_profile': profile_payload(row, 'other__'),
+        'created_at': format_datetime(row['match__created_at']),
+        # Ребра есть только у активных мэтчей
+        'is_active': True,
+    }
+
+
+MESSAGE_FIELDS = ('id', 'sender_id', 'content', 'timestamp', 'is_read')
+MESSAGE_VALUES = MESSAGE_FIELDS + profile_values('sender__')
+
+
+def message_payload(row, prefix=''):
+    """Данные MessageSerializer; prefix - путь к сообщению в строке (например, 'last_message__')"""
+    return {
+        'id': row[prefix + 'id'],
+        'sender': row[prefix + 'sender_id'],
+        'sender_profile': profile_payload(row, prefix + 'sender__'),
+        'content': row[prefix + 'content'],
+        'timestamp': format_datetime(row[prefix + 'timestamp']),
+        'is_read': row[prefix + 'is_read'],
+    }
+
+
+CHAT_ROOM_VALUES = (
+    'id', 'user1_id', 'user2_id', 'created_at', 'is_active',
+    'user1_unread_count', 'user2_unread_count', 'last_message_id'
+) + profile_values('user1__') + profile_values('user2__') + tuple(
+    'last_message__' + field for field in MESSAGE_VALUES
+)
+
+
+def chat_room_payload(row, user_id):
+    """Данные ChatRoomSerializer для пользователя user_id"""
+    is_user1 = row['user1_id'] == user_id
+    other = 'user2' if is_user1 else 'user1'
+    return {
+        'id': row['id'],
+        'user1': row['user1_id'],
+        'user2': row['user2_id'],
+        'other_user': row[other + '_id'],
+        'other_user_profile': profile_payload(row, other + '__'),
+        'last_message': message_payload(row, 'last_message__') if row['last_message_id'] else None,
+        'unread_count': row['user1_unread_count'] if is_user1 else row['user2_unread_count'],
+        'created_at': format_datetime(row['created_at']),
+        'is_active': row['is_active'],
+    }
+
+
+SESSION_VALUES = (
+    'id', 'title', 'description', 'subject_name', 'created_by_id', 'scheduled_time',
+    'duration_minutes', 'max_participants', 'active_participants_count', 'is_active', 'created_at'
+) + profile_values('created_by__')
+
+PARTICIPANT_VALUES = ('id', 'session_id', 'user_id', 'joined_at', 'is_active') + profile_values('user__')
+
+
+def participant_payload(row):
+    """Данные SessionParticipantSerializer"""
+    return {
+        'id': row['id'],
+        'user': row['user_id'],
+        'user_profile': profile_payload(row, 'user__'),
+        'joined_at': format_datetime(row['joined_at']),
+        'is_active': row['is_active'],
+    }
+
+
+def session_payload(row, participants):
+    """Данные StudySessionSerializer; participants - строки PARTICIPANT_VALUES этой сессии"""
+    count = row['active_participants_count']
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'subject_name': row['subject_name'],
+        'subject_info': {'name': row['subject_name']} if row['subject_name'] else None,
+        'created_by': row['created_by_id'],
+        'created_by_profile': profile_payload(row, 'created_by__'),
+        'scheduled_time': format_datetime(row['scheduled_time']),
+        'duration_minutes': row['duration_minutes'],
+        'max_participants': row['max_participants'],
+        'participants_count': count,
+        'available_slots': row['max_participants'] - count,
+        'participants': [participant_payload(participant) for participant in participants],
+        'is_active': row['is_active'],
+        'created_at': format_datetime(row['created_at']),
+    }
@@ -0,0 +1,276 @@
+# studymatch/profiling.py
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Профилирование запросов по выборке: время запроса, число и время SQL-запросов,
+# время сериализации ответа в JSON и размер ответа по каждому представлению.
+# Метрики складываются в гистограммы со скользящим окном (GET /debug/profiling/),
+# у профилированных ответов есть заголовок Server-Timing. Модуль не импортирует DRF:
+# его импортирует рендерер, который DRF загружает вместе с APIView.
+
+# Верхние границы корзин гистограмм; все, что больше последней, попадает в переполнение
+TIME_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BOUNDS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BOUNDS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS = {
+    'wall_ms': TIME_BOUNDS_MS,
+    'db_ms': TIME_BOUNDS_MS,
+    'db_queries': QUERY_BOUNDS,
+    'serialize_ms': TIME_BOUNDS_MS,
+    'response_bytes': SIZE_BOUNDS,
+}
+
+# Замер текущего запроса; рендерер добавляет в него время сериализации
+_current = ContextVar('profiling_sample', default=None)
+
+
+def _options():
+    options = {'SAMPLE_RATE': 0.0, 'WINDOW_SECONDS': 300, 'SLOT_SECONDS': 10, 'SERVER_TIMING': True}
+    options.update(getattr(settings, 'PROFILING', {}))
+    return options
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: счетчики, сумма и максимум"""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'total', 'max')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for i, bucket in enumerate(other.buckets):
+            self.buckets[i] += bucket
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Оценка сверху: граница корзины, в которую попадает перцентиль (не больше максимума)"""
+        rank = fraction * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if bucket and seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return None
+        return {
+            'mean': round(self.total / self.count, 2),
+            'p50': round(self.percentile(0.5), 2),
+            'p95': round(self.percentile(0.95), 2),
+            'p99': round(self.percentile(0.99), 2),
+            'max': round(self.max, 2),
+            'buckets': dict(zip([str(bound) for bound in self.bounds] + ['+Inf'], self.buckets)),
+        }
+
+
+class RollingProfile:
+    """Гистограммы по представлениям за последние WINDOW_SECONDS, слотами по SLOT_SECONDS.
+
+    Устаревшие слоты выбрасываются при записи, так что память ограничена
+    числом слотов и представлений."""
+
+    def __init__(self, window_seconds=300, slot_seconds=10, clock=time.monotonic):
+        self.slot_seconds = slot_seconds
+        self.slots_count = max(1, window_seconds // slot_seconds)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._slots = {}  # номер слота -> {представление: {метрика: Histogram}}
+
+    def _slot(self):
+        return int(self.clock() // self.slot_seconds)
+
+    def record(self, view, values):
+        slot = self._slot()
+        with self._lock:
+            views = self._slots.get(slot)
+            if views is None:
+                oldest = slot - self.slots_count + 1
+                for stale in [key for key in self._slots if key < oldest]:
+                    del self._slots[stale]
+                views = self._slots[slot] = {}
+            histograms = views.get(view)
+            if histograms is None:
+                histograms = views[view] = {metric: Histogram(bounds) for metric, bounds in METRICS.items()}
+            for metric, value in values.items():
+                histograms[metric].add(value)
+
+    def snapshot(self):
+        """Сводка по представлениям за окно"""
+        oldest = self._slot() - self.slots_count + 1
+        merged = {}
+        with self._lock:
+            for slot, views in self._slots.items():
+                if slot < oldest:
+                    continue
+                for view, histograms in views.items():
+                    target = merged.setdefault(
+                        view, {metric: Histogram(bounds) for metric, bounds in METRICS.items()}
+                    )
+                    for metric, histogram in histograms.items():
+                        target[metric].merge(histogram)
+        return {
+            view: {
+                'count': histograms['wall_ms'].count,
+                **{metric: histogram.summary() for metric, histogram in histograms.items()},
+            }
+            for view, histograms in sorted(merged.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._slots.clear()
+
+
+_window = _options()
+profile = RollingProfile(_window['WINDOW_SECONDS'], _window['SLOT_SECONDS'])
+
+
+class Sample:
+    """Замер одного запроса"""
+
+    __slots__ = ('db_ms', 'db_queries', 'serialize_ms')
+
+    def __init__(self):
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.serialize_ms = 0.0
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    # Время и число SQL-запросов текущего замера. Замер берется из контекста, а не из
+    # соединения: под ASGI запросы асинхронных представлений идут через sync_to_async
+    # в других потоках со своими соединениями, а контекст переносится туда вместе с вызовом
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.db_ms += (time.perf_counter() - started) * 1000
+        sample.db_queries += 1
+
+
+def _install_execute_wrapper(connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def install_execute_wrappers():
+    """Подключить замер SQL к уже открытым и ко всем новым соединениям"""
+    for connection in connections.all(initialized_only=True):
+        _install_execute_wrapper(connection)
+    connection_created.connect(_install_execute_wrapper, dispatch_uid='profiling_execute_wrapper')
+
+
+@contextmanager
+def timed_serialization():
+    """Добавить время блока к сериализации текущего профилируемого запроса"""
+    sample = _current.get()
+    if sample is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.serialize_ms += (time.perf_counter() - started) * 1000
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match.route
+
+
+class ProfilingMiddleware:
+    """Профилирование доли SAMPLE_RATE запросов; при SAMPLE_RATE=0 отключается целиком.
+
+    Работает и в синхронной, и в асинхронной цепочке middleware."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = _options()
+        if self.options['SAMPLE_RATE'] <= 0:
+            raise MiddlewareNotUsed
+        self.sample_rate = self.options['SAMPLE_RATE']
+        install_execute_wrappers()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        sample = Sample()
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, sample, started)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        sample = Sample()
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, sample, started)
+
+    def finish(self, request, response, sample, started):
+        wall_ms = (time.perf_counter() - started) * 1000
+        size = 0 if response.streaming else len(response.content)
+        profile.record(view_name(request), {
+            'wall_ms': wall_ms,
+            'db_ms': sample.db_ms,
+            'db_queries': sample.db_queries,
+            'serialize_ms': sample.serialize_ms,
+            'response_bytes': size,
+        })
+        if self.options['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={sample.db_ms:.1f};desc="{sample.db_queries} queries", '
+                f'serialize;dur={sample.serialize_ms:.1f}, '
+                f'app;dur={wall_ms:.1f}'
+            )
+        return response
@@ -0,0 +1,74 @@
+# studymatch/reference_cache.py
+import hashlib
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+# Справочники (предметы, университеты) меняются редко, а запрашиваются при каждом
+# запуске приложения. В кэше лежит уже готовое тело ответа в байтах и его ETag;
+# изменение данных меняет версию справочника, старые записи просто перестают читаться.
+CACHE_ALIAS = 'reference'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(name):
+    return f'reference:{name}:version'
+
+
+def _version(name):
+    cache = _cache()
+    version = cache.get(_version_key(name))
+    if version is None:
+        cache.add(_version_key(name), 1, timeout=None)
+        version = cache.get(_version_key(name), 1)
+    return version
+
+
+def invalidate(name):
+    """Сбросить справочник name (сразу или после коммита текущей транзакции)"""
+    def bump():
+        try:
+            _cache().incr(_version_key(name))
+        except ValueError:
+            _cache().add(_version_key(name), 1, timeout=None)
+    transaction.on_commit(bump)
+
+
+def get_payload(name, build):
+    """Тело ответа и ETag справочника name; build() - данные для сериализации при промахе"""
+    cache = _cache()
+    key = f'reference:{name}:{_version(name)}'
+    payload = cache.get(key)
+    if payload is None:
+        body = JSONRenderer().render(build())
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        payload = (body, etag)
+        cache.set(key, payload, timeout=None)
+    return payload
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Сравнение слабое: W/"x" и "x" считаются одним представлением
+    candidates = {value.strip().removeprefix('W/') for value in header.split(',')}
+    return etag in candidates
+
+
+def reference_response(request, name, build):
+    """Ответ со справочником из кэша; 304 без тела, если у клиента актуальная версия"""
+    body, etag = get_payload(name, build)
+    if _etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Клиент хранит копию, но перепроверяет ее при каждом запросе (дешево - через 304)
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,39 @@
+# studymatch/renderers.py
+from rest_framework import renderers
+from rest_framework.utils import encoders
+from .profiling import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - без orjson работает обычный JSONRenderer
+    orjson = None
+
+# Опции orjson, дающие тот же JSON, что и DRF JSONRenderer по умолчанию:
+# компактный UTF-8, время UTC с 'Z', нестроковые ключи словарей приводятся к строкам
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _default(obj):
+    # Decimal, ленивые строки, QuerySet и прочее - так же, как кодировщик DRF
+    return encoders.JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer на orjson; если orjson не установлен или данные ему не по силам -
+    обычный рендер DRF с тем же результатом"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_serialization():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Отступы (например, из browsable API) orjson не повторяет - отдаем DRF
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            # Например, целые больше 64 бит
+            return super().render(data, accepted_media_type, renderer_context)
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
+from studymatch.database import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,13 +45,20 @@ INSTALLED_APPS = [
     'matching',
     'chat',
     'study_sessions',  # ← Это мое переименованное приложение
+    'search',
+    'jobs',
     'rest_framework_simplejwt',
 
 ]
 
 MIDDLEWARE = [
+    # Профилирование по выборке (studymatch/profiling.py) - первым, чтобы мерить весь запрос;
+    # при PROFILING['SAMPLE_RATE'] = 0 Django его не подключает
+    'studymatch.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Сжатие ответов API (studymatch/compression.py) - до остальных, чтобы сжимать готовое тело
+    'studymatch.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,26 +85,137 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'studymatch.wsgi.application'
+ASGI_APPLICATION = 'studymatch.asgi.application'
+
+# Channel layer для WebSocket-чата (chat/consumers.py).
+# По умолчанию - в памяти процесса (достаточно для одного воркера и тестов);
+# для нескольких воркеров задайте CHANNEL_LAYER_REDIS_URL (нужен пакет channels-redis)
+if os.environ.get('CHANNEL_LAYER_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['CHANNEL_LAYER_REDIS_URL']]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Кэши: default - общие данные (лента ближайших сессий), reference - справочники
+# (studymatch/reference_cache.py). По умолчанию - в памяти процесса; для нескольких
+# воркеров задайте CACHE_REDIS_URL (встроенный RedisCache Django, нужен пакет redis),
+# тогда сброс версий при изменении данных виден всем процессам
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+            'KEY_PREFIX': 'studymatch',
+        },
+        'reference': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+            'KEY_PREFIX': 'studymatch-reference',
+            'TIMEOUT': None,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'studymatch-default',
+        },
+        'reference': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'studymatch-reference',
+            'TIMEOUT': None,
+        },
+    }
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Профиль базы задается окружением (DATABASE_URL и др., см. studymatch/database.py):
+# по умолчанию SQLite с WAL и ожиданием блокировки, для PostgreSQL - постоянные соединения или пул
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
 
 # Настройки DRF
 REST_FRAMEWORK = {
+    # JWT без запроса User на каждый запрос: пользователь загружается лениво (users/authentication.py)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # JSON через orjson (studymatch/renderers.py); без orjson - стандартный рендер DRF
+    'DEFAULT_RENDERER_CLASSES': (
+        'studymatch.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+# Кэш пользователей с профилями для ленивого request.user (users/cache.py):
+# время жизни записи в секундах и предел числа записей на процесс
+USER_CACHE = {
+    'TTL': 60,
+    'MAX_ENTRIES': 10000,
+}
+
+# Сжатие ответов (studymatch/compression.py): gzip всегда, brotli - если установлен пакет brotli
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+}
+
+# Профилирование запросов: доля профилируемых запросов (0 - выключено),
+# окно гистограмм /debug/profiling/ и заголовок Server-Timing
+PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', '0')),
+    'WINDOW_SECONDS': 300,
+    'SLOT_SECONDS': 10,
+    'SERVER_TIMING': True,
+}
+
+# Индекс кандидатов в памяти процесса (matching/index.py): перестраивается при смене общей
+# версии в кэше default и не реже чем раз в MAX_AGE_SECONDS
+CANDIDATE_INDEX = {
+    'MAX_AGE_SECONDS': 300,
+}
+
+# Кэш множеств уже свайпнутых пользователей (matching/swiped_cache.py):
+# предел памяти на процесс и порог, с которого множество хранится фильтром Блума.
+# Свайпы других процессов видны по общей версии в кэше default; TTL - предел устаревания
+SWIPED_CACHE = {
+    'MAX_BYTES': 32 * 1024 * 1024,
+    'BLOOM_THRESHOLD': 2000,
+    'BLOOM_ERROR_RATE': 0.01,
+    'TTL': 300,
+}
+
+# Очередь фоновых задач (jobs/queue.py). Задачи хранятся в таблице jobs_job и выполняются
+# пулом потоков, который запускается в процессе при первой задаче (AUTOSTART), и/или
+# отдельными процессами manage.py run_jobs. EAGER - выполнять задачу сразу после коммита
+# в том же потоке: так работают тесты (классы из studymatch/testing.py), где потоки
+# не видят данных незавершенной транзакции
+JOBS = {
+    'EAGER': os.environ.get('JOBS_EAGER') == '1',
+    'AUTOSTART': os.environ.get('JOBS_AUTOSTART', '1') == '1',
+    'WORKERS': int(os.environ.get('JOBS_WORKERS', '4')),
+    'POLL_SECONDS': 1,
+    # Задача, не завершившаяся за LEASE_SECONDS (упал процесс), снова попадает в очередь
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 5,
+    # Повтор после ошибки через RETRY_BASE_SECONDS * 2^(попытка - 1), не больше RETRY_MAX_SECONDS
+    'RETRY_BASE_SECONDS': 5,
+    'RETRY_MAX_SECONDS': 3600,
 }
 
 # Password validation
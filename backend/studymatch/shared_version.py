@@ -0,0 +1,35 @@
+# studymatch/shared_version.py
+import time
+from django.core.cache import caches
+
+# Версии данных в общем кэше default (Redis при CACHE_REDIS_URL): кэши в памяти процесса
+# запоминают версию, с которой загружены, и перезагружаются, когда другой процесс ее поднял.
+# Начальная версия - текущее время в миллисекундах: после вытеснения ключа из кэша версия
+# не вернется к значению, которое уже видел какой-то процесс.
+
+
+def _cache():
+    return caches['default']
+
+
+def _key(name):
+    return f'version:{name}'
+
+
+def get(name):
+    """Текущая общая версия данных name"""
+    cache = _cache()
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(_key(name))
+    return version
+
+
+def bump(name):
+    """Поднять версию данных name; возвращает новую"""
+    try:
+        return _cache().incr(_key(name))
+    except ValueError:
+        # Ключ вытеснен - начинаем с новой версии, не совпадающей ни с одной из прежних
+        return get(name)
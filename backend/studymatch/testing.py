@@ -0,0 +1,67 @@
+# studymatch/testing.py
+import re
+from django import test
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Строки плана, означающие полный просмотр таблицы
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+# Фоновые задачи в тестах выполняются сразу после коммита в потоке теста: потоки пула
+# не видят данных незавершенной транзакции TestCase
+eager_jobs = test.override_settings(JOBS={**settings.JOBS, 'EAGER': True})
+
+
+@eager_jobs
+class TestCase(test.TestCase):
+    """TestCase проекта: фоновые задачи выполняются сразу (EAGER)"""
+
+
+@eager_jobs
+class TransactionTestCase(test.TransactionTestCase):
+    """TransactionTestCase проекта: фоновые задачи выполняются сразу (EAGER)"""
+
+
+class QueryPlanAssertionsMixin:
+    """Проверки планов запросов для TestCase: горячие запросы не должны сканировать таблицы целиком"""
+
+    def explain(self, sql):
+        """План запроса в виде списка строк"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # На маленьких тестовых данных PostgreSQL и так выберет Seq Scan -
+                # запрещаем его, чтобы увидеть, есть ли вообще подходящий индекс
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+                return [row[0] for row in cursor.fetchall()]
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScans(self, func, allowed_tables=()):
+        """Выполнить func и проверить планы всех выполненных ею SELECT/UPDATE/DELETE"""
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'Нет разбора планов для {connection.vendor}')
+
+        with CaptureQueriesContext(connection) as context:
+            result = func()
+
+        statements = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith(EXPLAINED_STATEMENTS)
+        ]
+        self.assertTrue(statements, 'Не выполнено ни одного запроса для проверки')
+        for sql in statements:
+            plan = self.explain(sql)
+            scanned = {
+                match.group(1) for line in plan for match in pattern.finditer(line)
+            } - set(allowed_tables)
+            if scanned:
+                self.fail('Полный просмотр {}:\n{}\n{}'.format(', '.join(sorted(scanned)), sql, '\n'.join(plan)))
+        return result
@@ -0,0 +1,125 @@
+# studymatch/tests.py
+import gzip
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from .compression import CompressionMiddleware, choose_encoding
+from .database import database_config
+from .profiling import Histogram, RollingProfile, profile
+from .renderers import FastJSONRenderer
+from .testing import TestCase
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """orjson-рендер дает тот же JSON, что и JSONRenderer DRF"""
+
+    def test_same_output(self):
+        data = {
+            'text': 'Привет, "мир"',
+            'time': datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=dt_timezone.utc),
+            'amount': Decimal('1.5'),
+            'nested': [{'id': 1, 'none': None, 'flag': True}],
+            'big': 2 ** 70,
+            1: 'нестроковый ключ',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class CompressionMiddlewareTestCase(SimpleTestCase):
+    """Сжатие по Accept-Encoding с порогом размера"""
+
+    def respond(self, body, accept_encoding, content_type='application/json'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body, content_type=content_type))
+        return middleware(request)
+
+    def test_negotiation(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, identity'))
+        self.assertIsNone(choose_encoding(''))
+
+    def test_compresses_large_json_only(self):
+        body = b'[' + b','.join(b'{"id":%d,"content":"repeated"}' % i for i in range(200)) + b']'
+        response = self.respond(body, 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        self.assertFalse(self.respond(b'{"id":1}', 'gzip').has_header('Content-Encoding'))
+        self.assertFalse(self.respond(body, 'identity').has_header('Content-Encoding'))
+        self.assertFalse(self.respond(body, 'gzip', 'text/html').has_header('Content-Encoding'))
+
+
+class DatabaseConfigTestCase(SimpleTestCase):
+    """Профили базы из окружения"""
+
+    def test_sqlite_default(self):
+        config = database_config(Path('/srv/app'), {})
+        self.assertEqual(config['NAME'], Path('/srv/app/db.sqlite3'))
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=WAL;', config['OPTIONS']['init_command'])
+        self.assertEqual(database_config(Path('/srv/app'), {'SQLITE_TUNED': '0'})['OPTIONS'], {})
+
+    def test_postgresql(self):
+        url = 'postgres://app:p%40ss@db:5433/studymatch?sslmode=require'
+        config = database_config(Path('/srv/app'), {'DATABASE_URL': url})
+        self.assertEqual(
+            (config['NAME'], config['USER'], config['PASSWORD'], config['HOST'], config['PORT']),
+            ('studymatch', 'app', 'p@ss', 'db', '5433')
+        )
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS'], {'sslmode': 'require'})
+
+        pooled = database_config(Path('/srv/app'), {'DATABASE_URL': url, 'DB_POOL_MAX_SIZE': '20'})
+        self.assertEqual(pooled['CONN_MAX_AGE'], 0)
+        self.assertEqual(pooled['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10})
+
+
+class ProfilingTestCase(TestCase):
+    """Профилирование по выборке: гистограммы со скользящим окном и Server-Timing"""
+
+    def test_rolling_histograms(self):
+        histogram = Histogram((1, 10, 100))
+        for value in (0.5, 5, 5, 50, 500):
+            histogram.add(value)
+        self.assertEqual(histogram.buckets, [1, 2, 1, 1])
+        self.assertEqual(histogram.percentile(0.5), 10)
+        self.assertEqual(histogram.percentile(0.99), 500)
+
+        now = [0]
+        rolling = RollingProfile(window_seconds=30, slot_seconds=10, clock=lambda: now[0])
+        rolling.record('view', {'wall_ms': 3})
+        now[0] = 25
+        rolling.record('view', {'wall_ms': 7})
+        self.assertEqual(rolling.snapshot()['view']['count'], 2)
+        # Первый слот выходит из окна
+        now[0] = 31
+        self.assertEqual(rolling.snapshot()['view']['count'], 1)
+
+    @override_settings(PROFILING={'SAMPLE_RATE': 1})
+    def test_middleware(self):
+        profile.reset()
+        admin = User.objects.create_user('admin', password='pass', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get('/api/matching/matches/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, app;dur=')
+
+        stats = client.get('/debug/profiling/').json()
+        self.assertEqual(stats['sample_rate'], 1)
+        matches = stats['views']['matches']
+        self.assertEqual(matches['count'], 1)
+        self.assertGreaterEqual(matches['db_queries']['max'], 1)
+        self.assertEqual(matches['response_bytes']['max'], len(response.content))
+
+        self.assertEqual(client.delete('/debug/profiling/').status_code, 204)
+        self.assertEqual(APIClient().get('/debug/profiling/').status_code, 401)
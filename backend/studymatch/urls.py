@@ -3,6 +3,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from studymatch import profiling
 
 
 def debug_urls(request):
@@ -28,6 +33,20 @@ def debug_urls(request):
     return JsonResponse({'url_patterns': patterns})
 
 
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def profiling_stats(request):
+    """Гистограммы профилирования по представлениям за окно; DELETE - сбросить"""
+    if request.method == 'DELETE':
+        profiling.profile.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'sample_rate': settings.PROFILING['SAMPLE_RATE'],
+        'window_seconds': profiling.profile.slots_count * profiling.profile.slot_seconds,
+        'views': profiling.profile.snapshot(),
+    })
+
+
 # Простая функция для корневого пути
 def root_health_check(request):
     return JsonResponse(
@@ -39,9 +58,12 @@ urlpatterns = [
     path('api/auth/', include('users.urls')),
     path('api/matching/', include('matching.urls')),
     path('debug/urls/', debug_urls, name='debug_urls'),
+    path('debug/profiling/', profiling_stats, name='profiling_stats'),
     path('', root_health_check, name='root_health_check'),  # Добавляем корневой путь
     path('api/chat/', include('chat.urls')),
     path('api/study-sessions/', include('study_sessions.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/jobs/', include('jobs.urls')),
 ]
 
 if settings.DEBUG:
@@ -5,3 +5,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Подключаем сигналы, сбрасывающие кэш справочника университетов и кэш пользователей
+        from . import signals  # noqa: F401
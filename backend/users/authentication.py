@@ -0,0 +1,55 @@
+# users/authentication.py
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .cache import user_cache
+
+
+def _load_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        raise AuthenticationFailed('Пользователь не найден', code='user_not_found')
+    if not user.is_active:
+        raise AuthenticationFailed('Пользователь неактивен', code='user_inactive')
+    return user
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    """Пользователь из подписанного токена: id известен сразу, строка User (с профилем)
+    загружается из user_cache только при обращении к другим полям"""
+
+    def __init__(self, user_id):
+        super().__init__(lambda: _load_user(user_id))
+        # Мимо __setattr__ LazyObject, который иначе загрузил бы пользователя
+        self.__dict__['_user_id'] = user_id
+
+    @property
+    def id(self):
+        return self.__dict__['_user_id']
+
+    pk = id
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса User на каждый запрос.
+
+    Подпись и срок токена проверяются как обычно. Активность пользователя
+    проверяется при первой загрузке строки User - представлениям, которым
+    хватает request.user.id, до истечения access-токена достаточно самого токена.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            # SimpleJWT хранит id строкой - приводим к типу первичного ключа
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken('Токен не содержит идентификатор пользователя')
+        return TokenClaimsUser(user_id)
@@ -0,0 +1,64 @@
+# users/cache.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth.models import User
+
+
+class UserCache:
+    """Кэш пользователей вместе с профилями в памяти процесса, с коротким TTL.
+
+    Записи сбрасываются сигналами при изменении User/UserProfile (см. users/signals.py);
+    TTL ограничивает устаревание изменений, сделанных другими процессами.
+    Наружу отдаются копии, чтобы запросы не изменяли общий объект.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        config = getattr(settings, 'USER_CACHE', {})
+        self.ttl = ttl or config.get('TTL', 60)
+        self.max_entries = max_entries or config.get('MAX_ENTRIES', 10000)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (истекает, User с загруженным profile)
+        self._generation = 0  # растет при каждом сбросе; защищает от записи устаревшей загрузки
+        self.hits = self.misses = 0
+
+    def get(self, user_id):
+        """Пользователь с профилем (копия) или None, если такого нет"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        try:
+            user = User.objects.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (now + self.ttl, user)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return copy.deepcopy(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.hits = self.misses = 0
+
+
+user_cache = UserCache()
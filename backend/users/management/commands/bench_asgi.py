@@ -0,0 +1,219 @@
+# users/management/commands/bench_asgi.py
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+from chat.models import ChatRoom, Message
+from matching.models import Subject, UserSubject, Match
+from studymatch.benchmarks import make_user, percentile, Timer
+
+# Эндпоинты замера: асинхронные представления мэтчинга и чата
+ENDPOINTS = (
+    ('matches', '/api/matching/matches/'),
+    ('recommendations', '/api/matching/recommendations/?limit=20'),
+    ('rooms', '/api/chat/rooms/'),
+    ('messages', '/api/chat/messages/{room_id}/?limit=20'),
+)
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI-сервер с фиксированным пулом потоков - как воркер gunicorn с --threads"""
+
+    daemon_threads = True
+
+    def __init__(self, *args, threads=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _add_latency(latency):
+    # Задержка на каждый SQL-запрос - имитация сетевой базы вместо локального SQLite
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):
+        # Сигнал приходит при каждом переподключении того же объекта соединения
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(install, weak=False)
+
+
+class Command(BaseCommand):
+    help = (
+        'Задержка и пропускная способность асинхронных эндпоинтов мэтчинга и чата при развертывании '
+        'через WSGI (пул потоков) и ASGI (daphne) на временной базе SQLite. --db-latency-ms добавляет '
+        'задержку к каждому SQL-запросу, как у базы по сети.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--threads', type=int, default=8, help='Потоков WSGI-сервера')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64],
+                            help='Уровни параллельности клиентов')
+        parser.add_argument('--requests', type=int, default=400, help='Запросов на уровень параллельности')
+        parser.add_argument('--db-latency-ms', type=float, default=0)
+        parser.add_argument('--output', help='Файл JSON с результатами')
+        # Служебные режимы дочерних процессов
+        parser.add_argument('--seed', action='store_true', help='(служебный) засеять базу и вывести токены')
+        parser.add_argument('--serve', choices=['wsgi', 'asgi'], help='(служебный) запустить сервер')
+        parser.add_argument('--port', type=int)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.stdout.write(json.dumps(self.seed(options['users'])))
+            return
+        if options['serve']:
+            self.serve(options)
+            return
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'DATABASE_URL': f'sqlite:///{directory}/bench.db', 'PROFILING_SAMPLE_RATE': '0'}
+            self.manage(env, 'migrate', '-v', '0')
+            accounts = json.loads(self.manage(env, 'bench_asgi', '--seed', '--users', str(options['users'])).splitlines()[-1])
+
+            results = {}
+            for mode in ('wsgi', 'asgi'):
+                port = self.free_port()
+                server = subprocess.Popen([
+                    sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_asgi', '--serve', mode,
+                    '--port', str(port), '--threads', str(options['threads']),
+                    '--db-latency-ms', str(options['db_latency_ms']),
+                ], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                try:
+                    base_url = f'http://127.0.0.1:{port}'
+                    self.wait_ready(base_url, server)
+                    # Прогрев: индекс кандидатов, кэши, соединения
+                    self.load(base_url, accounts, 4, 40)
+                    results[mode] = {
+                        concurrency: self.load(base_url, accounts, concurrency, options['requests'])
+                        for concurrency in options['concurrency']
+                    }
+                finally:
+                    server.terminate()
+                    server.wait()
+
+        self.stdout.write(
+            f'WSGI: {options["threads"]} потоков; ASGI: daphne, один процесс; '
+            f'задержка базы {options["db_latency_ms"]} мс на запрос'
+        )
+        self.stdout.write(f'{"клиентов":>9}{"режим":>7}{"запр/с":>9}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}{"ошибок":>8}')
+        for concurrency in options['concurrency']:
+            for mode in ('wsgi', 'asgi'):
+                item = results[mode][concurrency]
+                self.stdout.write(
+                    f'{concurrency:>9}{mode:>7}{item["throughput"]:>9.1f}{item["p50_ms"]:>10.1f}'
+                    f'{item["p95_ms"]:>10.1f}{item["p99_ms"]:>10.1f}{item["errors"]:>8}'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump({
+                    'threads': options['threads'], 'db_latency_ms': options['db_latency_ms'], 'results': results
+                }, output, indent=2)
+
+    def manage(self, env, *args):
+        completed = subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *args], env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise CommandError(completed.stderr)
+        return completed.stdout
+
+    def free_port(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def wait_ready(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(server.stderr.read().decode())
+            try:
+                urllib.request.urlopen(base_url + '/api/matching/health/', timeout=1).read()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError('Сервер не запустился')
+
+    def seed(self, count):
+        """Пользователи с общим предметом, мэтчи и чаты с историей; токены и чаты аккаунтов"""
+        subject = Subject.objects.create(name='Математика', code='MATH')
+        users = [make_user(f'bench{i}') for i in range(count)]
+        for user in users:
+            UserSubject.objects.create(user=user, subject=subject)
+        accounts = []
+        for i in range(0, count - 1, 2):
+            first, second = users[i], users[i + 1]
+            Match.objects.create(user1=first, user2=second)
+            room = ChatRoom.objects.create(user1=first, user2=second)
+            for number in range(30):
+                message = Message.objects.create(chat_room=room, sender=(first, second)[number % 2], content=f'Сообщение {number}')
+                room.register_message(message)
+            accounts += [{'token': str(AccessToken.for_user(user)), 'room_id': room.id} for user in (first, second)]
+        return accounts
+
+    def serve(self, options):
+        if options['db_latency_ms']:
+            _add_latency(options['db_latency_ms'] / 1000)
+        if options['serve'] == 'wsgi':
+            from django.core.wsgi import get_wsgi_application
+            server = make_server(
+                '127.0.0.1', options['port'], get_wsgi_application(),
+                server_class=lambda *args, **kwargs: PooledWSGIServer(*args, threads=options['threads'], **kwargs),
+                handler_class=QuietHandler,
+            )
+            server.serve_forever()
+        else:
+            from daphne.server import Server
+            from studymatch.asgi import application
+            Server(application, endpoints=[f'tcp:port={options["port"]}:interface=127.0.0.1'], verbosity=0).run()
+
+    def load(self, base_url, accounts, concurrency, total):
+        def request(number):
+            account = accounts[number % len(accounts)]
+            _, path = ENDPOINTS[number % len(ENDPOINTS)]
+            http_request = urllib.request.Request(
+                base_url + path.format(room_id=account['room_id']),
+                headers={'Authorization': f'Bearer {account["token"]}', 'Accept': 'application/json'}
+            )
+            with Timer() as timer:
+                try:
+                    with urllib.request.urlopen(http_request, timeout=60) as response:
+                        response.read()
+                        ok = response.status == 200
+                except (urllib.error.URLError, OSError):
+                    ok = False
+            return timer.elapsed * 1000, ok
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, Timer() as elapsed:
+            results = list(executor.map(request, range(total)))
+        latencies = [latency for latency, ok in results if ok]
+        return {
+            'throughput': round(len(latencies) / elapsed.elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'errors': sum(1 for _, ok in results if not ok),
+        }
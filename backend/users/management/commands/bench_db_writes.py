@@ -0,0 +1,94 @@
+# users/management/commands/bench_db_writes.py
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from chat.models import ChatRoom, Message
+from matching.swipes import record_swipe, AlreadySwiped
+from studymatch.benchmarks import isolated_database, make_user, percentile, Timer
+
+
+class Command(BaseCommand):
+    help = 'Пропускная способность параллельной записи (сообщения чата и свайпы) для профилей базы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=2000, help='Всего операций записи')
+        # Служебный режим: замер в дочернем процессе с уже выставленным окружением профиля
+        parser.add_argument('--worker', action='store_true', help='(служебный) выполнить замер в этом процессе')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run(options['threads'], options['writes'])))
+            return
+
+        # Каждый профиль - отдельный процесс: настройки базы читаются из окружения при старте
+        with tempfile.TemporaryDirectory() as directory:
+            profiles = [
+                ('sqlite (по умолчанию Django)', {'DATABASE_URL': f'sqlite:///{directory}/legacy.db', 'SQLITE_TUNED': '0'}),
+                ('sqlite (WAL, IMMEDIATE)', {'DATABASE_URL': f'sqlite:///{directory}/tuned.db', 'SQLITE_TUNED': '1'}),
+            ]
+            if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+                profiles.append(('текущий DATABASE_URL', {}))
+
+            self.stdout.write(f'{"профиль":<30}{"оп/с":>10}{"ошибок":>9}{"p50, мс":>10}{"p99, мс":>10}')
+            for name, env in profiles:
+                result = self.run_profile(env, options)
+                self.stdout.write(
+                    f'{name:<30}{result["throughput"]:>10.1f}{result["errors"]:>9}'
+                    f'{result["p50_ms"]:>10.1f}{result["p99_ms"]:>10.1f}'
+                )
+
+    def run_profile(self, env, options):
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_db_writes', '--worker',
+            '--threads', str(options['threads']), '--writes', str(options['writes']),
+        ]
+        completed = subprocess.run(command, env={**os.environ, **env}, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(completed.stderr)
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run(self, threads, writes):
+        with isolated_database():
+            users = [make_user(f'writer{i}') for i in range(threads * 2)]
+            rooms = [ChatRoom.objects.create(user1=users[i], user2=users[i + 1]) for i in range(0, len(users), 2)]
+            targets = [make_user(f'target{i}') for i in range(writes // 2 + 1)]
+
+            def write(number):
+                # Чередуем сообщение в чат (две записи в транзакции) и свайп (транзакция с блокировками)
+                try:
+                    with Timer() as timer:
+                        if number % 2:
+                            room = rooms[number % len(rooms)]
+                            with transaction.atomic():
+                                message = Message.objects.create(chat_room=room, sender_id=room.user1_id, content='Привет')
+                                room.register_message(message)
+                        else:
+                            record_swipe(users[number % len(users)].id, targets[number // 2].id, 'like')
+                    return timer.elapsed, None
+                except (OperationalError, AlreadySwiped) as error:
+                    return None, error
+
+            def worker(offset):
+                # Одно соединение на поток на все его операции - как у воркера сервера
+                try:
+                    return [write(number) for number in range(offset, writes, threads)]
+                finally:
+                    connection.close()
+
+            with ThreadPoolExecutor(max_workers=threads) as executor, Timer() as total:
+                results = [result for chunk in executor.map(worker, range(threads)) for result in chunk]
+
+        latencies = [elapsed * 1000 for elapsed, error in results if error is None]
+        return {
+            'throughput': len(latencies) / total.elapsed,
+            'errors': sum(1 for _, error in results if error is not None),
+            'p50_ms': percentile(latencies, 0.5),
+            'p99_ms': percentile(latencies, 0.99),
+        }
@@ -0,0 +1,74 @@
+# users/management/commands/bench_responses.py
+import json
+import time
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from chat.models import ChatRoom
+from matching.models import Subject
+from studymatch.benchmarks import isolated_database, make_user, seed_owner_lists
+from studymatch.compression import brotli
+from studymatch.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Байты ответа (без сжатия, gzip, brotli) и процессорное время на запрос для основных эндпоинтов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Строк в каждом списке')
+        parser.add_argument('--requests', type=int, default=20, help='Запросов на замер')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            owner = make_user('owner')
+            room = ChatRoom.objects.create(user1=owner, user2=make_user('partner'))
+            seed_owner_lists(owner, room, 0, options['rows'])
+            Subject.objects.bulk_create(
+                Subject(name=f'Предмет {i}', code=f'S{i}', description='Описание предмета') for i in range(100)
+            )
+            client = APIClient()
+            client.force_authenticate(owner)
+            endpoints = [
+                '/api/matching/matches/',
+                '/api/matching/subjects/',
+                '/api/chat/rooms/',
+                f'/api/chat/messages/{room.id}/?limit=200',
+                '/api/study-sessions/sessions/',
+                '/api/study-sessions/calendar/?limit=100',
+            ]
+            encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+
+            self.stdout.write('Байты ответа и CPU на запрос (мс), полный стек Django')
+            header = f'{"эндпоинт":<44}' + ''.join(f'{encoding:>10}{"cpu":>8}' for encoding in encodings)
+            self.stdout.write(header)
+            for url in endpoints:
+                line = f'{url:<44}'
+                for encoding in encodings:
+                    size, cpu_ms = self.measure(client, url, encoding, options['requests'])
+                    line += f'{size:>10}{cpu_ms:>8.2f}'
+                self.stdout.write(line)
+
+            self.stdout.write('')
+            self.stdout.write('Только рендер JSON (мс на ответ)')
+            self.stdout.write(f'{"эндпоинт":<44}{"DRF":>10}{"orjson":>10}')
+            for url in endpoints:
+                response = client.get(url)
+                # Справочники отдаются готовыми байтами из кэша - данные берем из тела
+                data = response.data if hasattr(response, 'data') else json.loads(response.content)
+                drf_ms = self.render_time(JSONRenderer(), data, options['requests'])
+                fast_ms = self.render_time(FastJSONRenderer(), data, options['requests'])
+                self.stdout.write(f'{url:<44}{drf_ms:>10.3f}{fast_ms:>10.3f}')
+
+    def measure(self, client, url, encoding, requests):
+        """Размер тела на проводе и процессорное время на запрос"""
+        response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        started = time.process_time()
+        for _ in range(requests):
+            client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        return len(response.content), (time.process_time() - started) * 1000 / requests
+
+    def render_time(self, renderer, data, repeat):
+        started = time.process_time()
+        for _ in range(repeat):
+            renderer.render(data)
+        return (time.process_time() - started) * 1000 / repeat
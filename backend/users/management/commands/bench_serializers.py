@@ -0,0 +1,67 @@
+# users/management/commands/bench_serializers.py
+import statistics
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from rest_framework.renderers import JSONRenderer
+from chat.models import ChatRoom, Message
+from chat.serializers import MessageSerializer
+from matching.models import Match
+from matching.serializers import MatchSerializer
+from study_sessions.models import StudySession
+from study_sessions.serializers import StudySessionSerializer, session_list_data
+from studymatch.benchmarks import isolated_database, make_user, seed_owner_lists, Timer
+from studymatch.payloads import match_payload, message_payload, MATCH_VALUES, MESSAGE_VALUES
+
+
+class Command(BaseCommand):
+    help = 'Сравнение DRF-сериализаторов и быстрого пути .values() для списков на 10/100/1000 строк'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=7, help='Повторов на замер (берется медиана)')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.owner = make_user('owner')
+            self.room = ChatRoom.objects.create(user1=self.owner, user2=make_user('partner'))
+            self.renderer = JSONRenderer()
+            self.stdout.write(f'{"список":<10}{"строк":>7}{"DRF, мс":>12}{"values, мс":>13}{"ускорение":>11}')
+            created = 0
+            for size in sorted(options['sizes']):
+                seed_owner_lists(self.owner, self.room, created, size)
+                created = size
+                for name, drf, fast in self.cases():
+                    drf_ms, drf_body = self.measure(drf, options['repeat'])
+                    fast_ms, fast_body = self.measure(fast, options['repeat'])
+                    if drf_body != fast_body:
+                        raise CommandError(f'{name}: JSON быстрого пути отличается от сериализатора')
+                    self.stdout.write(f'{name:<10}{size:>7}{drf_ms:>12.2f}{fast_ms:>13.2f}{drf_ms / fast_ms:>10.1f}x')
+
+    def cases(self):
+        request = SimpleNamespace(user=self.owner)
+        matches = Match.objects.filter(Q(user1=self.owner) | Q(user2=self.owner), is_active=True).order_by('id')
+        messages = Message.objects.filter(chat_room=self.room).order_by('timestamp', 'id')
+        sessions = StudySession.objects.filter(is_active=True).order_by('scheduled_time')
+        return [
+            ('matches',
+             lambda: MatchSerializer(matches.select_related('user1__profile', 'user2__profile'),
+                                     many=True, context={'request': request}).data,
+             lambda: [match_payload(row, self.owner.id) for row in matches.values(*MATCH_VALUES)]),
+            ('messages',
+             lambda: MessageSerializer(messages.select_related('sender__profile'), many=True).data,
+             lambda: [message_payload(row) for row in messages.values(*MESSAGE_VALUES)]),
+            ('sessions',
+             lambda: StudySessionSerializer(sessions.for_listing(), many=True).data,
+             lambda: session_list_data(sessions.listing_rows())),
+        ]
+
+    def measure(self, build, repeat):
+        """Медиана времени построения и рендера ответа (запросы к базе включены)"""
+        timings = []
+        body = None
+        for _ in range(repeat):
+            with Timer() as timer:
+                body = self.renderer.render(build())
+            timings.append(timer.elapsed * 1000)
+        return statistics.median(timings), body
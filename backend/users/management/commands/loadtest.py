@@ -0,0 +1,360 @@
+# users/management/commands/loadtest.py
+import json
+import platform
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from matching.index import candidate_index
+from matching.models import Subject, UserSubject, Swipe
+from matching.swiped_cache import swiped_cache
+from study_sessions.models import StudySession, SessionParticipant
+from studymatch.benchmarks import isolated_database, percentile
+from users.cache import user_cache
+from users.models import University, UserProfile
+
+# Пароль всех засеянных пользователей (хэш считается один раз на весь посев)
+SEED_PASSWORD = 'loadtest-Passw0rd'
+SEED_PREFIX = 'loadtest_'
+LEVELS = ['beginner', 'intermediate', 'advanced']
+
+
+class TestClientTransport:
+    """Запросы через тестовый клиент в этом процессе; считает SQL-запросы на каждый запрос"""
+
+    counts_queries = True
+
+    def __init__(self):
+        self.client = APIClient()
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method.lower())(path, data, format='json', **headers)
+        try:
+            body = json.loads(response.content) if response.content else None
+        except ValueError:
+            body = None
+        return response.status_code, body, len(queries.captured_queries)
+
+
+class HttpTransport:
+    """Запросы к запущенному серверу по HTTP; SQL-запросы сервера отсюда не видны"""
+
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(data).encode() if data is not None and method != 'GET' else None
+        request = urllib.request.Request(self.base_url + path, data=payload, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, content = error.code, error.read()
+        try:
+            body = json.loads(content) if content else None
+        except ValueError:
+            body = None
+        return status, body, None
+
+
+class Recorder:
+    """Результаты запросов по эндпоинтам; потокобезопасный"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)  # эндпоинт -> [(мс, ожидаемый статус, SQL-запросов)]
+
+    def add(self, endpoint, elapsed_ms, ok, queries):
+        with self._lock:
+            self.samples[endpoint].append((elapsed_ms, ok, queries))
+
+    def report(self, duration):
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = [elapsed for elapsed, _, _ in samples]
+            queries = [count for _, _, count in samples if count is not None]
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'errors': sum(1 for _, ok, _ in samples if not ok),
+                'throughput_rps': round(len(samples) / duration, 2),
+                'latency_ms': {
+                    'mean': round(sum(latencies) / len(latencies), 2),
+                    'p50': round(percentile(latencies, 0.5), 2),
+                    'p90': round(percentile(latencies, 0.9), 2),
+                    'p95': round(percentile(latencies, 0.95), 2),
+                    'p99': round(percentile(latencies, 0.99), 2),
+                    'max': round(max(latencies), 2),
+                },
+                'queries_per_request': {
+                    'mean': round(sum(queries) / len(queries), 2),
+                    'max': max(queries),
+                } if queries else None,
+            }
+        total = sum(item['requests'] for item in endpoints.values())
+        return {
+            'total': {
+                'requests': total,
+                'errors': sum(item['errors'] for item in endpoints.values()),
+                'duration_s': round(duration, 3),
+                'throughput_rps': round(total / duration, 2),
+            },
+            'endpoints': endpoints,
+        }
+
+
+class Journey:
+    """Путь одного пользователя: регистрация, вход, рекомендации, свайпы, мэтчи, чат, сессии"""
+
+    def __init__(self, transport, recorder, rng):
+        self.transport = transport
+        self.recorder = recorder
+        self.rng = rng
+        self.token = None
+
+    def call(self, endpoint, method, path, data=None, expected=(200,)):
+        started = time.perf_counter()
+        status, body, queries = self.transport.request(method, path, data, self.token)
+        self.recorder.add(endpoint, (time.perf_counter() - started) * 1000, status in expected, queries)
+        return status, body
+
+    def run(self, number, account, partner_id, session_ids):
+        # Регистрация нового пользователя (его токен дальше не нужен)
+        self.call('POST /api/auth/register/', 'POST', '/api/auth/register/', {
+            'username': f'{SEED_PREFIX}new_{number}_{self.rng.randrange(10 ** 9)}',
+            'password': SEED_PASSWORD, 'email': f'new{number}@example.com'
+        }, expected=(201,))
+
+        # Дальше - засеянный пользователь с предметами и входящим лайком от partner
+        status, body = self.call('POST /api/auth/login/', 'POST', '/api/auth/login/', {
+            'username': account, 'password': SEED_PASSWORD
+        })
+        if status != 200:
+            return
+        self.token = body['access']
+
+        self.call('GET /api/matching/subjects/', 'GET', '/api/matching/subjects/')
+        self.call('GET /api/auth/universities/', 'GET', '/api/auth/universities/')
+
+        status, body = self.call('GET /api/matching/recommendations/', 'GET', '/api/matching/recommendations/?limit=20')
+        recommended = [item['id'] for item in body['results']] if status == 200 else []
+        if status == 200 and body['next_cursor']:
+            self.call('GET /api/matching/recommendations/', 'GET',
+                      f'/api/matching/recommendations/?limit=20&cursor={body["next_cursor"]}')
+
+        for user_id in recommended[:5]:
+            if user_id == partner_id:
+                continue
+            self.call('POST /api/matching/swipe/{id}/', 'POST', f'/api/matching/swipe/{user_id}/',
+                      {'action': self.rng.choice(['like', 'like', 'pass'])}, expected=(201,))
+        # Лайк в ответ на входящий - мэтч
+        self.call('POST /api/matching/swipe/{id}/', 'POST', f'/api/matching/swipe/{partner_id}/',
+                  {'action': 'like'}, expected=(201,))
+        self.call('GET /api/matching/matches/', 'GET', '/api/matching/matches/')
+
+        status, body = self.call('POST /api/chat/rooms/create/{id}/', 'POST', f'/api/chat/rooms/create/{partner_id}/',
+                                 expected=(200, 201))
+        if status in (200, 201):
+            room_id = body['id']
+            for i in range(3):
+                self.call('POST /api/chat/messages/{id}/', 'POST', f'/api/chat/messages/{room_id}/',
+                          {'content': f'Привет! Сообщение {i}'}, expected=(201,))
+            self.call('GET /api/chat/messages/{id}/', 'GET', f'/api/chat/messages/{room_id}/')
+        self.call('GET /api/chat/rooms/', 'GET', '/api/chat/rooms/')
+
+        self.call('GET /api/study-sessions/calendar/', 'GET', '/api/study-sessions/calendar/?limit=20')
+        self.call('GET /api/study-sessions/upcoming/', 'GET', '/api/study-sessions/upcoming/?hours=48')
+        # Мест может не быть (очередь), сессия может пересекаться с уже выбранными
+        self.call('POST /api/study-sessions/join/{id}/', 'POST',
+                  f'/api/study-sessions/join/{self.rng.choice(session_ids)}/', expected=(201, 202, 400, 409))
+        self.call('GET /api/study-sessions/my-sessions/', 'GET', '/api/study-sessions/my-sessions/')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест полного пути пользователя. Засевает пользователей, университеты, предметы, '
+        'UserSubject и сессии, гоняет параллельные пути и пишет JSON с пропускной способностью, '
+        'перцентилями задержки и числом SQL-запросов по эндпоинтам. По умолчанию - тестовый клиент '
+        'на временной базе; с --base-url - запущенный сервер (засев в его базу - флаг --seed, '
+        'сервер нужно запускать после засева: индекс кандидатов строится в памяти процесса).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Засеваемых пользователей')
+        parser.add_argument('--universities', type=int, default=50)
+        parser.add_argument('--subjects', type=int, default=100)
+        parser.add_argument('--subjects-per-user', type=int, default=3)
+        parser.add_argument('--sessions', type=int, default=300, help='Засеваемых учебных сессий')
+        parser.add_argument('--journeys', type=int, default=50, help='Сколько пользователей проходят путь')
+        parser.add_argument('--concurrency', type=int, default=8, help='Параллельных путей')
+        parser.add_argument('--base-url', help='Адрес запущенного сервера, например http://127.0.0.1:8000')
+        parser.add_argument('--seed', action='store_true', help='С --base-url: засеять данные в базу сервера')
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--output', default='loadtest-results.json', help='Файл JSON с результатами')
+
+    def handle(self, *args, **options):
+        if options['journeys'] * 2 > options['users']:
+            raise CommandError('--users должно быть не меньше 2 * --journeys')
+
+        if options['base_url']:
+            transport_factory = lambda: HttpTransport(options['base_url'])  # noqa: E731
+            if options['seed']:
+                population = self.seed(options)
+            else:
+                population = self.existing_population(options)
+            result = self.run(options, transport_factory, population)
+        else:
+            with isolated_database():
+                population = self.seed(options)
+                # Посев идет через bulk_create, мимо сигналов - сбрасываем кэши процесса
+                candidate_index.reset()
+                swiped_cache.clear()
+                user_cache.clear()
+                for alias in ('default', 'reference'):
+                    caches[alias].clear()
+                result = self.run(options, TestClientTransport, population)
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(result, output, ensure_ascii=False, indent=2)
+        self.print_summary(result)
+        self.stdout.write(self.style.SUCCESS(f'Результаты записаны в {options["output"]}'))
+
+    def seed(self, options):
+        """Засеять данные пачками; возвращает аккаунты путей, их партнеров и id сессий"""
+        rng = random.Random(options['random_seed'])
+        started = time.perf_counter()
+        password = make_password(SEED_PASSWORD)
+
+        universities = University.objects.bulk_create(
+            University(name=f'Университет {i}', short_name=f'У{i}', city='Москва') for i in range(options['universities'])
+        )
+        subjects = Subject.objects.bulk_create(
+            Subject(name=f'{SEED_PREFIX}Предмет {i}', code=f'LT{i}', description='Предмет для нагрузочного теста')
+            for i in range(options['subjects'])
+        )
+        users = User.objects.bulk_create(
+            User(username=f'{SEED_PREFIX}{i}', password=password, first_name=f'Студент{i}')
+            for i in range(options['users'])
+        )
+        UserProfile.objects.bulk_create(
+            UserProfile(user=user, university=rng.choice(universities), faculty=rng.choice(['ИТ', 'Физфак', 'Мехмат']),
+                        year_of_study=rng.randint(1, 5), bio='Ищу партнера для учебы')
+            for user in users
+        )
+
+        journeys = options['journeys']
+        user_subjects = []
+        for i, user in enumerate(users):
+            chosen = rng.sample(subjects, min(options['subjects_per_user'], len(subjects)))
+            user_subjects += [UserSubject(user=user, subject=subject, level=rng.choice(LEVELS)) for subject in chosen]
+            if i < journeys:
+                # Партнер пути делит с ним предмет и уже лайкнул его
+                partner = users[journeys + i]
+                user_subjects.append(UserSubject(user=partner, subject=chosen[0], level='beginner'))
+        UserSubject.objects.bulk_create(user_subjects, ignore_conflicts=True)
+        Swipe.objects.bulk_create(
+            Swipe(swiper=users[journeys + i], swiped_user=users[i], action='like') for i in range(journeys)
+        )
+
+        now = timezone.now()
+        sessions = []
+        for i in range(options['sessions']):
+            scheduled = now + timedelta(hours=rng.randint(2, 24 * 14))
+            duration = rng.choice([45, 60, 90])
+            sessions.append(StudySession(
+                title=f'Сессия {i}', subject_name=rng.choice(subjects).name,
+                created_by=rng.choice(users[2 * journeys:] or users), scheduled_time=scheduled,
+                duration_minutes=duration, ends_at=scheduled + timedelta(minutes=duration),
+                max_participants=rng.randint(3, 8), seats_taken=1
+            ))
+        sessions = StudySession.objects.bulk_create(sessions)
+        SessionParticipant.objects.bulk_create(
+            SessionParticipant(session=session, user_id=session.created_by_id) for session in sessions
+        )
+
+        self.stdout.write(f'Засев: {len(users)} пользователей, {len(user_subjects)} UserSubject, '
+                          f'{len(sessions)} сессий за {time.perf_counter() - started:.1f} с')
+        return self.population(users[:journeys], users[journeys:2 * journeys], [session.id for session in sessions])
+
+    def existing_population(self, options):
+        """Данные, засеянные прошлым запуском с --seed"""
+        journeys = options['journeys']
+        users = list(User.objects.filter(username__startswith=SEED_PREFIX).exclude(
+            username__startswith=f'{SEED_PREFIX}new_').order_by('id')[:2 * journeys])
+        session_ids = list(StudySession.objects.filter(
+            is_active=True, scheduled_time__gt=timezone.now()).values_list('id', flat=True)[:1000])
+        if len(users) < 2 * journeys or not session_ids:
+            raise CommandError('Нет засеянных данных - запустите с --seed')
+        return self.population(users[:journeys], users[journeys:], session_ids)
+
+    def population(self, accounts, partners, session_ids):
+        return {
+            'accounts': [user.username for user in accounts],
+            'partners': [user.id for user in partners],
+            'session_ids': session_ids,
+        }
+
+    def run(self, options, transport_factory, population):
+        def journey(number):
+            rng = random.Random(options['random_seed'] + number)
+            try:
+                Journey(transport_factory(), recorder, rng).run(
+                    number, population['accounts'][number], population['partners'][number], population['session_ids']
+                )
+            finally:
+                # Потоки тестового клиента держат свои соединения с базой
+                connection.close()
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(journey, range(options['journeys'])))
+        duration = time.perf_counter() - started
+
+        result = recorder.report(duration)
+        result['meta'] = {
+            'timestamp': timezone.now().isoformat(),
+            'mode': 'http' if options['base_url'] else 'test_client',
+            'base_url': options['base_url'],
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'seed': {key: options[key] for key in ('users', 'universities', 'subjects', 'subjects_per_user', 'sessions')},
+            'journeys': options['journeys'],
+            'concurrency': options['concurrency'],
+            'random_seed': options['random_seed'],
+        }
+        return result
+
+    def print_summary(self, result):
+        self.stdout.write(f'{"эндпоинт":<42}{"запр.":>7}{"ошиб.":>7}{"rps":>8}{"p50":>8}{"p95":>8}{"p99":>8}{"SQL":>6}')
+        for endpoint, item in result['endpoints'].items():
+            latency = item['latency_ms']
+            queries = item['queries_per_request']
+            self.stdout.write(
+                f'{endpoint:<42}{item["requests"]:>7}{item["errors"]:>7}{item["throughput_rps"]:>8.1f}'
+                f'{latency["p50"]:>8.1f}{latency["p95"]:>8.1f}{latency["p99"]:>8.1f}'
+                f'{(queries["mean"] if queries else "-"):>6}'
+            )
+        total = result['total']
+        self.stdout.write(f'Всего: {total["requests"]} запросов за {total["duration_s"]} с, '
+                          f'{total["throughput_rps"]} rps, ошибок {total["errors"]}')
@@ -10,6 +10,49 @@ class UniversitySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'short_name', 'city', 'website']
 
 
+class SimpleProfileSerializer(serializers.Serializer):
+    """Упрощенный профиль пользователя для списков (мэтчи, чаты, сессии, рекомендации).
+
+    Принимает словарь из simple_profile_data() или studymatch.payloads.profile_payload().
+    """
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+    faculty = serializers.CharField()
+    year_of_study = serializers.IntegerField()
+    bio = serializers.CharField()
+
+
+def simple_profile_data(user):
+    """Данные для SimpleProfileSerializer; None, если у пользователя нет профиля.
+
+    Профиль должен быть заранее загружен через select_related('...profile'),
+    иначе на каждого пользователя уйдет отдельный запрос.
+    """
+    try:
+        profile = user.profile
+    except UserProfile.DoesNotExist:
+        return None
+    return {
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'faculty': profile.faculty,
+        'year_of_study': profile.year_of_study,
+        'bio': profile.bio
+    }
+
+
+def simple_profile(user):
+    """Сериализованный упрощенный профиль или None"""
+    data = simple_profile_data(user)
+    if data is None:
+        return None
+    return SimpleProfileSerializer(data).data
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     university = UniversitySerializer(read_only=True)
     university_id = serializers.PrimaryKeyRelatedField(
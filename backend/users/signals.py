@@ -0,0 +1,26 @@
+# users/signals.py
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from studymatch import reference_cache
+from .cache import user_cache
+from .models import UserProfile, University
+
+
+@receiver(post_save, sender=University)
+@receiver(post_delete, sender=University)
+def university_changed(sender, **kwargs):
+    reference_cache.invalidate('universities')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: user_cache.invalidate(instance.pk))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: user_cache.invalidate(instance.user_id))
@@ -1,4 +1,81 @@
 # users/tests.py
-from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+from studymatch.testing import TestCase
+from .cache import user_cache
+from .models import UserProfile
+from .views import get_profile
 
-# Create your tests here.
+
+class StatelessJWTAuthenticationTestCase(TestCase):
+    """request.user из claims токена: строка User загружается лениво и кэшируется"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create(username='alice')
+        UserProfile.objects.create(user=self.user, faculty='ИТ')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def test_id_only_views_skip_user_query(self):
+        # Только запрос мэтчей - без загрузки пользователя
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/matching/matches/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_is_cached_and_invalidated(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['profile']['faculty'], 'ИТ')
+        with self.assertNumQueries(0):
+            self.client.get('/api/auth/profile/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/auth/profile/update/', {'faculty': 'Физфак'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['profile']['faculty'], 'Физфак')
+
+    def test_inactive_user_rejected_on_load(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            self.user.refresh_from_db()
+            self.user.save()
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+
+class AuthViewsTestCase(TestCase):
+    """Регистрация, вход и профиль отдают профиль пользователя (related_name='profile')"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register_and_login(self):
+        response = self.client.post('/api/auth/register/', {
+            'username': 'alice', 'password': 'секрет-123', 'email': 'alice@example.com'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        profile = UserProfile.objects.get(user__username='alice')
+        self.assertEqual(response.data['user']['id'], profile.id)
+        self.assertIn('access', response.data)
+
+        response = self.client.post('/api/auth/login/', {'username': 'alice', 'password': 'секрет-123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['id'], profile.id)
+        self.assertIn('refresh', response.data)
+
+        response = self.client.post('/api/auth/login/', {'username': 'alice', 'password': 'неверный'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_get_profile(self):
+        user = User.objects.create(username='bob')
+        profile = UserProfile.objects.create(user=user, faculty='ИТ', year_of_study=2)
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user)
+        response = get_profile(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['id'], response.data['faculty']), (profile.id, 'ИТ'))
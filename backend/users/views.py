@@ -14,6 +14,7 @@ from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from .models import UserProfile, University  # Убедитесь, что University импортирован
+from studymatch.reference_cache import reference_response
 
 
 @api_view(['POST'])
@@ -24,7 +25,7 @@ def register(request):
         user = serializer.save()
         refresh = RefreshToken.for_user(user)
         return Response({
-            'user': UserProfileSerializer(user.userprofile).data,
+            'user': UserProfileSerializer(user.profile).data,
             'refresh': str(refresh),
             'access': str(refresh.access_token),
         }, status=status.HTTP_201_CREATED)
@@ -41,7 +42,7 @@ def login(request):
     if user:
         refresh = RefreshToken.for_user(user)
         return Response({
-            'user': UserProfileSerializer(user.userprofile).data,
+            'user': UserProfileSerializer(user.profile).data,
             'refresh': str(refresh),
             'access': str(refresh.access_token),
         })
@@ -51,7 +52,7 @@ def login(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_profile(request):
-    profile = request.user.userprofile
+    profile = request.user.profile
     serializer = UserProfileSerializer(profile)
     return Response(serializer.data)
 
@@ -73,10 +74,10 @@ def health_check(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_universities(request):
-    """Получить список университетов"""
-    universities = University.objects.all()
-    serializer = UniversitySerializer(universities, many=True)
-    return Response(serializer.data)
+    """Получить список университетов (из кэша справочников, с поддержкой ETag)"""
+    return reference_response(
+        request, 'universities', lambda: UniversitySerializer(University.objects.all(), many=True).data
+    )
 
 
 @api_view(['PUT', 'PATCH'])